@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Batch engine (needs NumPy)
+Steps a whole population of players at once for balance work. Stats are an
+N x stats array (columns in initial_state["stats"] order) and flags an
+N x flags bit matrix. Applying one action per player is a handful of array
+operations with the same rules as GameEngine.handle_location_action and
+advance_time: cost check, stat changes clamped as in effects.py, then the
+hunger/hygiene decay and starvation/health endings. Heist feasibility for
+every player is one matrix comparison against all option requirements.
+
+    python3 batch.py --players 1000000 --steps 100
+
+Only location actions are batched; dialogues, travel and the heist itself
+stay with GameEngine.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:  # optional: pip install numpy
+    np = None
+
+import gamedata
+from effects import STAT_LIMITS, DEFAULT_LIMITS, effects_for
+from engine import HEIST_PHASES, HUNGER_DECAY, HYGIENE_DECAY
+from state import TIMES, layout_for
+
+# Values of BatchEngine.ending; 0 means still playing
+ENDINGS = (None, "starvation", "health")
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("batch.py needs NumPy (pip install numpy)")
+
+
+class BatchEngine:
+    """N players' stats, flags and clocks, advanced together.
+
+    Actions are given as indexes into `action_names`; NOOP (the last index)
+    leaves a player untouched. Players that reach an ending are frozen.
+    """
+
+    def __init__(self, data, players, state=None):
+        require_numpy()
+        layout = layout_for(data["initial_state"])
+        state = state or layout.template
+        self.layout = layout
+        self.stat_names = layout.stat_names
+        self.stats = np.tile(np.array(state.stats, dtype=np.int32), (players, 1))
+        self.flags = np.zeros((players, len(layout.flag_names)), dtype=bool)
+        self.flags[:] = [bool(state.flags & layout.flag_bits[name]) for name in layout.flag_names]
+        self.day = np.full(players, state.day, dtype=np.int32)
+        self.slot = np.full(players, state.slot, dtype=np.int8)
+        self.ending = np.zeros(players, dtype=np.int8)
+        self.money = layout.stat_index["money"]
+        self.hunger = layout.stat_index["hunger"]
+        self.hygiene = layout.stat_index["hygiene"]
+        self.health = layout.stat_index["health"]
+        self.compile_actions(effects_for(data))
+        self.compile_heist(data)
+        # step() clips every column, which only matches the engine while all stats stay in range
+        if ((self.stats < self.low) | (self.stats > self.high)).any():
+            raise ValueError("every stat must start within its limits (see effects.py)")
+
+    def compile_actions(self, table):
+        """Turn every compiled Effect into one row of stat changes.
+
+        The cost goes in the money column and "full" becomes a change big
+        enough to reach the top limit, so taking an action is one add
+        and one clip.
+        """
+        self.action_names = list(table.actions)
+        self.NOOP = len(self.action_names)
+        rows = self.NOOP + 1
+        limits = [STAT_LIMITS.get(name, DEFAULT_LIMITS) for name in self.stat_names]
+        self.low = np.array([low for low, _ in limits], dtype=np.int32)
+        self.high = np.array([high for _, high in limits], dtype=np.int32)
+        self.cost = np.zeros(rows, dtype=np.int32)
+        self.advances = np.zeros(rows, dtype=np.int32)
+        self.deltas = np.zeros((rows, len(self.stat_names)), dtype=np.int32)
+        self.flag_sets = np.zeros((rows, len(self.layout.flag_names)), dtype=bool)
+        for row, name in enumerate(self.action_names):
+            effect = table.actions[name]
+            self.cost[row] = effect.cost
+            self.advances[row] = effect.advance_time
+            self.deltas[row, self.money] -= effect.cost
+            for index, delta, _, _ in effect.adds:
+                self.deltas[row, index] += delta
+            for index, value in effect.sets:
+                if value != self.high[index]:
+                    raise ValueError(f"{name!r}: only \"full\" is supported as a set value")
+                self.deltas[row, index] += self.high[index] - self.low[index]
+            for bit in range(len(self.layout.flag_names)):
+                self.flag_sets[row, bit] = bool(effect.flags & (1 << bit))
+        self.sets_flags = bool(self.flag_sets.any())
+
+    def compile_heist(self, data):
+        """Flatten the museum heist's options, scene by scene."""
+        stats, reqs, starts = [], [], []
+        for phase, _ in HEIST_PHASES:
+            for scene in data["heist_sequences"]["museum"][phase]:
+                starts.append(len(stats))
+                for opt in scene["options"]:
+                    stats.append(self.layout.stat_index[opt["stat"]])
+                    reqs.append(opt["req"])
+        self.option_stat = np.array(stats, dtype=np.intp)
+        self.option_req = np.array(reqs, dtype=np.int32)
+        self.scene_starts = np.array(starts, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.stats)
+
+    def action_index(self, name):
+        return self.action_names.index(name)
+
+    def step(self, actions):
+        """Take one action per player. Returns which players' actions happened."""
+        actions = np.asarray(actions, dtype=np.intp)
+        stats = self.stats
+        ok = (self.ending == 0) & (stats[:, self.money] >= self.cost[actions])
+        taken = np.where(ok, actions, self.NOOP)
+
+        stats += self.deltas[taken]
+        np.clip(stats, self.low, self.high, out=stats)
+        if self.sets_flags:
+            self.flags |= self.flag_sets[taken]
+
+        self.advance_time(self.advances[taken])
+        return ok
+
+    def advance_time(self, slots):
+        """Advance each player's clock by their count of slots, with GameEngine.pass_time's decay and endings.
+
+        Timed story triggers are not batched.
+        """
+        stats = self.stats
+        # Clocks stop at the slot a player dies in
+        starves = np.maximum(1, -(-stats[:, self.hunger] // HUNGER_DECAY))
+        slots = np.where(stats[:, self.health] <= 0, np.minimum(slots, 1), np.minimum(slots, starves))
+        slot = self.slot + slots
+        self.day += slot // len(TIMES)
+        self.slot = (slot % len(TIMES)).astype(np.int8)
+
+        for column, decay in ((self.hunger, HUNGER_DECAY), (self.hygiene, HYGIENE_DECAY)):
+            values = stats[:, column]
+            values -= slots * np.int32(decay)
+            np.maximum(values, 0, out=values)
+
+        mask = slots > 0
+        starved = mask & (stats[:, self.hunger] <= 0)
+        self.ending[starved] = ENDINGS.index("starvation")
+        self.ending[mask & ~starved & (stats[:, self.health] <= 0)] = ENDINGS.index("health")
+
+    def heist_scenes(self):
+        """N x scenes matrix: can each player pass each heist scene with some option?"""
+        meets = self.stats[:, self.option_stat] >= self.option_req
+        return np.logical_or.reduceat(meets, self.scene_starts, axis=1)
+
+    def heist_feasible(self):
+        """Which players could win the heist right now."""
+        return self.heist_scenes().all(axis=1)
+
+    def stat(self, name):
+        return self.stats[:, self.layout.stat_index[name]]
+
+    def summary(self):
+        playing = self.ending == 0
+        return {
+            "players": len(self),
+            "playing": int(playing.sum()),
+            "endings": {ENDINGS[code]: int((self.ending == code).sum()) for code in range(1, len(ENDINGS))},
+            "heist_feasible": int((self.heist_feasible() & playing).sum()),
+            "mean_stats": {name: round(float(self.stats[:, i].mean()), 2) for i, name in enumerate(self.stat_names)},
+            "mean_day": round(float(self.day.mean()), 2),
+        }
+
+
+def run(players, steps, seed=0):
+    """Evolve a population taking uniformly random actions. Returns (summary, seconds)."""
+    engine = BatchEngine(gamedata.game_data(), players)
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+    for _ in range(steps):
+        engine.step(rng.integers(0, engine.NOOP, players))
+    return engine.summary(), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Step a population of players with NumPy.")
+    parser.add_argument("--players", type=int, default=100000)
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if np is None:
+        parser.error("NumPy is required: pip install numpy")
+
+    summary, seconds = run(args.players, args.steps, args.seed)
+    summary["seconds"] = round(seconds, 3)
+    summary["player_steps_per_second"] = round(args.players * args.steps / seconds)
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
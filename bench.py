@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for PhantomThrill.
+Times the engine, data loading, saves and build.py on scripted scenarios,
+writes the results as JSON and compares them against a stored baseline.
+
+    python3 bench.py                                   # run everything
+    python3 bench.py --only heist,save_load            # run matching benchmarks
+    python3 bench.py --save-baseline bench_baseline.json
+    python3 bench.py --baseline bench_baseline.json    # exit 1 on regressions
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import gamedata
+from engine import HEIST_ACTION, GameEngine
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_FILE = os.path.join(SCRIPT_DIR, "bench_results.json")
+RESULTS_VERSION = 1
+
+SAVE_SIZES = (0, 100, 1000, 10000)
+BUILD_SCALES = (1, 10, 100)
+
+# A result this much slower than its baseline counts as a regression
+DEFAULT_THRESHOLD = 0.25
+
+
+def measure(func, min_time=0.05, repeat=5, number=None):
+    """Time func() and return seconds per call.
+
+    Unless `number` is given, calls are batched so one timed round lasts at
+    least min_time; the median of `repeat` rounds is reported.
+    """
+    if number is None:
+        number = 1
+        while True:
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            if time.perf_counter() - started >= min_time or number >= 10 ** 6:
+                break
+            number *= 10
+
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - started) / number)
+    median = statistics.median(rounds)
+    return {"seconds": median, "min": min(rounds), "ops_per_sec": 1 / median if median else None,
+            "number": number, "repeat": repeat}
+
+
+def ready_engine(data, location=None, **stats):
+    """An engine past the intro, optionally at a location with some stats set."""
+    engine = GameEngine(data)
+    engine.begin()
+    while engine.pending:
+        engine.choose(0)
+    for name, value in stats.items():
+        engine.state.set_stat(name, value)
+    engine.location = location
+    return engine
+
+
+# === Benchmarks ===
+# Each takes (data, opts) and yields (name, result) pairs.
+
+def bench_startup(data, opts):
+    """Cold `import game` (and its first game_data()) in a fresh interpreter, next to a bare interpreter start."""
+    def run(code):
+        return lambda: subprocess.run([sys.executable, "-c", code], cwd=SCRIPT_DIR, check=True)
+
+    repeat = 3 if opts.quick else 10
+    yield "startup/interpreter", measure(run("pass"), repeat=repeat, number=1)
+    yield "startup/import_game", measure(run("import game"), repeat=repeat, number=1)
+    yield "startup/game_data", measure(run("import game; game.game_data()"), repeat=repeat, number=1)
+
+
+def bench_data_load(data, opts):
+    """gamedata.load() through the compiled cache and straight from JSON."""
+    yield "data_load/cached", measure(gamedata.load, opts.min_time, opts.repeat)
+    yield "data_load/uncached", measure(lambda: gamedata.load(use_cache=False), opts.min_time, opts.repeat)
+
+
+def bench_init_game_state(data, opts):
+    import game
+    yield "init_game_state", measure(game.init_game_state, opts.min_time, opts.repeat)
+
+
+def bench_actions(data, opts):
+    """Throughput of single location actions and of the time tick."""
+    engine = ready_engine(data, "gym", money=10 ** 9)
+
+    def work_out():
+        engine.handle_location_action("gym", "Work out")
+        engine.events = []
+
+    yield "actions/handle_location_action", measure(work_out, opts.min_time, opts.repeat)
+
+    state = engine.state
+
+    def tick():
+        state.set_stat("hunger", 100)
+        engine.advance_time()
+
+    yield "actions/advance_time", measure(tick, opts.min_time, opts.repeat)
+
+
+def bench_heist(data, opts):
+    """A whole museum heist, from starting it to the chapter ending."""
+    start = ready_engine(data, "underground", charisma=100, fitness=100, knowledge=100, criminality=100)
+    start.state.set_flag("accepted_heist")
+    start.state.set_flag("got_jade_whip_info")
+
+    def heist():
+        engine = start.clone()
+        engine.step(HEIST_ACTION)
+        while engine.pending:
+            engine.choose(0)
+
+    yield "heist/full", measure(heist, opts.min_time, opts.repeat)
+
+
+def bench_story_playthrough(data, opts):
+    """One scripted Chapter 1 playthrough by simulate.py's story policy."""
+    import simulate
+    simulate.GAME_DATA = data
+
+    def playthrough():
+        simulate.simulate_chunk("story", 1, 7, 2000)
+
+    yield "story_playthrough", measure(playthrough, opts.min_time, opts.repeat)
+
+
+def bench_save_load(data, opts):
+    """Save then load a slot, with ever more inventory, notes and intel."""
+    from saves import SaveStore
+
+    with tempfile.TemporaryDirectory() as save_dir:
+        store = SaveStore(data["initial_state"], save_dir)
+        for size in SAVE_SIZES:
+            engine = ready_engine(data)
+            state = engine.state
+            state.inventory = tuple(f"Item {i}" for i in range(size))
+            state.notes = tuple(f"Note {i}" for i in range(size))
+            state.intel = tuple(f"Intel {i}" for i in range(size))
+
+            def round_trip():
+                store.save("bench", state.to_dict())
+                GameEngine(data, store.load("bench"))
+
+            result = measure(round_trip, opts.min_time, opts.repeat)
+            result["bytes"] = os.path.getsize(os.path.join(save_dir, "bench.json"))
+            yield f"save_load/{size}", result
+
+
+def inflated_game_data(scale):
+    """game_data.json with every dialogue repeated `scale` times under new keys."""
+    with open(gamedata.GAME_DATA_FILE) as f:
+        data = json.load(f)
+    originals = list(data["dialogues"].items())
+    for copy in range(1, scale):
+        for key, lines in originals:
+            data["dialogues"][f"{key}_x{copy}"] = lines
+    return data
+
+
+def bench_build(data, opts):
+    """build.py against game data with 1x, 10x and 100x the dialogues."""
+    import build
+
+    saved = build.GAME_DATA_FILE, build.HTML_FILE
+    with tempfile.TemporaryDirectory() as build_dir:
+        build.GAME_DATA_FILE = os.path.join(build_dir, "game_data.json")
+        build.HTML_FILE = os.path.join(build_dir, "index.html")
+        try:
+            for scale in BUILD_SCALES:
+                with open(build.GAME_DATA_FILE, 'w') as f:
+                    json.dump(inflated_game_data(scale), f, indent=2)
+                for mode in ("plain", "optimize"):
+                    shutil.copy(saved[1], build.HTML_FILE)
+
+                    def run_build():
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            build.build(force=True, mode=mode)
+
+                    result = measure(run_build, opts.min_time, 3 if scale >= 100 else opts.repeat)
+                    result["bytes"] = os.path.getsize(build.HTML_FILE)
+                    yield f"build/{mode}_{scale}x", result
+        finally:
+            build.GAME_DATA_FILE, build.HTML_FILE = saved
+
+
+BENCHMARKS = {
+    "startup": bench_startup,
+    "data_load": bench_data_load,
+    "init_game_state": bench_init_game_state,
+    "actions": bench_actions,
+    "heist": bench_heist,
+    "story_playthrough": bench_story_playthrough,
+    "save_load": bench_save_load,
+    "build": bench_build,
+}
+
+
+# === Reporting ===
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def compare(results, baseline, threshold):
+    """Print each result against the baseline; return the names that regressed."""
+    regressions = []
+    print(f"\n{'benchmark':<34} {'time':>10} {'baseline':>10} {'change':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<34} {format_time(result['seconds']):>10} {'-':>10}")
+            continue
+        change = result["seconds"] / base["seconds"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<34} {format_time(result['seconds']):>10} {format_time(base['seconds']):>10} "
+              f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PhantomThrill.")
+    parser.add_argument("--only", help="comma-separated benchmark names or name prefixes "
+                                       f"({', '.join(BENCHMARKS)})")
+    parser.add_argument("--quick", action="store_true", help="fewer, shorter rounds")
+    parser.add_argument("--output", default=RESULTS_FILE, help="where to write the JSON results")
+    parser.add_argument("--baseline", help="compare against this results file; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown that counts as a regression (default: 0.25 = 25%%)")
+    parser.add_argument("--save-baseline", metavar="FILE", help="also write the results to FILE")
+    opts = parser.parse_args()
+    opts.min_time = 0.01 if opts.quick else 0.05
+    opts.repeat = 3 if opts.quick else 7
+
+    selected = list(BENCHMARKS)
+    if opts.only:
+        patterns = opts.only.split(",")
+        selected = [name for name in BENCHMARKS if any(name.startswith(p) for p in patterns)]
+        if not selected:
+            parser.error(f"no benchmark matches {opts.only!r}")
+
+    random.seed(0)
+    data = gamedata.load()
+    results = {}
+    for name in selected:
+        for result_name, result in BENCHMARKS[name](data, opts):
+            results[result_name] = result
+            rate = f"  ({result['ops_per_sec']:,.0f}/s)" if result["ops_per_sec"] else ""
+            print(f"{result_name:<34} {format_time(result['seconds']):>10}{rate}")
+
+    report = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": opts.quick,
+        "results": results,
+    }
+    for path in filter(None, (opts.output, opts.save_baseline)):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {path}")
+
+    if opts.baseline:
+        with open(opts.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], opts.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {opts.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
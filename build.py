@@ -2,16 +2,118 @@
 """
 Build script that embeds game_data.json into index.html
 Run this after editing game_data.json to update the HTML version.
+
+    python3 build.py            # rebuild if game_data.json changed
+    python3 build.py --force    # rebuild even if nothing changed
+    python3 build.py --watch    # rebuild after every save of game_data.json
+    python3 build.py --optimize # minified, string-deduplicated, lazily parsed sections
+    python3 build.py --compress # --optimize, deflated and base64-encoded
+    python3 build.py --report   # print payload sizes for each mode, write nothing
 """
 
+import argparse
+import base64
+import hashlib
 import json
-import re
 import os
+import time
+import zlib
+from collections import Counter
+
+from dialogues import compile_graph
+from gamedata import validate, write_atomic
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 GAME_DATA_FILE = os.path.join(SCRIPT_DIR, "game_data.json")
 HTML_FILE = os.path.join(SCRIPT_DIR, "index.html")
 
+MARKER_START = "// === GAME_DATA_START ==="
+MARKER_END = "// === GAME_DATA_END ==="
+STAMP_PREFIX = "// build: "
+
+# Bump when the generated block changes shape so old stamps stop matching
+BUILD_VERSION = 2
+
+# Optimized payloads replace repeated strings with "@<base36 index>" into a
+# shared table; a real string starting with "@" is written with a second "@"
+STRING_REF = "@"
+
+# Raw DEFLATE decoder for --compress. Synchronous, because the page reads
+# GAME_DATA as soon as the script runs.
+INFLATE_JS = """const inflate = (src) => {
+            const out = [];
+            let pos = 0, buf = 0, cnt = 0;
+            const bits = (n) => {
+                while (cnt < n) { buf |= src[pos++] << cnt; cnt += 8; }
+                const v = buf & ((1 << n) - 1);
+                buf >>>= n; cnt -= n;
+                return v;
+            };
+            const huffman = (lengths) => {
+                const count = new Uint16Array(16), offs = new Uint16Array(16), symbol = new Uint16Array(lengths.length);
+                lengths.forEach((l) => count[l]++);
+                count[0] = 0;
+                for (let i = 1; i < 16; i++) offs[i] = offs[i - 1] + count[i - 1];
+                lengths.forEach((l, s) => { if (l) symbol[offs[l]++] = s; });
+                return {count, symbol};
+            };
+            const decode = (h) => {
+                for (let len = 1, code = 0, first = 0, index = 0; len < 16; len++) {
+                    code |= bits(1);
+                    const count = h.count[len];
+                    if (code - count < first) return h.symbol[index + code - first];
+                    index += count; first = (first + count) << 1; code <<= 1;
+                }
+                throw new Error("GAME_DATA: corrupt payload");
+            };
+            const lbase = [], lext = [], dbase = [], dext = [];
+            for (let i = 0, b = 3; i < 29; i++) { lext[i] = i < 8 || i === 28 ? 0 : (i - 4) >> 2; lbase[i] = i === 28 ? 258 : b; b += 1 << lext[i]; }
+            for (let i = 0, b = 1; i < 30; i++) { dext[i] = i < 4 ? 0 : (i - 2) >> 1; dbase[i] = b; b += 1 << dext[i]; }
+            const order = [16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15];
+            let last;
+            do {
+                last = bits(1);
+                const type = bits(2);
+                if (type === 0) {
+                    buf = cnt = 0;
+                    const len = src[pos] | src[pos + 1] << 8;
+                    pos += 4;
+                    for (let i = 0; i < len; i++) out.push(src[pos++]);
+                    continue;
+                }
+                let lit, dist;
+                if (type === 1) {
+                    const lengths = [];
+                    for (let i = 0; i < 288; i++) lengths.push(i < 144 ? 8 : i < 256 ? 9 : i < 280 ? 7 : 8);
+                    lit = huffman(lengths);
+                    dist = huffman(new Array(30).fill(5));
+                } else {
+                    const nlit = bits(5) + 257, ndist = bits(5) + 1, nclen = bits(4) + 4;
+                    const clen = new Array(19).fill(0);
+                    for (let i = 0; i < nclen; i++) clen[order[i]] = bits(3);
+                    const ch = huffman(clen), lengths = [];
+                    while (lengths.length < nlit + ndist) {
+                        const sym = decode(ch);
+                        if (sym < 16) { lengths.push(sym); continue; }
+                        const value = sym === 16 ? lengths[lengths.length - 1] : 0;
+                        let repeat = sym === 16 ? 3 + bits(2) : sym === 17 ? 3 + bits(3) : 11 + bits(7);
+                        while (repeat--) lengths.push(value);
+                    }
+                    lit = huffman(lengths.slice(0, nlit));
+                    dist = huffman(lengths.slice(nlit));
+                }
+                for (let sym = decode(lit); sym !== 256; sym = decode(lit)) {
+                    if (sym < 256) { out.push(sym); continue; }
+                    sym -= 257;
+                    let len = lbase[sym] + bits(lext[sym]);
+                    const d = decode(dist);
+                    let from = out.length - dbase[d] - bits(dext[d]);
+                    while (len--) out.push(out[from++]);
+                }
+            } while (!last);
+            return new Uint8Array(out);
+        };"""
+
 
 def convert_to_js_key(key):
     """Convert snake_case to camelCase."""
@@ -29,51 +131,304 @@ def convert_keys_to_camel_case(obj):
         return obj
 
 
-def main():
-    # Load game data
-    with open(GAME_DATA_FILE, 'r') as f:
-        game_data = json.load(f)
+def with_dialogue_graph(game_data):
+    """game_data plus "dialogue_graph", the graph engine.py follows (see dialogues.py).
+
+    Dialogue keys are values there, so they are converted here to match the
+    camelCase keys of the dialogues section.
+    """
+    graph = compile_graph(game_data["dialogues"])
+    graph["keys"] = [convert_to_js_key(key) for key in graph["keys"]]
+    return {**game_data, "dialogue_graph": graph}
 
+
+def source_stamp(source, mode="plain"):
+    """Content hash identifying the block built from this source in this mode."""
+    header = f"v{BUILD_VERSION}\n" if mode == "plain" else f"v{BUILD_VERSION} {mode}\n"
+    return hashlib.sha256(header.encode() + source).hexdigest()[:16]
+
+
+def game_data_block(game_data, stamp):
+    """The JavaScript block that goes between the GAME_DATA markers."""
     # Convert to camelCase for JavaScript
     game_data_js = convert_keys_to_camel_case(game_data)
+    return f"""{MARKER_START}
+        {STAMP_PREFIX}{stamp}
+        const GAME_DATA = {json.dumps(game_data_js, indent=8)};
+        {MARKER_END}"""
+
+
+def to_base36(n):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    text = ""
+    while True:
+        n, rem = divmod(n, 36)
+        text = digits[rem] + text
+        if not n:
+            return text
+
+
+def json_length(text):
+    """Bytes a string takes as a minified JSON value."""
+    return len(json.dumps(text, ensure_ascii=False).encode())
+
+
+def string_table(obj):
+    """Repeated string values worth replacing by a table reference.
+
+    Strings are ranked by the bytes they take up in total, so the most
+    repeated ones get the shortest references, and a string only makes the
+    table if its references plus its table entry come out smaller.
+    """
+    counts = Counter()
+
+    def walk(value):
+        if isinstance(value, str):
+            counts[value] += 1
+        elif isinstance(value, dict):
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    walk(obj)
+    table = []
+    for text, count in sorted(counts.items(), key=lambda item: -item[1] * json_length(item[0])):
+        if count < 2:
+            continue
+        ref_length = len(STRING_REF) + len(to_base36(len(table))) + 2
+        if count * json_length(text) > count * ref_length + json_length(text) + 1:
+            table.append(text)
+    return table
+
+
+def encode_strings(obj, refs):
+    """Copy of obj with table strings replaced by references."""
+    if isinstance(obj, str):
+        if obj in refs:
+            return refs[obj]
+        return STRING_REF + obj if obj.startswith(STRING_REF) else obj
+    if isinstance(obj, dict):
+        return {k: encode_strings(v, refs) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [encode_strings(item, refs) for item in obj]
+    return obj
+
+
+def minify(obj):
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def js_string(text):
+    """A JavaScript string literal that is also safe inside a <script> tag."""
+    literal = json.dumps(text, ensure_ascii=False)
+    return literal.replace("</", "<\\/").replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+
+
+def payload(game_data_js):
+    """(section names, payload text) for an optimized block.
+
+    The payload is one line holding the string table, then one line of
+    minified JSON per top-level section; minified JSON never contains a
+    raw newline.
+    """
+    table = string_table(game_data_js)
+    refs = {text: STRING_REF + to_base36(i) for i, text in enumerate(table)}
+    sections = list(game_data_js)
+    lines = [minify(table)] + [minify(encode_strings(game_data_js[name], refs)) for name in sections]
+    return sections, "\n".join(lines)
+
+
+def optimized_block(game_data, stamp, compress=False):
+    """A GAME_DATA block whose sections are parsed on first access.
+
+    With compress, the payload is deflated and base64-encoded, and inflated
+    once when the page loads.
+    """
+    sections, text = payload(convert_keys_to_camel_case(game_data))
+    if compress:
+        deflate = zlib.compressobj(9, zlib.DEFLATED, -15)
+        packed = deflate.compress(text.encode()) + deflate.flush()
+        source = f"""{INFLATE_JS}
+        const lines = new TextDecoder().decode(inflate(Uint8Array.from(atob({js_string(base64.b64encode(packed).decode())}), (c) => c.charCodeAt(0)))).split("\\n");"""
+    else:
+        source = f"""const lines = {js_string(text)}.split("\\n");"""
+    return f"""{MARKER_START}
+        {STAMP_PREFIX}{stamp}
+        const GAME_DATA = (() => {{
+        {source}
+        const strings = JSON.parse(lines[0]);
+        const revive = (key, value) => typeof value === "string" && value[0] === "{STRING_REF}"
+            ? (value[1] === "{STRING_REF}" ? value.slice(1) : strings[parseInt(value.slice(1), 36)]) : value;
+        const data = {{}};
+        {json.dumps(sections)}.forEach((name, i) => {{
+            Object.defineProperty(data, name, {{
+                configurable: true,
+                enumerable: true,
+                get() {{
+                    const value = JSON.parse(lines[i + 1], revive);
+                    Object.defineProperty(data, name, {{value, writable: true, enumerable: true}});
+                    return value;
+                }},
+            }});
+        }});
+        return data;
+        }})();
+        {MARKER_END}"""
+
+
+def size_report(game_data):
+    """Bytes of the GAME_DATA block in each mode, raw and gzipped as a server would send it."""
+    rows = []
+    for mode, block in (("plain", game_data_block(game_data, "")),
+                        ("optimize", optimized_block(game_data, "")),
+                        ("compress", optimized_block(game_data, "", compress=True))):
+        raw = block.encode()
+        rows.append((mode, len(raw), len(zlib.compress(raw, 9))))
+    return rows
+
+
+def print_size_report(rows, mode=None):
+    plain = rows[0][1]
+    for name, size, gzipped in rows:
+        marker = " <-" if name == mode else ""
+        change = f"{(size - plain) / plain:+.1%}" if name != "plain" else ""
+        print(f"  {name:<9} {size:>8,} bytes {change:>7}   gzipped {gzipped:>7,} bytes{marker}")
+
+
+def embedded_stamp(html):
+    """Stamp of the GAME_DATA block already in html, or None."""
+    start = html.find(MARKER_START)
+    if start == -1:
+        return None
+    line_start = html.find(STAMP_PREFIX, start, start + 200)
+    if line_start == -1:
+        return None
+    line_start += len(STAMP_PREFIX)
+    return html[line_start:html.find("\n", line_start)].strip()
+
+
+def build(force=False, mode="plain"):
+    """Embed game_data.json into index.html. Returns True if the file changed.
+
+    mode is "plain" (readable JSON), "optimize" or "compress".
+    """
+    with open(GAME_DATA_FILE, 'rb') as f:
+        source = f.read()
+    stamp = source_stamp(source, mode)
 
     # Read current HTML
     with open(HTML_FILE, 'r') as f:
         html = f.read()
 
-    # Check if GAME_DATA marker exists
-    marker_start = "// === GAME_DATA_START ==="
-    marker_end = "// === GAME_DATA_END ==="
+    if not force and embedded_stamp(html) == stamp:
+        print("index.html is already up to date")
+        return False
+
+    game_data = json.loads(source)
+    validate(game_data)
+    game_data = with_dialogue_graph(game_data)
+    if mode == "plain":
+        block = game_data_block(game_data, stamp)
+    else:
+        block = optimized_block(game_data, stamp, compress=mode == "compress")
 
-    if marker_start in html:
+    # Check if GAME_DATA marker exists
+    start = html.find(MARKER_START)
+    end = html.find(MARKER_END, start)
+    if start != -1 and end != -1:
         # Replace existing GAME_DATA
-        pattern = re.compile(
-            re.escape(marker_start) + r".*?" + re.escape(marker_end),
-            re.DOTALL
-        )
-        game_data_block = f"""{marker_start}
-        const GAME_DATA = {json.dumps(game_data_js, indent=8)};
-        {marker_end}"""
-        # Use lambda to avoid backslash interpretation in replacement string
-        html = pattern.sub(lambda m: game_data_block, html)
-        print("Updated existing GAME_DATA in index.html")
+        new_html = html[:start] + block + html[end + len(MARKER_END):]
+        message = "Updated existing GAME_DATA in index.html"
     else:
         # Insert GAME_DATA after <script> tag
         script_tag = "<script>"
         insert_pos = html.find(script_tag) + len(script_tag)
-        game_data_block = f"""
-        {marker_start}
-        const GAME_DATA = {json.dumps(game_data_js, indent=8)};
-        {marker_end}
-        """
-        html = html[:insert_pos] + game_data_block + html[insert_pos:]
-        print("Inserted GAME_DATA into index.html")
+        new_html = html[:insert_pos] + f"\n        {block}\n        " + html[insert_pos:]
+        message = "Inserted GAME_DATA into index.html"
 
-    # Write updated HTML
-    with open(HTML_FILE, 'w') as f:
-        f.write(html)
+    if new_html == html:
+        print("index.html is already up to date")
+        return False
 
+    # Write updated HTML
+    write_atomic(HTML_FILE, new_html)
+    print(message)
     print(f"Successfully updated {HTML_FILE} with data from {GAME_DATA_FILE}")
+    if mode != "plain":
+        print("GAME_DATA payload sizes:")
+        print_size_report(size_report(game_data), mode)
+    return True
+
+
+def source_signature():
+    """(mtime, size) of game_data.json, or None while an editor is replacing it."""
+    try:
+        st = os.stat(GAME_DATA_FILE)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def watch(interval=0.2, debounce=0.3, mode="plain"):
+    """Poll game_data.json and rebuild once each burst of saves settles."""
+    print(f"Watching {GAME_DATA_FILE} (Ctrl+C to stop)...")
+    build(mode=mode)
+    last = source_signature()
+
+    try:
+        while True:
+            time.sleep(interval)
+            current = source_signature()
+            if current == last:
+                continue
+
+            # Wait until the file stops changing before building
+            while True:
+                time.sleep(debounce)
+                settled = source_signature()
+                if settled == current:
+                    break
+                current = settled
+            last = current
+            if current is None:
+                continue
+
+            started = time.perf_counter()
+            try:
+                build(mode=mode)
+            except ValueError as e:
+                # Half-finished edits are expected; report and keep watching
+                print(f"Build failed: {e}")
+                continue
+            print(f"Rebuilt in {(time.perf_counter() - started) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed game_data.json into index.html.")
+    parser.add_argument("--force", action="store_true", help="rebuild even if game_data.json is unchanged")
+    parser.add_argument("--watch", action="store_true", help="keep running and rebuild after each save")
+    parser.add_argument("--interval", type=float, default=0.2, help="seconds between checks in watch mode")
+    parser.add_argument("--debounce", type=float, default=0.3, help="seconds the file must stay unchanged before a rebuild")
+    parser.add_argument("--optimize", action="store_true",
+                        help="embed minified, string-deduplicated JSON, parsed one section at a time")
+    parser.add_argument("--compress", action="store_true", help="like --optimize, but also deflated and base64-encoded")
+    parser.add_argument("--report", action="store_true", help="print the payload size of each mode and exit")
+    args = parser.parse_args()
+    mode = "compress" if args.compress else "optimize" if args.optimize else "plain"
+
+    if args.report:
+        with open(GAME_DATA_FILE) as f:
+            game_data = json.load(f)
+        print(f"GAME_DATA payload sizes for {GAME_DATA_FILE}:")
+        print_size_report(size_report(with_dialogue_graph(game_data)))
+    elif args.watch:
+        watch(args.interval, args.debounce, mode)
+    else:
+        build(force=args.force, mode=mode)
 
 
 if __name__ == "__main__":
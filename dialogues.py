@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Dialogue graph
+Dialogue lines play in order unless they say otherwise:
+
+    {"label": "offer", "speaker": "...", "text": "..."}   a name to jump to
+    {"goto": "offer"}                 continue at a label, another dialogue's
+                                      first line, or "end"
+    {"branch": [{"if": condition, "goto": "offer"}, ...]}
+                                      the first branch whose condition holds
+                                      (as in triggers.py) is taken, else the
+                                      line's goto or the next line
+    choices: [{"text": "...", "goto": "offer"}, ...]
+
+A line may have "goto"/"branch" with no speaker or text; it shows nothing.
+
+compile_graph() numbers every line of every dialogue (dialogue d's lines are
+nodes starts[d], starts[d] + 1, ...) and resolves the jumps into integer
+arrays, so following a dialogue is an array walk:
+
+    next[n]                           successor of node n, or END
+    choice_start[n]..choice_start[n + 1]    slice of choice_next: where each
+                                      of node n's choices leads
+    branch_start[n]..branch_start[n + 1]    slice of branch_if (index into
+                                      conditions) and branch_next
+    may_ask[n]                        1 if a choice can still come after n
+    dead                              nodes no dialogue's start can reach
+
+The compiled form is plain lists so gamedata.py can keep it in its cache and
+build.py can embed it for the web version, which walks the same arrays.
+"""
+
+from state import cached_for, layout_for
+from triggers import Condition
+
+END = -1
+
+
+def compile_graph(dialogues, problems=None):
+    """The compiled form of a dialogues mapping, as a dict of lists.
+
+    Unresolved jumps go to END and are reported in `problems` if given.
+    """
+    keys = list(dialogues)
+    key_index = {key: d for d, key in enumerate(keys)}
+    starts = []
+    node_dialogue = []
+    lengths = []
+    for d, key in enumerate(keys):
+        starts.append(len(node_dialogue))
+        lengths.append(len(dialogues[key]))
+        node_dialogue += [d] * lengths[-1]
+
+    def target(d, labels, name, where):
+        if name == "end":
+            return END
+        if name in labels:
+            return labels[name]
+        if name in key_index:
+            other = key_index[name]
+            return starts[other] if lengths[other] else END
+        if problems is not None:
+            problems.append(f"{where}: unknown goto {name!r}")
+        return END
+
+    graph = {"keys": keys, "starts": starts, "dialogue": node_dialogue, "next": [],
+             "choice_start": [0], "choice_next": [], "branch_start": [0], "branch_if": [], "branch_next": [],
+             "conditions": []}
+    for d, key in enumerate(keys):
+        lines = dialogues[key]
+        labels = {line["label"]: starts[d] + i for i, line in enumerate(lines) if "label" in line}
+        for i, line in enumerate(lines):
+            where = f"dialogue {key} line {i + 1}"
+            default = starts[d] + i + 1 if i + 1 < len(lines) else END
+            if "goto" in line:
+                default = target(d, labels, line["goto"], where)
+            graph["next"].append(default)
+            for choice in line.get("choices", []):
+                graph["choice_next"].append(target(d, labels, choice["goto"], where) if "goto" in choice else default)
+            graph["choice_start"].append(len(graph["choice_next"]))
+            for branch in line.get("branch", []):
+                graph["branch_if"].append(len(graph["conditions"]))
+                graph["conditions"].append(branch["if"])
+                graph["branch_next"].append(target(d, labels, branch["goto"], where))
+            graph["branch_start"].append(len(graph["branch_next"]))
+
+    graph["may_ask"], loops = analyze(graph)
+    graph["dead"] = dead_nodes(graph)
+    if problems is not None:
+        for node in loops:
+            problems.append(f"dialogue {keys[node_dialogue[node]]} line {node - starts[node_dialogue[node]] + 1}: "
+                            f"loops back without a choice")
+        for node in graph["dead"]:
+            problems.append(f"dialogue {keys[node_dialogue[node]]} line {node - starts[node_dialogue[node]] + 1}: "
+                            f"can never be reached")
+    return graph
+
+
+def successors(graph, node):
+    """Nodes node can lead to."""
+    choice_start = graph["choice_start"]
+    if choice_start[node] != choice_start[node + 1]:
+        return graph["choice_next"][choice_start[node]:choice_start[node + 1]]
+    branch_start = graph["branch_start"]
+    return graph["branch_next"][branch_start[node]:branch_start[node + 1]] + [graph["next"][node]]
+
+
+def analyze(graph):
+    """(may_ask per node, one node of each loop with no choice in it).
+
+    Strongly connected components (Tarjan, iteratively) come out successors
+    first, so whether a choice lies ahead is known for every successor
+    component by the time a component is finished.
+    """
+    count = len(graph["next"])
+    choice_start = graph["choice_start"]
+    asks = [choice_start[n] != choice_start[n + 1] for n in range(count)]
+    may_ask = [0] * count
+    order = [-1] * count
+    low = [0] * count
+    on_stack = [False] * count
+    stack = []
+    loops = []
+    counter = 0
+    for root in range(count):
+        if order[root] != -1:
+            continue
+        work = [(root, iter(successors(graph, root)))]
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            node, edges = work[-1]
+            for succ in edges:
+                if succ == END:
+                    continue
+                if order[succ] == -1:
+                    order[succ] = low[succ] = counter
+                    counter += 1
+                    stack.append(succ)
+                    on_stack[succ] = True
+                    work.append((succ, iter(successors(graph, succ))))
+                    break
+                if on_stack[succ]:
+                    low[node] = min(low[node], order[succ])
+            else:
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                if low[node] == order[node]:
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        members.append(member)
+                        if member == node:
+                            break
+                    component = set(members)
+                    ahead = any(asks[m] for m in members) or any(
+                        may_ask[s] for m in members for s in successors(graph, m) if s != END and s not in component)
+                    cyclic = len(members) > 1 or node in successors(graph, node)
+                    if cyclic and not any(asks[m] for m in members):
+                        loops.append(min(members))
+                    for member in members:
+                        may_ask[member] = int(ahead)
+    return may_ask, sorted(loops)
+
+
+def dead_nodes(graph):
+    """Nodes that no dialogue's first line leads to."""
+    seen = [False] * len(graph["next"])
+    todo = [start for start, end in zip(graph["starts"], graph["starts"][1:] + [len(seen)]) if start < end]
+    for node in todo:
+        seen[node] = True
+    while todo:
+        node = todo.pop()
+        for succ in successors(graph, node):
+            if succ != END and not seen[succ]:
+                seen[succ] = True
+                todo.append(succ)
+    return [node for node, reached in enumerate(seen) if not reached]
+
+
+def graph_problems(data):
+    """Problems with dialogue jumps, as a list of strings."""
+    problems = []
+    graph = compile_graph(data["dialogues"], problems)
+    flags = data["initial_state"]["flags"]
+    stats = data["initial_state"]["stats"]
+    for condition in graph["conditions"]:
+        for name in condition.get("flags", {}):
+            if name not in flags:
+                problems.append(f"dialogue branch: unknown flag {name!r}")
+        for key in ("min_stats", "max_stats"):
+            for name in condition.get(key, {}):
+                if name not in stats:
+                    problems.append(f"dialogue branch: unknown stat {name!r}")
+    return problems
+
+
+class DialogueGraph:
+    """A compiled dialogue graph with its branch conditions ready to test."""
+
+    def __init__(self, graph, layout):
+        self.keys = graph["keys"]
+        self.index = {key: d for d, key in enumerate(self.keys)}
+        self.starts = graph["starts"]
+        self.dialogue = graph["dialogue"]
+        self.next = graph["next"]
+        self.choice_start = graph["choice_start"]
+        self.choice_next = graph["choice_next"]
+        self.branch_start = graph["branch_start"]
+        self.branch_next = graph["branch_next"]
+        self.branch_if = [Condition(graph["conditions"][i], layout) for i in graph["branch_if"]]
+        self.may_ask = graph["may_ask"]
+        self.dead = graph["dead"]
+
+    def node(self, key, line_idx=0):
+        """Node of a dialogue line, or END past the last line (or for an unknown dialogue)."""
+        d = self.index.get(key)
+        if d is None:
+            return END
+        node = self.starts[d] + line_idx
+        end = self.starts[d + 1] if d + 1 < len(self.starts) else len(self.next)
+        return node if node < end else END
+
+    def line(self, node):
+        """(dialogue key, line index) of a node."""
+        d = self.dialogue[node]
+        return self.keys[d], node - self.starts[d]
+
+    def follow(self, node, state):
+        """The node after a line without choices."""
+        for i in range(self.branch_start[node], self.branch_start[node + 1]):
+            if self.branch_if[i].test(state):
+                return self.branch_next[i]
+        return self.next[node]
+
+    def after_choice(self, node, idx):
+        return self.choice_next[self.choice_start[node] + idx]
+
+    def asks_choice(self, key):
+        """Whether playing a dialogue can end up asking the player something."""
+        node = self.node(key)
+        return node != END and bool(self.may_ask[node])
+
+
+def graph_for(data):
+    """The (cached) DialogueGraph for a game data dict.
+
+    gamedata.GameData carries the compiled form from its cache, so the
+    dialogues themselves needn't be read.
+    """
+    def build(data):
+        compiled = getattr(data, "dialogue_graph", None) or compile_graph(data["dialogues"])
+        return DialogueGraph(compiled, layout_for(data["initial_state"]))
+    return cached_for(data, "dialogue_graph", build)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Compiled effects
+Location actions ("actions" in game_data.json) and dialogue choice effects are
+compiled once per data file (choices when first chosen) into flat operation
+tuples over a GameState's stat array and flag bitmask, so applying one is a
+single pass with no dict lookups or key parsing. Both use the same rules:
+
+  - a stat change is clamped to 0..100, except money, which has no ceiling
+  - "full" sets a stat to 100
+  - "flag" sets a flag, "suspicion" adds to heist suspicion
+  - an action's cost is paid first, and nothing happens if it can't be
+
+`Effect.apply_many(states)` applies one effect to a batch of states, e.g. every
+run of a simulation standing at the same action.
+"""
+
+from state import cached_for, layout_for
+
+# Granted by the chapter1_complete ending
+HEIST_REWARD_EFFECT = {"money": 5000, "criminality": 20, "flag": "completed_museum_heist"}
+
+STAT_LIMITS = {"money": (0, 2 ** 31 - 1)}  # array('i') range
+DEFAULT_LIMITS = (0, 100)
+FULL = "full"
+EFFECT_KEYS = ("flag", "suspicion", "ending")
+
+
+class Effect:
+    """One compiled action or choice effect.
+
+    adds holds (stat index, delta, low, high), sets holds (stat index, value).
+    shown lists the (stat, delta) pairs to report to the player, and ending is
+    the ending it reaches, if any; applying both is up to the engine.
+    """
+
+    __slots__ = ("cost", "money", "adds", "sets", "flags", "suspicion", "intel",
+                 "advance_time", "message", "shown", "ending")
+
+    def __init__(self, spec, layout, action=False):
+        self.cost = spec.get("cost", 0) if action else 0
+        self.money = layout.stat_index["money"]
+        self.flags = 0
+        self.suspicion = 0
+        self.ending = None
+        adds = []
+        sets = []
+        shown = []
+        for key, value in (spec.get("effects", {}) if action else spec).items():
+            if key in layout.stat_index:
+                index = layout.stat_index[key]
+                if value == FULL:
+                    sets.append((index, DEFAULT_LIMITS[1]))
+                else:
+                    adds.append((index, value) + STAT_LIMITS.get(key, DEFAULT_LIMITS))
+                    if not action:
+                        shown.append((key, value))
+            elif key == "flag":
+                self.flags |= layout.flag_bit(value)
+            elif key == "suspicion":
+                self.suspicion += value
+            elif key == "ending":
+                self.ending = value
+        self.adds = tuple(adds)
+        self.sets = tuple(sets)
+        self.shown = tuple(shown)
+        self.intel = spec.get("add_intel") if action else None
+        self.advance_time = int(spec.get("advance_time", 0)) if action else 0
+        self.message = spec.get("message", "Done.") if action else None
+
+    def apply(self, state):
+        """Apply to a GameState. Returns False, changing nothing, if the cost can't be paid."""
+        stats = state.stats
+        if self.cost:
+            if stats[self.money] < self.cost:
+                return False
+            stats[self.money] -= self.cost
+        for index, delta, low, high in self.adds:
+            value = stats[index] + delta
+            stats[index] = low if value < low else high if value > high else value
+        for index, value in self.sets:
+            stats[index] = value
+        if self.flags:
+            state.flags |= self.flags
+        if self.suspicion:
+            state.suspicion += self.suspicion
+        if self.intel and self.intel not in state.intel:
+            state.add_intel(self.intel)
+        return True
+
+    def apply_many(self, states):
+        """apply() to each state; returns which ones could pay."""
+        apply = self.apply
+        return [apply(state) for state in states]
+
+
+class EffectTable:
+    """Every action effect in a data file, compiled, and choice effects,
+    compiled the first time they are chosen."""
+
+    def __init__(self, data):
+        self.data = data
+        self.layout = layout_for(data["initial_state"])
+        self.actions = {name: Effect(spec, self.layout, action=True) for name, spec in data["actions"].items()}
+        self.choices = {}
+        self.heist_reward = Effect(HEIST_REWARD_EFFECT, self.layout)
+
+    def choice(self, key, line_idx, choice_idx):
+        """The Effect of a dialogue choice, or None if it has none."""
+        slot = (key, line_idx, choice_idx)
+        try:
+            return self.choices[slot]
+        except KeyError:
+            pass
+        choice = self.data["dialogues"][key][line_idx]["choices"][choice_idx]
+        effect = self.choices[slot] = Effect(choice["effect"], self.layout) if "effect" in choice else None
+        return effect
+
+
+def effect_problems(where, effect, data):
+    """Problems with a choice-style effect dict, as a list of strings."""
+    problems = []
+    for key, value in effect.items():
+        if key == "flag" and value not in data["initial_state"]["flags"]:
+            problems.append(f"{where}: unknown flag {value!r}")
+        elif key == "ending" and value not in data["endings"]:
+            problems.append(f"{where}: unknown ending {value!r}")
+        elif key not in EFFECT_KEYS and key not in data["initial_state"]["stats"]:
+            problems.append(f"{where}: unknown effect {key!r}")
+        elif key not in ("flag", "ending") and not isinstance(value, int):
+            problems.append(f"{where}: {key} must change by a whole number, not {value!r}")
+    return problems
+
+
+def action_problems(name, action, data):
+    """Problems with one entry of the "actions" section, as a list of strings."""
+    problems = []
+    for stat, value in action.get("effects", {}).items():
+        if stat not in data["initial_state"]["stats"]:
+            problems.append(f"action {name!r}: unknown stat {stat!r}")
+        elif value != FULL and not isinstance(value, int):
+            problems.append(f"action {name!r}: {stat} must be a whole number or \"full\", not {value!r}")
+    if not isinstance(action.get("cost", 0), int) or action.get("cost", 0) < 0:
+        problems.append(f"action {name!r}: cost must be a whole number of dollars")
+    if not isinstance(action.get("advance_time", 0), int) or action.get("advance_time", 0) < 0:
+        problems.append(f"action {name!r}: advance_time must be true or a number of time slots")
+    return problems
+
+
+def effects_for(data):
+    """The (cached) EffectTable for a game data dict."""
+    return cached_for(data, "effects", EffectTable)
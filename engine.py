@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Headless game engine
+All game rules live here. Front-ends (game.py) render the returned events.
+"""
+
+from dialogues import END, graph_for
+from effects import HEIST_REWARD_EFFECT, effects_for
+from scheduler import Scheduler, day_slot, tick_of
+from state import GameState, layout_for
+from templates import templates_for
+from triggers import triggers_for
+
+HEIST_PHASES = [("infiltration", "INFILTRATION"), ("calling_card", "CALLING CARD"), ("escape", "ESCAPE")]
+HEIST_ACTION = "*** BEGIN MUSEUM HEIST ***"
+LEAVE_ACTION = "Leave"
+CONFIRM_HEIST_OPTIONS = ["Yes, let's do this!", "Not yet, I need to prepare more."]
+DEFAULT_ENDING = {"title": "The End", "text": "Game Over"}
+HEIST_REWARD = HEIST_REWARD_EFFECT["money"]
+# Lost every time slot
+HUNGER_DECAY = 5
+HYGIENE_DECAY = 3
+
+
+class GameOver(Exception):
+    """Raised internally when a fatal ending is reached."""
+
+
+class GameEngine:
+    """Owns one game state and advances it without any terminal I/O.
+
+    The engine is always in one of four modes:
+      - game over:  `ending` is set and nothing more can happen
+      - choosing:   `pending` is set; call choose() with an option index
+      - location:   `location` is set; step() takes one of its actions
+      - city map:   step() takes the id of an unlocked location
+
+    step() and choose() return a list of events. Each event is a tuple whose
+    first item names its kind, e.g. ("message", text) or ("stat", key, value).
+
+    `state` may be a GameState or a dict in the JSON save shape.
+    """
+
+    def __init__(self, data, state=None):
+        self.data = data
+        if state is None:
+            state = GameState.initial(layout_for(data["initial_state"]))
+        elif isinstance(state, dict):
+            state = GameState.from_dict(layout_for(data["initial_state"]), state)
+        self.state = state
+        self.templates = templates_for(data)
+        self.triggers = triggers_for(data)
+        self.effects = effects_for(data)
+        self.dialogue_graph = graph_for(data)
+        self.location = None
+        self.pending = None
+        self.ending = None
+        self.events = []
+        self.scheduler = None  # built on first use, from the state's clock
+
+    def clone(self):
+        """Return an independent copy of this engine (data is shared)."""
+        other = GameEngine(self.data, self.state.clone())
+        other.location = self.location
+        other.pending = self.pending
+        other.ending = self.ending
+        if self.scheduler is not None:
+            other.scheduler = self.scheduler.copy()
+        return other
+
+    # === Public step API ===
+
+    def actions_available(self):
+        """List what can be passed to step(), or the options for choose()."""
+        if self.ending:
+            return []
+        if self.pending:
+            return self.pending_options()
+        if self.location:
+            return self.location_actions(self.location)
+        return [loc_id for loc_id in self.data["locations"] if self.is_location_unlocked(loc_id)]
+
+    def begin(self, name="Alex", thief_name="Thrill"):
+        """Name the player and play the intro."""
+        self.state.set_player_field("name", name)
+        self.state.set_player_field("thief_name", thief_name)
+        return self.run(self.play_dialogue_sequence, "intro")
+
+    def step(self, action):
+        """Visit a location from the map, or take an action at the current one."""
+        if self.ending:
+            raise ValueError("The game is over.")
+        if self.pending:
+            raise ValueError("A choice is pending; use choose().")
+        if self.location is None:
+            if action not in self.data["locations"]:
+                raise ValueError(f"Unknown location: {action}")
+            return self.run(self.visit_location, action)
+        if action not in self.location_actions(self.location):
+            raise ValueError(f"Unknown action at {self.location}: {action}")
+        return self.run(self.take_action, action)
+
+    def choose(self, idx):
+        """Resolve the pending choice with option index idx."""
+        if not self.pending:
+            raise ValueError("No choice is pending.")
+        if not 0 <= idx < len(self.pending_options()):
+            raise ValueError(f"Invalid choice: {idx}")
+        return self.run(self.resolve_choice, idx)
+
+    def wait(self, slots):
+        """Let `slots` time slots pass, stopping early at an event that asks something."""
+        if self.ending:
+            raise ValueError("The game is over.")
+        if self.pending:
+            raise ValueError("A choice is pending; use choose().")
+        return self.run(self.advance_time, slots)
+
+    def next_event(self):
+        """(day, slot) of the next scheduled event, or None."""
+        tick = self.schedule().next_tick()
+        return None if tick is None else day_slot(tick)
+
+    def run(self, func, *args):
+        """Run a rule with a fresh event list and return the events."""
+        self.events = []
+        try:
+            func(*args)
+        except GameOver:
+            pass
+        return self.events
+
+    def emit(self, *event):
+        self.events.append(event)
+
+    # === Choices ===
+
+    def pending_options(self):
+        """Option texts for the pending choice."""
+        kind = self.pending[0]
+        if kind == "dialogue":
+            _, key, line_idx, _ = self.pending
+            return [c["text"] for c in self.data["dialogues"][key][line_idx]["choices"]]
+        if kind == "heist":
+            return [opt["text"] for opt in self.heist_scene(*self.pending[1:])["options"]]
+        return list(CONFIRM_HEIST_OPTIONS)
+
+    def resolve_choice(self, idx):
+        pending, self.pending = self.pending, None
+        kind = pending[0]
+        if kind == "dialogue":
+            _, key, line_idx, then = pending
+            effect = self.effects.choice(key, line_idx, idx)
+            if effect:
+                self.apply_effect(effect)
+            graph = self.dialogue_graph
+            self.play_from(graph.after_choice(graph.node(key, line_idx), idx), then)
+        elif kind == "heist":
+            self.resolve_heist_option(pending[1], pending[2], idx)
+        elif idx == 0:
+            self.location = None
+            self.run_heist()
+
+    # === Rules ===
+
+    def replace_placeholders(self, text):
+        """Fill {player_name} and other state placeholders in text (see templates.py)."""
+        return self.templates.render(text, self.state)
+
+    def apply_effect(self, effect):
+        """Apply a compiled choice effect (see effects.py)."""
+        effect.apply(self.state)
+        for key, value in effect.shown:
+            self.emit("stat", key, value)
+        if effect.ending:
+            self.show_ending(effect.ending)
+
+    def play_dialogue_sequence(self, dialogue_key, then=None, start=0):
+        """Play a dialogue from line `start`, pausing at the first choice.
+
+        `then` is a (trigger index, step) pair to resume once the whole
+        sequence has played.
+        """
+        self.play_from(self.dialogue_graph.node(dialogue_key, start), then)
+
+    def play_from(self, node, then=None):
+        """Follow the dialogue graph from a node (see dialogues.py) to its end or a choice."""
+        graph = self.dialogue_graph
+        dialogues = self.data["dialogues"]
+
+        while node != END:
+            dialogue_key, line_idx = graph.line(node)
+            line = dialogues[dialogue_key][line_idx]
+            if "text" in line:
+                speaker = self.replace_placeholders(line["speaker"])
+                text = self.replace_placeholders(line["text"])
+
+                if "choices" in line:
+                    self.emit("ask", speaker, text)
+                    self.pending = ("dialogue", dialogue_key, line_idx, then)
+                    return
+                if speaker == "Narrator":
+                    self.emit("narration", text)
+                else:
+                    self.emit("dialogue", speaker, text)
+            node = graph.follow(node, self.state)
+
+        if then:
+            self.run_trigger(*then)
+
+    def schedule(self):
+        if self.scheduler is None:
+            state = self.state
+            self.scheduler = Scheduler(self.triggers.timed, tick_of(state.day, state.slot))
+        return self.scheduler
+
+    def advance_time(self, slots=1):
+        """Advance time of day by `slots` slots.
+
+        Stats decay in closed form up to the next scheduled event (see
+        scheduler.py), which then fires, so a long wait costs a step per
+        event rather than per slot. An event that asks the player something
+        ends the wait there.
+        """
+        state = self.state
+        scheduler = self.schedule()
+        now = tick_of(state.day, state.slot)
+        end = now + slots
+        while now < end:
+            due = scheduler.next_tick()
+            stop = due if due is not None and due < end else end
+            self.pass_time(stop - now)
+            now = stop
+            if now == due:
+                for index in scheduler.pop_due(now):
+                    trigger = self.triggers.triggers[index]
+                    if trigger.condition.test(state):
+                        self.run_trigger(index)
+                    if self.pending:
+                        return
+
+    def pass_time(self, slots):
+        """Let time pass with no events: decay stats, and check for game over after every slot."""
+        state = self.state
+        hunger = state.stat("hunger")
+        # First slot after which hunger is 0
+        starves = max(1, -(-hunger // HUNGER_DECAY))
+        if state.stat("health") <= 0:
+            slots = 1
+        elif starves <= slots:
+            slots = starves
+
+        state.day, state.slot = day_slot(tick_of(state.day, state.slot) + slots)
+        state.set_stat("hunger", max(0, hunger - HUNGER_DECAY * slots))
+        state.set_stat("hygiene", max(0, state.stat("hygiene") - HYGIENE_DECAY * slots))
+
+        # Check for game over
+        if state.stat("hunger") <= 0:
+            self.show_ending("starvation")
+        if state.stat("health") <= 0:
+            self.show_ending("health")
+
+    def show_ending(self, ending_key):
+        """Reach an ending. Every ending but chapter1_complete ends the game."""
+        ending = self.data["endings"].get(ending_key, DEFAULT_ENDING)
+
+        if ending_key == "chapter1_complete":
+            self.effects.heist_reward.apply(self.state)
+            self.emit("ending", ending_key, ending, HEIST_REWARD)
+            return
+
+        self.emit("ending", ending_key, ending, None)
+        self.ending = ending_key
+        self.pending = None
+        self.location = None
+        raise GameOver(ending_key)
+
+    # === Story triggers ===
+
+    def run_trigger(self, index, pc=0):
+        """Run a story trigger's steps from step `pc` (see triggers.py).
+
+        A dialogue step hands the rest of the steps to the dialogue, which
+        resumes them once it has played, possibly after a choice.
+        """
+        trigger = self.triggers.triggers[index]
+        program = trigger.program
+        state = self.state
+        while pc < len(program):
+            op, arg = program[pc]
+            pc += 1
+            if op == "dialogue":
+                self.play_dialogue_sequence(arg, (index, pc))
+                return
+            if op == "set_flags":
+                state.flags |= arg
+            elif op == "clear_flags":
+                state.flags &= ~arg
+            elif op == "add_items":
+                for item in arg:
+                    state.add_item(item)
+            elif op == "add_intel":
+                for note in arg:
+                    state.add_intel(note)
+            elif op == "effect":
+                self.apply_effect(arg)
+            elif op == "notice" or op == "message":
+                self.emit(op, self.replace_placeholders(arg))
+            elif op == "arrive":
+                self.emit("arrive", state.location)
+            elif op == "confirm_heist":
+                self.emit("confirm", arg)
+                self.pending = ("confirm_heist",)
+                return
+            elif op == "jump_unless":
+                condition, target = arg
+                if not condition.test(state):
+                    pc = target
+
+    # === Heist ===
+
+    def heist_scene(self, phase_idx, scene_idx):
+        phase = HEIST_PHASES[phase_idx][0]
+        return self.data["heist_sequences"]["museum"][phase][scene_idx]
+
+    def run_heist(self):
+        """Run the museum heist."""
+        self.emit("heist_start")
+        self.next_heist_scene(0, 0)
+
+    def next_heist_scene(self, phase_idx, scene_idx):
+        """Present the next scene at or after (phase_idx, scene_idx)."""
+        heist_data = self.data["heist_sequences"]["museum"]
+
+        while phase_idx < len(HEIST_PHASES):
+            phase, phase_name = HEIST_PHASES[phase_idx]
+            scenes = heist_data[phase]
+            if scene_idx == 0:
+                self.emit("heist_phase", phase_idx + 1, phase_name)
+            if scene_idx < len(scenes):
+                scene = scenes[scene_idx]
+                stat = self.state.stat
+                rows = [(opt, stat(opt["stat"]), stat(opt["stat"]) >= opt["req"]) for opt in scene["options"]]
+                self.emit("heist_scene", scene, rows)
+                self.pending = ("heist", phase_idx, scene_idx)
+                return
+            phase_idx += 1
+            scene_idx = 0
+
+        # Victory!
+        self.show_ending("chapter1_complete")
+
+    def resolve_heist_option(self, phase_idx, scene_idx, idx):
+        chosen = self.heist_scene(phase_idx, scene_idx)["options"][idx]
+        stat_val = self.state.stat(chosen["stat"])
+        success = stat_val >= chosen["req"]
+        self.emit("heist_result", chosen, stat_val, success)
+        if not success:
+            self.show_ending("caught")
+        self.next_heist_scene(phase_idx, scene_idx + 1)
+
+    # === Locations ===
+
+    def is_location_unlocked(self, location_id):
+        """Check if a location is unlocked."""
+        loc = self.data["locations"].get(location_id, {})
+        if not loc.get("locked", False):
+            return True
+
+        unlock_flag = loc.get("unlock_flag")
+        if unlock_flag and self.state.flag(unlock_flag):
+            return True
+
+        return False
+
+    def heist_ready(self):
+        return self.state.flag("accepted_heist") and self.state.flag("got_jade_whip_info")
+
+    def location_actions(self, location_id):
+        """Actions offered at a location, including the heist start and Leave."""
+        actions = self.data["locations"][location_id]["actions"].copy()
+
+        # Add heist option if ready
+        if location_id == "underground" and self.heist_ready():
+            actions.insert(0, HEIST_ACTION)
+
+        actions.append(LEAVE_ACTION)
+        return actions
+
+    def visit_location(self, location_id):
+        """Visit a location and handle events."""
+        loc = self.data["locations"].get(location_id)
+        if not loc:
+            return
+
+        # Check for locked locations
+        if not self.is_location_unlocked(location_id):
+            self.emit("notice", "This location is not accessible yet.")
+            return
+
+        state = self.state
+        state.location = location_id
+
+        trigger = self.triggers.on_visit(location_id, state)
+        if trigger is None or trigger.stay:
+            self.location = location_id
+        if trigger is not None:
+            self.run_trigger(trigger.index)
+
+    def take_action(self, action):
+        """Take one of the current location's actions."""
+        if action == LEAVE_ACTION:
+            self.location = None
+        elif action == HEIST_ACTION:
+            self.location = None
+            self.run_heist()
+        elif self.handle_location_action(self.location, action):
+            self.location = None
+
+    def handle_location_action(self, location_id, action):
+        """Handle actions at locations. Returns True if the location is left."""
+        state = self.state
+        trigger = self.triggers.on_action(location_id, action, state)
+        if trigger is not None:
+            self.run_trigger(trigger.index)
+            return not trigger.stay
+
+        effect = self.effects.actions.get(action)
+        if effect:
+            if not effect.apply(state):
+                self.emit("message", "Not enough money!")
+                return False
+            if effect.advance_time:
+                self.advance_time(effect.advance_time)
+            self.emit("message", effect.message)
+
+        return False
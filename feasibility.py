@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Heist feasibility
+Precomputes, for every heist in heist_sequences, the lowest requirement of
+each stat per scene and the Pareto frontier of builds that clear every
+scene. A heist scene is passed by picking any option whose stat meets its
+requirement, and stats never change during a heist, so from those:
+
+  - "can this state pass?" checks each scene's minimums
+  - "what is the cheapest stat increase to pass?" is the smallest total
+    shortfall against any build on the frontier
+
+Both are cached per stat vector.
+
+    python3 feasibility.py                       # the frontier for each heist
+    python3 feasibility.py --stats charisma=45   # can this build pass?
+"""
+
+import argparse
+from functools import lru_cache
+
+import gamedata
+from engine import HEIST_PHASES
+from state import cached_for, layout_for
+
+RESULT_CACHE_SIZE = 4096
+
+
+def heist_scenes(phases):
+    """(phase, phase title, index in phase, scene) for each scene of a heist, in play order."""
+    titles = dict(HEIST_PHASES)
+    order = [phase for phase, _ in HEIST_PHASES if phase in phases]
+    order += [phase for phase in phases if phase not in titles]
+    return [(phase, titles.get(phase, phase.upper()), i, scene)
+            for phase in order for i, scene in enumerate(phases[phase])]
+
+
+def pareto_plans(scenes, allowed_stats=None):
+    """Pareto-minimal stat requirements that clear every scene, cheapest first.
+
+    Each plan picks one option per scene; its requirement is the highest
+    `req` it needs of each stat. Only options using `allowed_stats` count.
+    Raising a requirement keeps a dominated plan dominated, so the frontier
+    is pruned after every scene and never grows past its final size.
+    """
+    plans = [{}]
+    for scene in scenes:
+        options = [opt for opt in scene["options"] if not allowed_stats or opt["stat"] in allowed_stats]
+        plans = frontier({**plan, opt["stat"]: max(plan.get(opt["stat"], 0), opt["req"])} if opt["req"] > 0 else plan
+                         for plan in plans for opt in options)
+    return plans
+
+
+def frontier(plans):
+    """The distinct plans no other plan needs less of everything than, by total then stats."""
+    unique = {tuple(sorted(plan.items())): plan for plan in plans}
+    kept = []
+    # A plan that dominates another needs fewer points in total, so it comes first
+    for key in sorted(unique, key=lambda items: (sum(req for _, req in items), items)):
+        plan = unique[key]
+        if not any(all(plan.get(stat, 0) >= req for stat, req in other.items()) for other in kept):
+            kept.append(plan)
+    return kept
+
+
+class HeistAnalyzer:
+    """Requirement tables for one heist.
+
+    `minimums[i]` holds (stat index, lowest req) for each stat scene i can be
+    passed with; `plans` is the Pareto frontier as {stat: req} dicts.
+    """
+
+    def __init__(self, data, heist_id="museum", allowed_stats=None):
+        self.layout = layout_for(data["initial_state"])
+        scenes = heist_scenes(data["heist_sequences"][heist_id])
+        self.scene_names = [f"{title.title()}: {scene['scene']}" for _, title, _, scene in scenes]
+        self.scene_keys = [f"{phase}/{scene['scene']}" for phase, _, _, scene in scenes]
+        self.positions = [(phase, i) for phase, _, i, _ in scenes]
+        stat_index = self.layout.stat_index
+        self.minimums = []
+        for _, _, _, scene in scenes:
+            lowest = {}
+            for opt in scene["options"]:
+                if not allowed_stats or opt["stat"] in allowed_stats:
+                    index = stat_index[opt["stat"]]
+                    lowest[index] = min(lowest.get(index, opt["req"]), opt["req"])
+            self.minimums.append(tuple(lowest.items()))
+        self.plans = pareto_plans([scene for _, _, _, scene in scenes], allowed_stats)
+        self.plan_vectors = [tuple((stat_index[stat], req) for stat, req in plan.items()) for plan in self.plans]
+        self.blocked_for = lru_cache(maxsize=RESULT_CACHE_SIZE)(self.find_blocked)
+        self.shortfall_for = lru_cache(maxsize=RESULT_CACHE_SIZE)(self.find_shortfall)
+
+    def find_blocked(self, stats):
+        for i, lowest in enumerate(self.minimums):
+            if not any(stats[index] >= req for index, req in lowest):
+                return i
+        return None
+
+    def find_shortfall(self, stats):
+        best = None
+        for vector in self.plan_vectors:
+            need = [(index, req - stats[index]) for index, req in vector if stats[index] < req]
+            total = sum(amount for _, amount in need)
+            if best is None or total < best[0]:
+                best = (total, need)
+        if best is None:
+            return None
+        names = self.layout.stat_names
+        return best[0], {names[index]: amount for index, amount in best[1]}
+
+    def blocked_scene(self, state):
+        """Index of the first scene no option passes for this state, or None."""
+        return self.blocked_for(tuple(state.stats))
+
+    def can_pass(self, state):
+        return self.blocked_scene(state) is None
+
+    def shortfall(self, state):
+        """(total points, {stat: points}) of the cheapest increase that passes,
+        (0, {}) if it already passes, or None if no build can."""
+        return self.shortfall_for(tuple(state.stats))
+
+    def hint(self, state):
+        """A one-line readiness summary for the player."""
+        blocked = self.blocked_scene(state)
+        if blocked is None:
+            return "Heist readiness: you have a way through every scene."
+        text = f"Heist readiness: you'd be caught at {self.scene_names[blocked]}."
+        shortfall = self.shortfall(state)
+        if shortfall:
+            needs = ", ".join(f"+{amount} {stat.capitalize()}" for stat, amount in shortfall[1].items())
+            text += f" Cheapest fix: {needs}."
+        return text
+
+
+def analyzer_for(data, heist_id="museum"):
+    """The (cached) HeistAnalyzer for a heist of a game data dict."""
+    return cached_for(data, ("analyzer", heist_id), lambda data: HeistAnalyzer(data, heist_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show which builds can clear each heist.")
+    parser.add_argument("--stats", nargs="*", default=[], metavar="STAT=VALUE",
+                        help="check a build (other stats keep their starting values)")
+    args = parser.parse_args()
+
+    data = gamedata.game_data()
+    state = layout_for(data["initial_state"]).template.clone()
+    for item in args.stats:
+        stat, _, value = item.partition("=")
+        state.set_stat(stat, int(value))
+
+    for heist_id in data["heist_sequences"]:
+        analyzer = analyzer_for(data, heist_id)
+        print(f"{heist_id}: {len(analyzer.plans)} minimal builds")
+        for plan in sorted(analyzer.plans, key=lambda plan: (sum(plan.values()), sorted(plan.items()))):
+            print("  " + ", ".join(f"{stat} {req}" for stat, req in sorted(plan.items())))
+        if args.stats:
+            print("  " + analyzer.hint(state))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,498 +1,392 @@
 #!/usr/bin/env python3
 """
 PhantomThrill - A Text-Based Phantom Thief Adventure
-Game data loaded from game_data.json
+Game data loaded lazily from game_data.json (via gamedata.py); rules live in engine.py
 """
 
-import json
+import atexit
 import os
-import time
-import copy
-import random
+import sys
 
-# Load game data from JSON
-GAME_DATA_FILE = os.path.join(os.path.dirname(__file__), "game_data.json")
-SAVE_FILE = os.path.join(os.path.dirname(__file__), "phantomthrill_save.json")
+from gamedata import game_data, set_game_data
+from render import DIVIDER, location_header, render, stats_text
+from typewriter import Typewriter
 
-with open(GAME_DATA_FILE, 'r') as f:
-    GAME_DATA = json.load(f)
+# The rules (engine.py), saves, the terminal and the heist hint are imported
+# where they are first needed, so `import game` stays cheap.
 
-# Game State (will be initialized from GAME_DATA)
+# Headless engine and its state (initialized from game data)
+engine = None
 game_state = None
+# Slot Save Game writes to; None for saves.DEFAULT_SLOT
+save_slot = None
+# Directory holding the save slots; None for saves.SAVE_DIR (replays use a scratch one)
+save_dir = None
 
+# Save in the background, and to AUTOSAVE_SLOT whenever time passes or the story moves on
+autosave = True
+autosaver = None
+# (day, slot, flags) when the state was last autosaved
+checkpoint_key = None
 
-def init_game_state():
-    """Initialize game state from game_data.json."""
-    global game_state
-    game_state = copy.deepcopy(GAME_DATA["initial_state"])
+# Where player input comes from: None for the keyboard, or a replay.Recorder/Replayer
+player_input = None
 
+# Skip typewriter delays and screen clears (replays and benchmarks)
+fast = False
 
-def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+typewriter = Typewriter()
 
+# terminal.Screen redrawing only what changed, once main() has taken over stdout
+screen = None
 
-def slow_print(text, delay=0.02):
-    """Print text with a typewriter effect."""
-    for char in text:
-        print(char, end='', flush=True)
-        time.sleep(delay)
-    print()
+# telemetry.TelemetryWriter with --telemetry, and the current session's telemetry.SessionLog
+telemetry_writer = None
+session_log = None
 
+# hotreload.HotReloader with --hot-reload
+reloader = None
 
-def print_divider():
-    print("=" * 60)
 
+def __getattr__(name):
+    """Keep `game.GAME_DATA` working for importers while loading it lazily."""
+    if name == "GAME_DATA":
+        return game_data()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def print_stats():
-    """Display current stats."""
-    s = game_state["stats"]
-    print_divider()
-    print(f"Day {game_state['day']} - {game_state['time_of_day']}")
-    print(f"Money: ${s['money']} | Hunger: {s['hunger']}% | Health: {s['health']}%")
-    print(f"Charisma: {s['charisma']} | Fitness: {s['fitness']} | Knowledge: {s['knowledge']} | Criminality: {s['criminality']}")
-    print_divider()
 
+def init_game_state():
+    """Initialize game state from game_data.json."""
+    from engine import GameEngine
+    set_engine(GameEngine(game_data()))
 
-def get_choice(options, prompt="Choose an option: "):
-    """Get a valid choice from the player."""
-    while True:
-        for i, option in enumerate(options, 1):
-            print(f"  {i}. {option}")
-        try:
-            choice = int(input(f"\n{prompt}"))
-            if 1 <= choice <= len(options):
-                return choice - 1
-            print("Invalid choice. Try again.")
-        except ValueError:
-            print("Please enter a number.")
 
+def set_engine(new_engine):
+    global engine, game_state, checkpoint_key
+    engine = new_engine
+    game_state = engine.state
+    checkpoint_key = (game_state.day, game_state.slot, game_state.flags)
 
-def replace_placeholders(text):
-    """Replace {player_name} and other placeholders in text."""
-    return text.replace("{player_name}", game_state["player"]["name"])
 
+def close_telemetry():
+    """Finish the session (if the game was left some other way) and write out the log."""
+    end_session("closed")
+    telemetry_writer.close()
 
-def show_dialogue(speaker, text):
-    """Display dialogue."""
-    speaker = replace_placeholders(speaker)
-    text = replace_placeholders(text)
-    print(f"\n[{speaker}]")
-    slow_print(f'"{text}"')
-    input("\n(Press Enter to continue...)")
 
+def start_session(mode):
+    """Start logging telemetry for a new or continued game, if enabled."""
+    global session_log
+    if telemetry_writer:
+        import telemetry
+        session_log = telemetry.SessionLog(telemetry_writer, game_state)
+        session_log.start(mode, game_state)
 
-def show_narration(text):
-    """Display narration."""
-    text = replace_placeholders(text)
-    print()
-    slow_print(text)
-    input("\n(Press Enter to continue...)")
-
-
-def apply_effect(effect):
-    """Apply an effect from a choice."""
-    for key, value in effect.items():
-        if key in game_state["stats"]:
-            game_state["stats"][key] = min(100, game_state["stats"][key] + value)
-            print(f"\n(+{value} {key.capitalize()})")
-        elif key == "flag":
-            game_state["flags"][value] = True
-        elif key == "suspicion":
-            game_state["heist"]["suspicion"] += value
-        elif key == "ending":
-            show_ending(value)
-
-
-def play_dialogue_sequence(dialogue_key):
-    """Play a dialogue sequence from game data."""
-    dialogue = GAME_DATA["dialogues"].get(dialogue_key, [])
-
-    for line in dialogue:
-        speaker = replace_placeholders(line["speaker"])
-        text = replace_placeholders(line["text"])
-
-        if "choices" in line:
-            print(f"\n[{speaker}]")
-            slow_print(f'"{text}"')
-
-            print("\nHow do you respond?")
-            choice_texts = [c["text"] for c in line["choices"]]
-            choice_idx = get_choice(choice_texts)
-
-            chosen = line["choices"][choice_idx]
-            if "effect" in chosen:
-                apply_effect(chosen["effect"])
-        else:
-            if speaker == "Narrator":
-                show_narration(text)
-            else:
-                show_dialogue(speaker, text)
 
+def end_session(reason):
+    global session_log
+    if session_log:
+        session_log.end(reason, game_state)
+        session_log = None
 
-def advance_time():
-    """Advance time of day."""
-    times = ["Morning", "Afternoon", "Evening", "Night"]
-    current_index = times.index(game_state["time_of_day"])
 
-    if current_index == len(times) - 1:
-        game_state["day"] += 1
-        game_state["time_of_day"] = "Morning"
-    else:
-        game_state["time_of_day"] = times[current_index + 1]
+def read_line(prompt=""):
+    """input(), through the screen when one is installed."""
+    if screen:
+        return screen.input(prompt)
+    return input(prompt)
 
-    # Decay stats
-    game_state["stats"]["hunger"] = max(0, game_state["stats"]["hunger"] - 5)
-    game_state["stats"]["hygiene"] = max(0, game_state["stats"]["hygiene"] - 3)
 
-    # Check for game over
-    if game_state["stats"]["hunger"] <= 0:
-        show_ending("starvation")
-    if game_state["stats"]["health"] <= 0:
-        show_ending("health")
+def ask(prompt=""):
+    """Read a line the game acts on: a menu choice or a name."""
+    if player_input:
+        return player_input.ask(prompt)
+    return read_line(prompt)
 
 
-def show_ending(ending_key):
-    """Handle game ending."""
-    ending = GAME_DATA["endings"].get(ending_key, {"title": "The End", "text": "Game Over"})
-    clear_screen()
-    print_divider()
-    print(ending["title"].upper())
-    print_divider()
-    print(ending["text"])
-    print_divider()
-
-    if ending_key == "chapter1_complete":
-        game_state["stats"]["money"] += 5000
-        game_state["stats"]["criminality"] = min(100, game_state["stats"]["criminality"] + 20)
-        game_state["flags"]["completed_museum_heist"] = True
-        print(f"\nYou earned $5000! Total: ${game_state['stats']['money']}")
-        input("Press Enter to continue...")
+def pause(prompt):
+    """Wait for Enter."""
+    if player_input:
+        player_input.pause(prompt)
     else:
-        input("Press Enter to exit...")
-        exit()
+        read_line(prompt)
 
 
-def save_game():
-    """Save game to file."""
-    with open(SAVE_FILE, 'w') as f:
-        json.dump(game_state, f)
-    print("Game saved!")
-
-
-def load_game():
-    """Load game from file."""
-    global game_state
-    if os.path.exists(SAVE_FILE):
-        with open(SAVE_FILE, 'r') as f:
-            game_state = json.load(f)
-        return True
-    return False
-
-
-def intro_sequence():
-    """Play the intro sequence."""
-    clear_screen()
-    print_divider()
-    print(GAME_DATA["meta"]["title"].upper())
-    print(GAME_DATA["meta"]["subtitle"])
-    print_divider()
+def clear_screen():
+    if fast:
+        return
+    if screen:
+        screen.clear()
+    else:
+        import terminal
+        terminal.clear()
 
-    name = input("\nEnter your name (default: Alex): ").strip() or "Alex"
-    thief_name = input("Enter your thief alias (default: Thrill): ").strip() or "Thrill"
 
-    game_state["player"]["name"] = name
-    game_state["player"]["thief_name"] = thief_name
+def slow_print(text, delay=0.02):
+    """Print text with a typewriter effect; any key finishes the line."""
+    if fast:
+        print(text)
+        return
+    typewriter.line(text, delay)
 
-    clear_screen()
-    play_dialogue_sequence("intro")
 
+def print_divider():
+    print(DIVIDER)
 
-def clinic_meet_cal():
-    """Cal meeting sequence at the clinic."""
-    play_dialogue_sequence("clinic_meet_cal")
 
-    game_state["flags"]["met_cal"] = True
-    game_state["flags"]["found_underground"] = True
-    print("\n*** The Underground Market is now accessible! ***")
-    input("Press Enter to continue...")
+def print_stats():
+    """Display current stats."""
+    print(stats_text(game_state))
 
 
-def underground_first():
-    """First visit to underground market."""
-    play_dialogue_sequence("underground_first")
+def print_location_header(loc):
+    print(location_header(loc))
 
-    if game_state["flags"].get("accepted_heist"):
-        play_dialogue_sequence("accept_heist")
-        game_state["inventory"].append("Burner Phone")
-        game_state["inventory"].append("Disguise Kit")
-        print("\n*** Received: Burner Phone, Disguise Kit ***")
-        print("*** Objective: Scout the City Museum ***")
-        input("Press Enter to continue...")
 
+def get_choice(options, prompt="Choose an option: "):
+    """Get a valid choice from the player."""
+    while True:
+        for i, option in enumerate(options, 1):
+            print(f"  {i}. {option}")
+        try:
+            choice = int(ask(f"\n{prompt}"))
+            if 1 <= choice <= len(options):
+                return choice - 1
+            print("Invalid choice. Try again.")
+        except ValueError:
+            print("Please enter a number.")
 
-def museum_scout():
-    """Museum scouting sequence."""
-    play_dialogue_sequence("museum_scout")
 
-    game_state["flags"]["got_jade_whip_info"] = True
-    game_state["heist"]["intel"].append("Jade Whip location: East Wing")
-    print("\n*** Intel gathered: Jade Whip location ***")
-    input("Press Enter to continue...")
+def show_events(events):
+    """Render events returned by the engine (see render.py)."""
+    for op in render(events, game_data(), game_state):
+        kind = op[0]
+        if kind == "print":
+            print(op[1])
+        elif kind == "say":
+            slow_print(op[1])
+        elif kind == "pause":
+            pause(op[1])
+        elif kind == "clear":
+            clear_screen()
+        elif kind == "exit":
+            end_session("game_over")
+            exit()
+
+
+def play(events):
+    """Render events, asking the player for every choice the engine needs."""
+    if session_log:
+        session_log.observe(events, game_state)
+    show_events(events)
+    while engine.pending:
+        prompt = "Choose your approach: " if engine.pending[0] == "heist" else "Choose an option: "
+        choice = get_choice(engine.actions_available(), prompt)
+        events = engine.choose(choice)
+        if session_log:
+            session_log.observe(events, game_state)
+        show_events(events)
+    checkpoint()
+
+
+def hot_reload():
+    """Swap in game_data.json's edits, if any, between turns.
+
+    Edits that are invalid, or that the current game can't take yet, are
+    reported once and the old data kept.
+    """
+    if reloader is None:
+        return
+    import hotreload
+    try:
+        data = reloader.poll()
+        if data is None:
+            return
+        new_engine = hotreload.swap(engine, data)
+    except ValueError as e:
+        if reloader.fresh:
+            print(f"[hot reload] game_data.json not reloaded: {e}")
+            pause("Press Enter to continue...")
+        return
+    reloader.accept()
+    set_game_data(data)
+    set_engine(new_engine)
+    print(f"[hot reload] reloaded {', '.join(reloader.changed)}")
 
 
-def inspector_meet():
-    """Meeting Inspector Mori."""
-    play_dialogue_sequence("inspector_meet")
+def save_store():
+    from saves import LEGACY_SAVE_FILE, SaveStore
+    if save_dir is None:
+        return SaveStore(game_data()["initial_state"])
+    # A replay's scratch directory stands in for the old single-file save too
+    return SaveStore(game_data()["initial_state"], save_dir, os.path.join(save_dir, os.path.basename(LEGACY_SAVE_FILE)))
 
-    game_state["flags"]["met_inspector"] = True
-    print("\n*** Objective: Return to the underground market when ready for the heist ***")
-    input("Press Enter to continue...")
 
+def background_saver():
+    """The Autosaver, started on first use, or None with autosave off."""
+    global autosaver
+    if autosave and autosaver is None:
+        from saves import Autosaver
+        autosaver = Autosaver(save_store())
+        atexit.register(autosaver.close)
+    return autosaver
 
-def run_heist():
-    """Run the museum heist."""
-    clear_screen()
-    print_divider()
-    print("THE MUSEUM HEIST BEGINS")
-    print_divider()
-    print_stats()
-    input("Press Enter to start...")
 
-    heist_data = GAME_DATA["heist_sequences"]["museum"]
-    phases = ["infiltration", "calling_card", "escape"]
-    phase_names = ["INFILTRATION", "CALLING CARD", "ESCAPE"]
+def checkpoint():
+    """Autosave if time has passed or a story flag changed since the last autosave.
 
-    for phase_idx, phase in enumerate(phases):
-        clear_screen()
-        print_divider()
-        print(f"PHASE {phase_idx + 1}: {phase_names[phase_idx]}")
-        print_divider()
-
-        scenes = heist_data[phase]
-
-        for scene in scenes:
-            print(f"\n{scene['icon']} {scene['description']}")
-            print("\nYour options:")
-
-            options = scene["options"]
-            for i, opt in enumerate(options, 1):
-                stat_val = game_state["stats"][opt["stat"]]
-                status = "OK" if stat_val >= opt["req"] else "FAIL"
-                print(f"  {i}. {opt['text']} ({opt['stat'].capitalize()} {opt['req']}+) [{status}: {stat_val}]")
-
-            choice = get_choice([opt["text"] for opt in options], "Choose your approach: ")
-            chosen = options[choice]
-
-            stat_val = game_state["stats"][chosen["stat"]]
-            if stat_val >= chosen["req"]:
-                print(f"\n*** SUCCESS! Your {chosen['stat']} ({stat_val}) met the requirement ({chosen['req']})! ***")
-                input("Press Enter to continue...")
-            else:
-                print(f"\n*** FAILED! Your {chosen['stat']} ({stat_val}) didn't meet the requirement ({chosen['req']})! ***")
-                show_ending("caught")
-
-    # Victory!
-    show_ending("chapter1_complete")
-
-
-def handle_location_action(location_id, action):
-    """Handle actions at locations."""
-    stats = game_state["stats"]
-    action_data = GAME_DATA["actions"].get(action)
-
-    if action_data:
-        # Check cost
-        cost = action_data.get("cost", 0)
-        if cost > 0:
-            if stats["money"] >= cost:
-                stats["money"] -= cost
-            else:
-                print("\nNot enough money!")
-                input("\nPress Enter to continue...")
-                return False
-
-        # Apply effects
-        effects = action_data.get("effects", {})
-        for stat, value in effects.items():
-            if value == "full":
-                stats[stat] = 100
-            elif stat in stats:
-                stats[stat] = min(100, max(0, stats[stat] + value))
-
-        # Add intel if specified
-        intel = action_data.get("add_intel")
-        if intel and intel not in game_state["heist"]["intel"]:
-            game_state["heist"]["intel"].append(intel)
-
-        # Advance time if specified
-        if action_data.get("advance_time"):
-            advance_time()
-
-        print(f"\n{action_data.get('message', 'Done.')}")
-        input("\nPress Enter to continue...")
-        return False
+    Called once the engine has nothing pending, so the saved state can be resumed.
+    """
+    global checkpoint_key
+    key = (game_state.day, game_state.slot, game_state.flags)
+    if key != checkpoint_key and background_saver():
+        from saves import AUTOSAVE_SLOT
+        checkpoint_key = key
+        autosaver.save(AUTOSAVE_SLOT, game_state.clone())
 
-    # Handle special actions
-    if action == "Talk to receptionist":
-        if not game_state["flags"]["met_cal"]:
-            clinic_meet_cal()
-            return True
-
-    elif action == "Talk to dealer":
-        if game_state["flags"].get("accepted_heist") and game_state["flags"].get("got_jade_whip_info"):
-            print("\nReady to start the heist?")
-            choice = get_choice(["Yes, let's do this!", "Not yet, I need to prepare more."])
-            if choice == 0:
-                run_heist()
-                return True
-        elif not game_state["flags"].get("accepted_heist"):
-            underground_first()
-            return True
-        else:
-            print("\n\"Scout the museum first, then come back.\"")
-            input("\nPress Enter to continue...")
-
-    elif action == "Check wanted posters":
-        # Special case: message changes after completing heist
-        action_data = GAME_DATA['actions']['Check wanted posters']
-        if game_state["flags"].get("completed_museum_heist"):
-            print(f"\n{action_data.get('message_after_heist', action_data['message'])}")
-        else:
-            print(f"\n{action_data['message']}")
-        input("\nPress Enter to continue...")
 
-    return False
+def save_game():
+    """Save game to the current slot and say so once it is on disk."""
+    from saves import DEFAULT_SLOT
+    slot = save_slot or DEFAULT_SLOT
+    saver = background_saver()
+    if saver is None:
+        save_store().save(slot, game_state.to_dict())
+    else:
+        # Through the saver, so an autosave of the same slot can't land after it
+        saver.save(slot, game_state.clone())
+        error = saver.flush()
+        if error:
+            print(f"Save failed: {error}")
+            return
+    print("Game saved!")
 
 
-def is_location_unlocked(location_id):
-    """Check if a location is unlocked."""
-    loc = GAME_DATA["locations"].get(location_id, {})
-    if not loc.get("locked", False):
-        return True
+def report_save_error():
+    """Tell the player if a background save has failed since the last turn."""
+    error = autosaver.take_error() if autosaver else None
+    if error:
+        print(f"\nSave failed: {error}")
+        pause("Press Enter to continue...")
 
-    unlock_flag = loc.get("unlock_flag")
-    if unlock_flag and game_state["flags"].get(unlock_flag):
-        return True
 
-    return False
+def choose_slot(store):
+    """The slot to continue from: the only one, or the player's pick."""
+    from saves import DEFAULT_SLOT
+    slots = store.slots()
+    if len(slots) <= 1:
+        return next(iter(slots), save_slot or DEFAULT_SLOT)
+    labels = [f"{slot} - Day {info['day']} {info['time_of_day']}" for slot, info in slots.items()]
+    return list(slots)[get_choice(labels, "Load which save? ")]
 
 
-def visit_location(location_id):
-    """Visit a location and handle events."""
-    loc = GAME_DATA["locations"].get(location_id)
-    if not loc:
-        return
+def load_game():
+    """Load game from a save slot, importing an old save file on first run.
+
+    Says why and returns False if there is nothing it can load.
+    """
+    from engine import GameEngine
+    from saves import AUTOSAVE_SLOT
+    global save_slot
+    store = save_store()
+    slot = choose_slot(store)
+    try:
+        state = store.load(slot)
+        if state is None:
+            state = store.import_legacy(slot)
+    except ValueError as e:
+        print(f"\nCan't load save {slot!r}: {e}\nStarting new game...")
+        return False
+    if state is None:
+        print("\nNo save file found. Starting new game...")
+        return False
+    if slot != AUTOSAVE_SLOT:
+        save_slot = slot
+    set_engine(GameEngine(game_data(), state))
+    return True
 
-    # Check for locked locations
-    if not is_location_unlocked(location_id):
-        print("\nThis location is not accessible yet.")
-        input("Press Enter to continue...")
-        return
 
-    game_state["current_location"] = location_id
+def intro_sequence():
+    """Play the intro sequence."""
+    clear_screen()
+    print_divider()
+    meta = game_data()["meta"]
+    print(meta["title"].upper())
+    print(meta["subtitle"])
+    print_divider()
 
-    # Story triggers
-    if location_id == "clinic" and not game_state["flags"]["met_cal"]:
-        clinic_meet_cal()
-        return
+    name = ask("\nEnter your name (default: Alex): ").strip() or "Alex"
+    thief_name = ask("Enter your thief alias (default: Thrill): ").strip() or "Thrill"
 
-    if location_id == "underground" and not game_state["flags"].get("accepted_heist"):
-        underground_first()
-        return
+    clear_screen()
+    play(engine.begin(name, thief_name))
 
-    if location_id == "museum" and game_state["flags"].get("accepted_heist") and not game_state["flags"].get("got_jade_whip_info"):
-        museum_scout()
-        if not game_state["flags"].get("met_inspector"):
-            inspector_meet()
-        return
 
-    # Check for first-time location visits (side adventures)
-    location_dialogue_map = {
-        "grocery": {"flag": "visited_grocery", "dialogue": "grocery_visit"},
-        "mall": {"flag": "visited_mall", "dialogue": "mall_visit"},
-        "restaurant": {"flag": "visited_restaurant", "dialogue": "restaurant_visit"},
-        "gym": {"flag": "visited_gym", "dialogue": "gym_visit"},
-        "bar": {"flag": "visited_bar", "dialogue": "bar_visit"},
-        "police": {"flag": "visited_police", "dialogue": "police_visit"},
-        "motel": {"flag": "visited_motel", "dialogue": "motel_return"}
-    }
-
-    loc_info = location_dialogue_map.get(location_id)
-    if loc_info and not game_state["flags"].get(loc_info["flag"]):
-        dialogue_key = loc_info["dialogue"]
-        if dialogue_key in GAME_DATA["dialogues"]:
-            game_state["flags"][loc_info["flag"]] = True
-            clear_screen()
-            print_stats()
-            print(f"\n{loc['icon']} === {loc['name']} ===")
-            play_dialogue_sequence(dialogue_key)
+def visit_location(location_id):
+    """Visit a location and loop over its actions until the player leaves."""
+    from engine import HEIST_ACTION
+    if session_log:
+        session_log.visit(location_id, game_state)
+    play(engine.step(location_id))
 
-    # Normal location visit
-    while True:
+    while engine.location:
         clear_screen()
+        report_save_error()
+        hot_reload()
+        loc = game_data()["locations"][engine.location]
         print_stats()
-        print(f"\n{loc['icon']} === {loc['name']} ===")
+        print_location_header(loc)
         print(loc['description'])
 
-        # Build actions list
-        actions = loc["actions"].copy()
-
-        # Add heist option if ready
-        if location_id == "underground" and game_state["flags"].get("accepted_heist") and game_state["flags"].get("got_jade_whip_info"):
-            actions.insert(0, "*** BEGIN MUSEUM HEIST ***")
-
-        actions.append("Leave")
-
+        actions = engine.actions_available()
+        if HEIST_ACTION in actions:
+            from feasibility import analyzer_for
+            print(f"\n{analyzer_for(game_data()).hint(game_state)}")
         print("\nWhat do you do?")
         choice = get_choice(actions)
-        action = actions[choice]
-
-        if action == "Leave":
-            break
-        elif action == "*** BEGIN MUSEUM HEIST ***":
-            run_heist()
-            break
-        else:
-            if handle_location_action(location_id, action):
-                break
+        if session_log:
+            session_log.action(engine.location, actions[choice], game_state)
+        play(engine.step(actions[choice]))
 
 
 def show_inventory():
     """Show inventory."""
     print("\n=== INVENTORY ===")
-    if not game_state["inventory"]:
+    if not game_state.inventory:
         print("No items yet.")
     else:
-        for item in game_state["inventory"]:
+        for item in game_state.inventory:
             print(f"  - {item}")
-    input("\nPress Enter to continue...")
+    pause("\nPress Enter to continue...")
 
 
 def show_intel():
     """Show gathered intel."""
     print("\n=== INTEL NOTES ===")
-    if not game_state["heist"]["intel"]:
+    if not game_state.intel:
         print("No intel yet. Scout locations!")
     else:
-        for note in game_state["heist"]["intel"]:
+        for note in game_state.intel:
             print(f"  - {note}")
-    input("\nPress Enter to continue...")
+    pause("\nPress Enter to continue...")
 
 
 def main_menu():
     """Show the main game menu."""
     while True:
         clear_screen()
+        report_save_error()
+        hot_reload()
         print_stats()
 
         print("\n=== LOCATIONS ===")
         available = []
-        for loc_id, loc in GAME_DATA["locations"].items():
-            if is_location_unlocked(loc_id):
-                available.append((loc_id, loc["name"], loc["icon"]))
+        for loc_id in engine.actions_available():
+            loc = game_data()["locations"][loc_id]
+            available.append((loc_id, loc["name"], loc["icon"]))
 
         for i, (loc_id, name, icon) in enumerate(available, 1):
-            marker = " (YOU ARE HERE)" if loc_id == game_state["current_location"] else ""
+            marker = " (YOU ARE HERE)" if loc_id == game_state.location else ""
             print(f"  {i}. {icon} {name}{marker}")
 
         print(f"\n  {len(available) + 1}. View Inventory")
@@ -501,7 +395,7 @@ def main_menu():
         print(f"  {len(available) + 4}. Quit")
 
         try:
-            choice = int(input("\nWhere do you want to go? "))
+            choice = int(ask("\nWhere do you want to go? "))
             if 1 <= choice <= len(available):
                 visit_location(available[choice - 1][0])
             elif choice == len(available) + 1:
@@ -510,9 +404,10 @@ def main_menu():
                 show_intel()
             elif choice == len(available) + 3:
                 save_game()
-                input("Press Enter to continue...")
+                pause("Press Enter to continue...")
             elif choice == len(available) + 4:
                 save_game()
+                end_session("quit")
                 print("Thanks for playing!")
                 break
         except ValueError:
@@ -531,8 +426,9 @@ def title_screen():
    |_|   |_| |_|\__,_|_| |_|\__\___/|_| |_| |_||_| |_| |_|_|  |_|_|_|
 
     """)
-    print(f"                    {GAME_DATA['meta']['subtitle']}")
-    credits = GAME_DATA['meta']['credits']
+    meta = game_data()['meta']
+    print(f"                    {meta['subtitle']}")
+    credits = meta['credits']
     print(f"\n           {credits['game_designer']} (Designer) | {credits['prompter']} (Prompter)")
     print(f"                      {credits['software_engineer']} (Engineer)")
     print_divider()
@@ -542,22 +438,90 @@ def title_screen():
 
     if choice == 0:
         init_game_state()
+        start_session("new")
         intro_sequence()
         main_menu()
     elif choice == 1:
         if load_game():
+            start_session("continue")
             print("\nGame loaded!")
-            input("Press Enter to continue...")
+            pause("Press Enter to continue...")
             main_menu()
         else:
-            print("\nNo save file found. Starting new game...")
-            input("Press Enter to continue...")
+            pause("Press Enter to continue...")
             init_game_state()
+            start_session("new")
             intro_sequence()
             main_menu()
     else:
         print("\nGoodbye!")
 
 
+def main():
+    import argparse
+    import random
+    import terminal
+    global player_input, screen, telemetry_writer, autosave, reloader
+    parser = argparse.ArgumentParser(description="Play PhantomThrill in the terminal.")
+    parser.add_argument("--record", metavar="FILE", help="record every choice and name you type to FILE")
+    parser.add_argument("--replay", metavar="FILE", help="play back a recording at full speed")
+    parser.add_argument("--seed", type=int, help="random seed (default: the recording's, or a fresh one)")
+    parser.add_argument("--quiet", action="store_true", help="with --replay, only print a summary")
+    parser.add_argument("--text-speed", type=float, default=1.0, metavar="X",
+                        help="typewriter speed multiplier (2 = twice as fast)")
+    parser.add_argument("--instant-text", action="store_true", help="print all text at once")
+    parser.add_argument("--profile", nargs="?", const="1", metavar="OUTPUT",
+                        help="time the engine and write OUTPUT.json and OUTPUT.folded on exit")
+    parser.add_argument("--no-autosave", action="store_true",
+                        help="save only when asked, and wait for the disk")
+    parser.add_argument("--telemetry", nargs="?", const="1", metavar="LOG",
+                        help="log story progress to LOG (default telemetry/events.log) for telemetry.py")
+    parser.add_argument("--hot-reload", action="store_true",
+                        help="pick up edits to game_data.json between turns")
+    args = parser.parse_args()
+    typewriter.speed = args.text_speed
+    typewriter.instant = args.instant_text
+    autosave = not args.no_autosave
+
+    telemetry_log = args.telemetry or os.environ.get("PHANTOMTHRILL_TELEMETRY")
+    if telemetry_log:
+        import telemetry
+        telemetry_writer = telemetry.TelemetryWriter(telemetry.DEFAULT_LOG if telemetry_log == "1" else telemetry_log)
+        atexit.register(close_telemetry)
+
+    if args.hot_reload:
+        import hotreload
+        reloader = hotreload.HotReloader(game_data())
+
+    if args.profile or os.environ.get("PHANTOMTHRILL_PROFILE"):
+        import instrument
+        module = sys.modules[__name__]
+        if args.profile:
+            instrument.enable(args.profile, module)
+        else:
+            instrument.enable_from_env(module)
+
+    if args.replay:
+        import replay
+        result = replay.replay(args.replay, args.quiet, args.seed, sys.modules[__name__])
+        state = result["state"]
+        where = f", ended on Day {state['day']} {state['time_of_day']}" if state else ""
+        print(f"Replayed {result['inputs']}/{result['recorded']} inputs in "
+              f"{result['seconds'] * 1000:.1f} ms{where}")
+    elif args.record:
+        import replay
+        screen = terminal.install()
+        seed = args.seed if args.seed is not None else int.from_bytes(os.urandom(4), "big")
+        random.seed(seed)
+        player_input = replay.Recorder(args.record, seed, read_line, save_store().snapshot())
+        try:
+            title_screen()
+        finally:
+            player_input.close()
+    else:
+        screen = terminal.install()
+        title_screen()
+
+
 if __name__ == "__main__":
-    title_screen()
+    main()
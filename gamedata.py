@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Game data loader
+Compiles game_data.json into a validated, pre-indexed binary cache under
+__pycache__ and loads it lazily. The cache is reused while the JSON file's
+mtime and size are unchanged, or while its content hash still matches.
+Dialogues go to per-chapter pack files next to the cache and are read on
+demand (see packs.py); the cache keeps their compiled graph (see dialogues.py).
+
+    python3 gamedata.py            # compile (or refresh) the cache
+"""
+
+import marshal
+import os
+import sys
+
+from packs import DialogueStore
+
+GAME_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_data.json")
+
+# Bump when the compiled layout changes so stale caches are ignored
+CACHE_VERSION = 3
+
+# Sections that get integer ids, in the order the data file lists them
+INDEXED_SECTIONS = ("locations", "actions", "dialogues", "endings")
+
+REQUIRED_SECTIONS = ("meta", "initial_state", "locations", "actions", "dialogues", "heist_sequences", "endings")
+
+_loaded = {}
+
+
+class GameData(dict):
+    """The game_data.json dict, plus integer ids for locations, actions,
+    dialogues and endings.
+
+    `ids[section]` maps a name to its id and `names[section]` maps back.
+    `dialogue_graph` is the compiled dialogue graph when it came from the cache.
+    `compiled` holds what the engine's modules build from this data (see
+    state.cached_for), so it is freed along with the data.
+    """
+
+    def __init__(self, data, names, dialogue_graph=None):
+        super().__init__(data)
+        self.names = names
+        self.dialogue_graph = dialogue_graph
+        self.compiled = {}
+        self.ids = {section: {name: i for i, name in enumerate(section_names)}
+                    for section, section_names in names.items()}
+
+
+def intern_strings(obj):
+    """Return a copy of a JSON value with every key and string interned."""
+    if isinstance(obj, str):
+        return sys.intern(obj)
+    if isinstance(obj, dict):
+        return {sys.intern(k): intern_strings(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [intern_strings(item) for item in obj]
+    return obj
+
+
+def validate(data):
+    """Raise ValueError listing every broken reference in the game data."""
+    # Imported here so a cache hit never pays for them
+    from dialogues import graph_problems
+    from effects import action_problems, effect_problems
+    from triggers import validate_triggers
+
+    missing = [section for section in REQUIRED_SECTIONS if section not in data]
+    if missing:
+        raise ValueError(f"game data is missing sections: {', '.join(missing)}")
+
+    problems = []
+    stats = data["initial_state"]["stats"]
+    flags = data["initial_state"]["flags"]
+
+    for loc_id, loc in data["locations"].items():
+        unlock_flag = loc.get("unlock_flag")
+        if unlock_flag and unlock_flag not in flags:
+            problems.append(f"location {loc_id}: unknown unlock_flag {unlock_flag!r}")
+
+    for name, action in data["actions"].items():
+        problems.extend(action_problems(name, action, data))
+
+    for key, lines in data["dialogues"].items():
+        for line in lines:
+            for choice in line.get("choices", []):
+                problems.extend(effect_problems(f"dialogue {key}", choice.get("effect", {}), data))
+
+    for heist_id, phases in data["heist_sequences"].items():
+        for phase, scenes in phases.items():
+            for scene in scenes:
+                for opt in scene["options"]:
+                    if opt["stat"] not in stats:
+                        problems.append(f"heist {heist_id}/{phase}/{scene['scene']}: unknown stat {opt['stat']!r}")
+
+    for chapter, keys in data.get("chapters", {}).items():
+        if not chapter.isdigit():
+            problems.append(f"chapters: {chapter!r} is not a chapter number")
+        for key in keys:
+            if key not in data["dialogues"]:
+                problems.append(f"chapter {chapter}: unknown dialogue {key!r}")
+
+    problems.extend(graph_problems(data))
+    problems.extend(validate_triggers(data))
+
+    if problems:
+        raise ValueError("invalid game data:\n  " + "\n  ".join(problems))
+
+
+def compile_data(source):
+    """Parse, validate and index JSON source text. Returns (data, names)."""
+    import json
+    data = intern_strings(json.loads(source))
+    validate(data)
+    names = {section: list(data[section]) for section in INDEXED_SECTIONS}
+    return data, names
+
+
+def cache_path(path):
+    directory, filename = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, "__pycache__", os.path.splitext(filename)[0] + ".cache")
+
+
+def read_cache(path):
+    try:
+        with open(path, 'rb') as f:
+            return marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def write_atomic(path, content):
+    """Write text or bytes to path via a synced temp file and rename, so a
+    crash or a concurrent reader never sees half a file. An existing file
+    keeps its permissions. Used for the cache, index.html and saves alike."""
+    # Imported here so a cache hit never pays for it
+    import tempfile
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content.encode("utf-8") if isinstance(content, str) else content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def write_file(path, blob):
+    """write_atomic(), except a read-only checkout just goes without the file. Returns True if written."""
+    try:
+        write_atomic(path, blob)
+        return True
+    except OSError:
+        return False
+
+
+def write_cache(path, payload):
+    return write_file(path, marshal.dumps(payload))
+
+
+def write_packs(cache_file, data, digest):
+    """Write the dialogue packs for a cache file. Returns (index, pack file names) or None."""
+    import glob
+    from packs import dialogue_chapters, pack_dialogues
+    index, blobs = pack_dialogues(data["dialogues"], dialogue_chapters(data))
+    base = os.path.splitext(cache_file)[0]
+    files = {chapter: f"{base}.{digest[:12]}.ch{chapter}.pack" for chapter in blobs}
+    for chapter, blob in blobs.items():
+        if not write_file(files[chapter], blob):
+            return None
+    for path in glob.glob(f"{glob.escape(base)}.*.pack"):
+        if path not in files.values():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return index, {chapter: os.path.basename(path) for chapter, path in files.items()}
+
+
+def from_cache(cached, cache_file):
+    """GameData for a cache entry, or None if its pack files are gone."""
+    directory = os.path.dirname(cache_file)
+    files = {chapter: os.path.join(directory, name) for chapter, name in cached["packs"].items()}
+    try:
+        dialogues = DialogueStore(files, cached["dialogue_index"])
+    except OSError:
+        return None
+    data = dict(cached["data"])
+    data["dialogues"] = dialogues
+    return GameData(data, cached["names"], cached["dialogue_graph"])
+
+
+def load(path=GAME_DATA_FILE, use_cache=True):
+    """Load game data, going through the compiled cache when possible.
+
+    With the cache, data["dialogues"] is a packs.DialogueStore rather than a dict.
+    """
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cache_file = cache_path(path)
+
+    cached = read_cache(cache_file) if use_cache else None
+    if cached and cached.get("version") != CACHE_VERSION:
+        cached = None
+    if cached and cached.get("stamp") == list(stamp):
+        loaded = from_cache(cached, cache_file)
+        if loaded is not None:
+            return loaded
+
+    # Imported here so a cache hit never pays for them
+    import hashlib
+    from dialogues import compile_graph
+
+    with open(path, 'rb') as f:
+        source = f.read()
+    digest = hashlib.sha256(source).hexdigest()
+
+    if cached and cached.get("sha256") == digest:
+        # Touched but unchanged: refresh the stamp only
+        cached["stamp"] = list(stamp)
+        loaded = from_cache(cached, cache_file)
+        if loaded is not None:
+            write_cache(cache_file, cached)
+            return loaded
+
+    data, names = compile_data(source)
+    if use_cache:
+        packed = write_packs(cache_file, data, digest)
+        if packed is not None:
+            index, packs = packed
+            cached = {"version": CACHE_VERSION, "stamp": list(stamp), "sha256": digest,
+                      "data": {key: None if key == "dialogues" else value for key, value in data.items()},
+                      "names": names, "dialogue_index": index, "packs": packs,
+                      "dialogue_graph": compile_graph(data["dialogues"])}
+            if write_cache(cache_file, cached):
+                loaded = from_cache(cached, cache_file)
+                if loaded is not None:
+                    return loaded
+    return GameData(data, names)
+
+
+def game_data(path=GAME_DATA_FILE):
+    """Game data for `path`, loaded on first use and shared afterwards."""
+    data = _loaded.get(path)
+    if data is None:
+        data = _loaded[path] = load(path)
+    return data
+
+
+def set_game_data(data, path=GAME_DATA_FILE):
+    """Make game_data(path) return `data` from now on (see hotreload.py)."""
+    _loaded[path] = data
+
+
+def main():
+    data = load()
+    counts = ", ".join(f"{len(data.names[section])} {section}" for section in INDEXED_SECTIONS)
+    print(f"Compiled {GAME_DATA_FILE} -> {cache_path(GAME_DATA_FILE)} ({counts})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Hot reload
+With `python3 game.py --hot-reload`, edits to game_data.json show up in the
+running game. Between turns the game checks the file's mtime and size; when
+they change, the file is split into its top-level sections without parsing
+them, and only sections whose text changed are parsed again. The result is
+validated as a whole and against the live game (the current location must
+still exist, and initial_state can't change under a running state). Only then
+is it swapped in, with a new GameEngine on the same state. A half-saved or
+broken file is reported and the old data kept.
+
+    python3 hotreload.py     # watch game_data.json and report each edit
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+
+import gamedata
+from engine import GameEngine
+
+# Sections the live state depends on; changing them needs a restart
+FIXED_SECTIONS = ("initial_state",)
+
+# A JSON string, or a character that opens, closes or separates values (a
+# lone quote is a string that never ends)
+TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|["{}\[\],]')
+
+
+def split_sections(source):
+    """{top-level key: text of its value} for a JSON object, without parsing the values."""
+    sections = {}
+    depth = 0
+    key = None
+    start = None
+    end = None
+    for match in TOKEN_RE.finditer(source):
+        token = match.group()
+        if token == '"':
+            break
+        if depth == 1 and token[0] == '"' and key is None:
+            key = json.loads(token)
+            start = source.index(":", match.end()) + 1
+        elif token in "{[":
+            depth += 1
+        elif token in "}]" or (token == "," and depth == 1):
+            if depth == 1 and key is not None:
+                sections[key] = source[start:match.start()].strip()
+                key = None
+            if token != ",":
+                depth -= 1
+                if depth == 0:
+                    end = match.end()
+                    break
+    if end is None or key is not None or source[end:].strip():
+        raise ValueError("game data is not a complete JSON object")
+    return sections
+
+
+def file_stamp(path):
+    """(mtime, size) of a file, or None while an editor is replacing it."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def live_problems(engine, data):
+    """Reasons new data can't replace an engine's data mid-game, as a list of strings."""
+    problems = []
+    for section in FIXED_SECTIONS:
+        if data[section] != engine.data[section]:
+            problems.append(f"{section} changed; restart the game to use it")
+    if engine.pending:
+        problems.append("a choice is pending")
+    for location_id in {engine.location, engine.state.location} - {None}:
+        if location_id not in data["locations"]:
+            problems.append(f"the current location {location_id!r} no longer exists")
+    return problems
+
+
+def swap(engine, data):
+    """A GameEngine for the new data, carrying on the same game."""
+    problems = live_problems(engine, data)
+    if problems:
+        raise ValueError("; ".join(problems))
+    other = GameEngine(data, engine.state)
+    other.location = engine.location
+    other.ending = engine.ending
+    return other
+
+
+class HotReloader:
+    """Watches a game data file, re-parsing only the sections that changed.
+
+    poll() offers the file's new data until accept() is called, so an edit
+    the live game can't take yet is offered again on later turns.
+    """
+
+    def __init__(self, data, path=gamedata.GAME_DATA_FILE):
+        self.path = path
+        self.data = data
+        self.stamp = file_stamp(path)
+        with open(path, encoding="utf-8") as f:
+            self.sections = split_sections(f.read())
+        self.candidate = None  # (GameData, sections) not yet accepted
+        self.changed = []
+        self.fresh = False
+
+    def poll(self):
+        """New GameData if the file changed since the last accept(), else None.
+
+        Raises ValueError if the changed file is not valid, once per save.
+        `changed` lists the sections that differ, and `fresh` is True when
+        this poll read the file rather than offering the same data again.
+        """
+        stamp = file_stamp(self.path)
+        self.fresh = stamp is not None and stamp != self.stamp
+        if not self.fresh:
+            return self.candidate and self.candidate[0]
+        self.stamp = stamp
+        self.candidate = None
+        with open(self.path, encoding="utf-8") as f:
+            sections = split_sections(f.read())
+
+        changed = [name for name, text in sections.items() if self.sections.get(name) != text]
+        changed += [name for name in self.sections if name not in sections]
+        if not changed:
+            return None
+
+        data = {}
+        for name, text in sections.items():
+            data[name] = gamedata.intern_strings(json.loads(text)) if name in changed else self.data[name]
+        try:
+            gamedata.validate(data)
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"malformed game data ({type(e).__name__}: {e})") from e
+        names = {section: list(data[section]) for section in gamedata.INDEXED_SECTIONS}
+        graph = None if "dialogues" in changed else getattr(self.data, "dialogue_graph", None)
+
+        self.candidate = (gamedata.GameData(data, names, graph), sections)
+        self.changed = changed
+        return self.candidate[0]
+
+    def accept(self):
+        """The data last returned by poll() is now in use."""
+        self.data, self.sections = self.candidate
+        self.candidate = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch game_data.json and report what a running game would reload.")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between checks")
+    args = parser.parse_args()
+
+    reloader = HotReloader(gamedata.game_data())
+    print(f"Watching {reloader.path} (Ctrl+C to stop)...")
+    try:
+        while True:
+            time.sleep(args.interval)
+            started = time.perf_counter()
+            try:
+                data = reloader.poll()
+            except ValueError as e:
+                print(f"Not reloadable: {e}")
+                continue
+            if data is not None:
+                problems = [f"{section} changed; restart the game to use it"
+                            for section in FIXED_SECTIONS if data[section] != reloader.data[section]]
+                reloader.accept()
+                print(f"Reloaded {', '.join(reloader.changed)} in {(time.perf_counter() - started) * 1000:.1f} ms"
+                      + (f" ({'; '.join(problems)})" if problems else ""))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Opt-in instrumentation
+Counts calls and wall/CPU time for the engine's main rules and for saving and
+loading, plus how often each action is taken, each location visited and each
+dialogue played. Nothing is wrapped unless instrumentation is enabled, so a
+normal game runs the original functions untouched.
+
+    python3 game.py --profile                     # writes phantomthrill_profile.*
+    PHANTOMTHRILL_PROFILE=run1 python3 game.py    # writes run1.json and run1.folded
+
+The .json report holds the timings and counters. The .folded file holds
+collapsed stacks (self time in microseconds) for flamegraph.pl or speedscope.
+Typewriter delays and screen clears happen in the renderer, which is not
+timed, so they never show up in the engine's numbers.
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+ENV_VAR = "PHANTOMTHRILL_PROFILE"
+DEFAULT_OUTPUT = "phantomthrill_profile"
+
+# (function name, counter it feeds, key for that counter from the call's arguments)
+ENGINE_FUNCTIONS = (
+    # Every dialogue line is played here, including what follows a dialogue choice
+    ("play_from", "dialogues", lambda engine, node, then=None: engine.dialogue_graph.line(node)[0] if node >= 0 else None),
+    ("handle_location_action", None, None),
+    ("visit_location", "locations", lambda engine, location_id: location_id),
+    ("take_action", "actions", lambda engine, action: action),
+    ("advance_time", None, None),
+    ("run_heist", None, None),
+)
+GAME_FUNCTIONS = ("save_game", "load_game")
+
+# Report names for functions whose own name says little on its own
+LABELS = {"play_from": "play_dialogue"}
+
+profiler = None
+
+
+class Profiler:
+    """Timings for wrapped functions, kept along the stack of wrapped calls."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stats = {}
+        self.counters = {}
+        self.stack = []
+        self.folded = Counter()
+
+    def wrap(self, name, func, counter=None, key=None):
+        """func, timed under `name` and optionally counted by key(*args)."""
+        stats = self.stats.setdefault(name, [0, 0.0, 0.0, 0.0])
+        counts = self.counters.setdefault(counter, Counter()) if counter else None
+        stack = self.stack
+        folded = self.folded
+        perf_counter = time.perf_counter
+        process_time = time.process_time
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if counts is not None:
+                counts[key(*args)] += 1
+            frame = [name, 0.0]
+            stack.append(frame)
+            wall_start = perf_counter()
+            cpu_start = process_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                wall = perf_counter() - wall_start
+                cpu = process_time() - cpu_start
+                path = ";".join(f[0] for f in stack)
+                stack.pop()
+                own = wall - frame[1]
+                stats[0] += 1
+                stats[1] += wall
+                stats[2] += cpu
+                stats[3] += own
+                folded[path] += own
+                if stack:
+                    stack[-1][1] += wall
+
+        return wrapper
+
+    def report(self):
+        functions = {
+            name: {"calls": calls, "wall": wall, "cpu": cpu, "self_wall": own,
+                   "wall_per_call": wall / calls if calls else 0.0}
+            for name, (calls, wall, cpu, own) in sorted(self.stats.items(), key=lambda item: -item[1][1])
+        }
+        return {
+            "elapsed": time.perf_counter() - self.started,
+            "functions": functions,
+            "counters": {name: dict(counts.most_common()) for name, counts in self.counters.items()},
+        }
+
+    def write(self, output):
+        """Write output.json and output.folded."""
+        with open(output + ".json", 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        with open(output + ".folded", 'w') as f:
+            for path, seconds in sorted(self.folded.items()):
+                micros = round(seconds * 1e6)
+                if micros:
+                    f.write(f"{path} {micros}\n")
+        print(f"Profile written to {output}.json and {output}.folded", file=sys.stderr)
+
+
+def enable(output=DEFAULT_OUTPUT, game=None):
+    """Start instrumenting and write the report to `output`.* at exit.
+
+    Pass the running game module when it is __main__, so its functions are
+    the ones wrapped rather than those of a second copy.
+    """
+    global profiler
+    if profiler is not None:
+        return profiler
+    if output in ("1", "true", "yes"):
+        output = DEFAULT_OUTPUT
+
+    import engine
+    if game is None:
+        import game
+
+    profiler = Profiler()
+    for name, counter, key in ENGINE_FUNCTIONS:
+        setattr(engine.GameEngine, name,
+                profiler.wrap(LABELS.get(name, name), getattr(engine.GameEngine, name), counter, key))
+    for name in GAME_FUNCTIONS:
+        setattr(game, name, profiler.wrap(name, getattr(game, name)))
+    atexit.register(profiler.write, os.path.abspath(output))
+    return profiler
+
+
+def enable_from_env(game=None):
+    """enable() if PHANTOMTHRILL_PROFILE is set."""
+    output = os.environ.get(ENV_VAR)
+    if output:
+        return enable(output, game)
+    return None
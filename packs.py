@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Content packs
+gamedata.py keeps dialogues out of the compiled cache. It writes them to one
+pack file per chapter in __pycache__ instead: the chapter's dialogues,
+marshalled back to back. The cache only holds an index of (chapter, offset,
+length) per dialogue. DialogueStore memory-maps the packs and decodes a
+dialogue only when it is asked for, keeping the most recently used ones, so
+resident memory and startup time stay flat however much content the
+chapters add.
+
+A dialogue's chapter comes from the optional "chapters" section of
+game_data.json; dialogues it doesn't list belong to chapter 1:
+    "chapters": {"2": ["school_intro", "school_principal"]}
+"""
+
+import marshal
+import mmap
+from collections import OrderedDict
+from collections.abc import Mapping
+
+DEFAULT_CHAPTER = 1
+
+# Decoded dialogues kept per DialogueStore
+DIALOGUE_CACHE_SIZE = 64
+
+
+def dialogue_chapters(data):
+    """Chapter number of each dialogue listed in the "chapters" section."""
+    return {key: int(chapter) for chapter, keys in data.get("chapters", {}).items() for key in keys}
+
+
+def pack_dialogues(dialogues, chapters):
+    """Split dialogues into per-chapter packs.
+
+    Returns (index, packs): index maps a dialogue key to (chapter, offset,
+    length) and packs maps a chapter to the bytes of its pack file.
+    """
+    index = {}
+    buffers = {}
+    for key, lines in dialogues.items():
+        chapter = chapters.get(key, DEFAULT_CHAPTER)
+        blob = marshal.dumps(lines)
+        buffer = buffers.setdefault(chapter, bytearray())
+        index[key] = (chapter, len(buffer), len(blob))
+        buffer += blob
+    return index, {chapter: bytes(buffer) for chapter, buffer in buffers.items()}
+
+
+class DialogueStore(Mapping):
+    """Read-only dialogues dict backed by memory-mapped pack files.
+
+    `files` maps a chapter to its pack's path and `index` maps a dialogue key
+    to (chapter, offset, length). At most `size` decoded dialogues are kept.
+    """
+
+    def __init__(self, files, index, size=DIALOGUE_CACHE_SIZE):
+        self.index = index
+        self.size = size
+        self.decoded = OrderedDict()
+        # Mapped up front (which reads nothing) so a newer build removing
+        # these files later can't pull them out from under us
+        self.maps = {}
+        try:
+            for chapter, path in files.items():
+                with open(path, 'rb') as f:
+                    self.maps[chapter] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            self.close()
+            raise
+
+    def __getitem__(self, key):
+        lines = self.decoded.get(key)
+        if lines is not None:
+            self.decoded.move_to_end(key)
+            return lines
+        chapter, offset, length = self.index[key]
+        lines = self.decoded[key] = marshal.loads(self.maps[chapter][offset:offset + length])
+        if len(self.decoded) > self.size:
+            self.decoded.popitem(last=False)
+        return lines
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def chapter(self, key):
+        return self.index[key][0]
+
+    def close(self):
+        self.decoded.clear()
+        for pack in self.maps.values():
+            pack.close()
+        self.maps.clear()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Event rendering
+The engine returns events (see engine.py); render() turns them into screen
+operations, which game.py carries out on the terminal and server.py over a
+socket:
+
+    ("clear",)          clear the screen
+    ("print", text)     show text as is
+    ("say", text)       show story text (typed out in the terminal)
+    ("pause", prompt)   wait for Enter
+    ("exit",)           a final ending was shown; the game is over
+
+A new event kind only needs a case here to show up in both front ends.
+"""
+
+DIVIDER = "=" * 60
+
+
+def stats_text(state):
+    """The stats panel shown above every menu."""
+    s = state.stat
+    return "\n".join((
+        DIVIDER,
+        f"Day {state.day} - {state.time_of_day}",
+        f"Money: ${s('money')} | Hunger: {s('hunger')}% | Health: {s('health')}%",
+        f"Charisma: {s('charisma')} | Fitness: {s('fitness')} | Knowledge: {s('knowledge')} | Criminality: {s('criminality')}",
+        DIVIDER,
+    ))
+
+
+def location_header(loc):
+    return f"\n{loc['icon']} === {loc['name']} ==="
+
+
+def render(events, data, state):
+    """Screen operations for a list of engine events, in order."""
+    for event in events:
+        kind = event[0]
+        if kind == "narration":
+            yield ("print", "")
+            yield ("say", event[1])
+            yield ("pause", "\n(Press Enter to continue...)")
+        elif kind == "dialogue":
+            yield ("print", f"\n[{event[1]}]")
+            yield ("say", f'"{event[2]}"')
+            yield ("pause", "\n(Press Enter to continue...)")
+        elif kind == "ask":
+            yield ("print", f"\n[{event[1]}]")
+            yield ("say", f'"{event[2]}"')
+            yield ("print", "\nHow do you respond?")
+        elif kind == "stat":
+            yield ("print", f"\n(+{event[2]} {event[1].capitalize()})")
+        elif kind == "message":
+            yield ("print", f"\n{event[1]}")
+            yield ("pause", "\nPress Enter to continue...")
+        elif kind == "notice":
+            yield ("print", f"\n{event[1]}")
+            yield ("pause", "Press Enter to continue...")
+        elif kind == "confirm":
+            yield ("print", f"\n{event[1]}")
+        elif kind == "arrive":
+            yield ("clear",)
+            yield ("print", stats_text(state))
+            yield ("print", location_header(data["locations"][event[1]]))
+        elif kind == "heist_start":
+            yield ("clear",)
+            yield ("print", f"{DIVIDER}\nTHE MUSEUM HEIST BEGINS\n{DIVIDER}")
+            yield ("print", stats_text(state))
+            yield ("pause", "Press Enter to start...")
+        elif kind == "heist_phase":
+            yield ("clear",)
+            yield ("print", f"{DIVIDER}\nPHASE {event[1]}: {event[2]}\n{DIVIDER}")
+        elif kind == "heist_scene":
+            scene, rows = event[1], event[2]
+            yield ("print", f"\n{scene['icon']} {scene['description']}")
+            yield ("print", "\nYour options:")
+            for i, (opt, stat_val, ok) in enumerate(rows, 1):
+                status = "OK" if ok else "FAIL"
+                yield ("print", f"  {i}. {opt['text']} ({opt['stat'].capitalize()} {opt['req']}+) [{status}: {stat_val}]")
+        elif kind == "heist_result":
+            chosen, stat_val, success = event[1:]
+            if success:
+                yield ("print", f"\n*** SUCCESS! Your {chosen['stat']} ({stat_val}) met the requirement ({chosen['req']})! ***")
+                yield ("pause", "Press Enter to continue...")
+            else:
+                yield ("print", f"\n*** FAILED! Your {chosen['stat']} ({stat_val}) didn't meet the requirement ({chosen['req']})! ***")
+        elif kind == "ending":
+            # Every ending but chapter1_complete (the one with a reward) ends the game
+            _, ending, reward = event[1:]
+            yield ("clear",)
+            yield ("print", f"{DIVIDER}\n{ending['title'].upper()}\n{DIVIDER}\n{ending['text']}\n{DIVIDER}")
+            if reward is not None:
+                yield ("print", f"\nYou earned ${reward}! Total: ${state.stat('money')}")
+                yield ("pause", "Press Enter to continue...")
+            else:
+                yield ("pause", "Press Enter to exit...")
+                yield ("exit",)
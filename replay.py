@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Input recording and replay
+A recording is a text file: a header line with the random seed, a
+fingerprint of game_data.json and a count of the save entries that follow,
+one JSON line each, holding the save slots as they were when recording
+started (see saves.SaveStore.snapshot). Then comes every menu choice and name
+the player typed, one per line, appended as they are entered. "Press Enter"
+pauses are not recorded; a replay skips them. A replay runs against a
+scratch copy of those saves, so Continue loads what it loaded when recorded.
+
+    python3 game.py --record session.txt
+    python3 game.py --replay session.txt --quiet
+"""
+
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from gamedata import GAME_DATA_FILE
+
+STREAM_MAGIC = "#phantomthrill-input"
+STREAM_VERSION = 1
+
+
+def data_fingerprint(path=GAME_DATA_FILE):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+class Recorder:
+    """Reads from the keyboard and appends every answer to a recording."""
+
+    def __init__(self, path, seed, read=input, saves=()):
+        self.seed = seed
+        self.read = read
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.file.write(f"{STREAM_MAGIC} {STREAM_VERSION} seed={seed} data={data_fingerprint()} saves={len(saves)}\n")
+        for entry in saves:
+            self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+    def ask(self, prompt):
+        line = self.read(prompt)
+        # Flushed per line so a crash still leaves a usable repro
+        self.file.write(line + "\n")
+        self.file.flush()
+        return line
+
+    def pause(self, prompt):
+        self.read(prompt)
+
+    def close(self):
+        self.file.close()
+
+
+class Replayer:
+    """Answers from a recording, echoing them as if typed. Raises EOFError
+    when the recording runs out, like input() at the end of stdin."""
+
+    def __init__(self, path):
+        with open(path, encoding='utf-8', newline='') as f:
+            header, _, body = f.read().partition("\n")
+        fields = header.split()
+        if fields[:2] != [STREAM_MAGIC, str(STREAM_VERSION)]:
+            raise ValueError(f"{path} is not a version {STREAM_VERSION} PhantomThrill recording")
+        info = dict(field.split("=", 1) for field in fields[2:])
+        self.seed = int(info["seed"])
+        self.data = info.get("data")
+        lines = body.split("\n")[:-1]
+        count = int(info.get("saves", 0))
+        self.saves = [json.loads(line) for line in lines[:count]]
+        self.lines = lines[count:]
+        self.count = 0
+
+    def ask(self, prompt):
+        if self.count == len(self.lines):
+            raise EOFError("end of recording")
+        line = self.lines[self.count]
+        self.count += 1
+        print(prompt + line)
+        return line
+
+    def pause(self, prompt):
+        print(prompt)
+
+
+def replay(path, quiet=False, seed=None, game=None):
+    """Play a recording through game.title_screen() at full speed.
+
+    Pass the running game module when it is __main__, so the replay drives
+    it rather than a second copy. The replay plays against a scratch
+    directory holding the saves the recording started with, so saves made
+    during it never touch the player's slots. Returns a dict with the
+    number of answers used, the elapsed seconds and the final state (or
+    None if the game never started).
+    """
+    if game is None:
+        import game
+
+    replayer = Replayer(path)
+    if replayer.data and replayer.data != data_fingerprint():
+        print(f"warning: {path} was recorded against a different game_data.json", file=sys.stderr)
+    random.seed(replayer.seed if seed is None else seed)
+
+    game.player_input = replayer
+    game.fast = True
+    autosave, game.autosave = game.autosave, False
+    save_dir, save_slot = game.save_dir, game.save_slot
+    started = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory(prefix="phantomthrill-replay-") as scratch, \
+                open(os.devnull, 'w') as devnull, redirect_stdout(devnull if quiet else sys.stdout):
+            game.save_dir = scratch
+            if replayer.saves:
+                game.save_store().restore(replayer.saves)
+            try:
+                game.title_screen()
+            except (EOFError, SystemExit):
+                pass
+    finally:
+        game.player_input = None
+        game.fast = False
+        game.autosave = autosave
+        game.save_dir, game.save_slot = save_dir, save_slot
+    return {
+        "inputs": replayer.count,
+        "recorded": len(replayer.lines),
+        "seconds": time.perf_counter() - started,
+        "state": game.game_state.to_dict() if game.game_state else None,
+    }
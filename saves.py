@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Save slots
+Each named slot is one small JSON file under saves/ holding only what differs
+from the data file's initial_state, tagged with a schema version and a
+fingerprint of that initial_state. Each initial_state a slot was saved
+against is kept once under saves/bases/, so editing game_data.json never
+changes what an old save holds: it is expanded against its own base, and
+anything the new initial_state adds gets its starting value. An index
+file keeps a summary of every slot so listing never opens the slots
+themselves, and loading a slot reads that slot alone. Autosaver writes slots
+from a background thread, so the game never waits on the disk.
+
+    python3 saves.py                 # list slots
+    python3 saves.py --import-legacy # copy phantomthrill_save.json into a slot
+    python3 saves.py --reindex       # rebuild saves/index.json from the slot files
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: index updates are not locked
+    fcntl = None
+
+from gamedata import write_atomic
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SAVE_DIR = os.path.join(SCRIPT_DIR, "saves")
+LEGACY_SAVE_FILE = os.path.join(SCRIPT_DIR, "phantomthrill_save.json")
+INDEX_NAME = "index.json"
+BASES_DIR = "bases"
+DEFAULT_SLOT = "save"
+AUTOSAVE_SLOT = "autosave"
+
+# Autosaver waits this long for a burst of saves to settle, but no longer than COALESCE_MAX
+COALESCE_DELAY = 0.25
+COALESCE_MAX = 2.0
+
+# Version 1 is the old whole-state phantomthrill_save.json; 2 had no "base"
+SAVE_VERSION = 3
+INDEX_VERSION = 1
+
+SLOT_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+
+# === Delta encoding ===
+
+def diff(base, value):
+    """The parts of value that differ from base. Dicts are compared key by
+    key; anything else that differs is stored whole."""
+    if not isinstance(base, dict) or not isinstance(value, dict):
+        return value
+    changes = {}
+    for key, item in value.items():
+        if key not in base:
+            changes[key] = item
+        elif item != base[key]:
+            changes[key] = diff(base[key], item)
+    return changes
+
+
+def apply_diff(base, changes):
+    """A new dict: base with a diff() result applied."""
+    result = copy.deepcopy(base)
+    for key, item in changes.items():
+        if isinstance(item, dict) and isinstance(result.get(key), dict):
+            result[key] = apply_diff(result[key], item)
+        else:
+            result[key] = copy.deepcopy(item)
+    return result
+
+
+def fingerprint(initial_state):
+    """A short hash of an initial_state, naming the base a save was diffed against."""
+    text = json.dumps(initial_state, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+# === Schema migrations ===
+
+def migrate_v1(record, initial_state):
+    """Whole-state save (phantomthrill_save.json) -> delta save."""
+    return {"version": 2, "saved_at": record.pop("saved_at", None), "state": diff(initial_state, record)}
+
+
+def migrate_v2(record, initial_state):
+    """Delta save without a base -> with one. Version 2 saves were always
+    expanded against the current initial_state, so that is taken as their base."""
+    return {**record, "version": 3, "base": fingerprint(initial_state)}
+
+
+# MIGRATIONS[n] turns a version n record into a version n + 1 record
+MIGRATIONS = {1: migrate_v1, 2: migrate_v2}
+
+
+def migrate(record, initial_state):
+    """Bring a save record up to SAVE_VERSION."""
+    version = record.get("version", 1)
+    if version > SAVE_VERSION:
+        raise ValueError(f"save is version {version}, newer than this game supports ({SAVE_VERSION})")
+    while version < SAVE_VERSION:
+        record = MIGRATIONS[version](record, initial_state)
+        version = record["version"]
+    return record
+
+
+# === Files ===
+
+def slot_path(slot, save_dir=SAVE_DIR):
+    if not SLOT_RE.match(slot) or slot == os.path.splitext(INDEX_NAME)[0]:
+        raise ValueError(f"invalid save slot name: {slot!r}")
+    return os.path.join(save_dir, slot + ".json")
+
+
+def read_legacy(path):
+    """The record in an old single-file save, or None if there is none."""
+    try:
+        with open(path) as f:
+            record = json.load(f)
+    except FileNotFoundError:
+        return None
+    record.setdefault("saved_at", os.path.getmtime(path))
+    return record
+
+
+def summary(state, saved_at):
+    """What the slot list shows, taken from a full state dict."""
+    return {
+        "saved_at": saved_at,
+        "name": state["player"].get("name"),
+        "day": state["day"],
+        "time_of_day": state["time_of_day"],
+        "location": state["current_location"],
+        "money": state["stats"].get("money"),
+    }
+
+
+class SaveIndex:
+    """saves/index.json: slot name -> summary, updated under a lock."""
+
+    def __init__(self, save_dir=SAVE_DIR):
+        self.save_dir = save_dir
+        self.path = os.path.join(save_dir, INDEX_NAME)
+
+    def read(self):
+        """The slots dict, or None if the index is missing or unreadable."""
+        try:
+            with open(self.path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("version") != INDEX_VERSION:
+            return None
+        return index["slots"]
+
+    def update(self, slot, entry):
+        """Set (or with entry=None, remove) one slot's summary."""
+        os.makedirs(self.save_dir, exist_ok=True)
+        with open(os.path.join(self.save_dir, ".index.lock"), 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            slots = self.read()
+            if slots is None:
+                slots = self.scan()
+            if entry is None:
+                slots.pop(slot, None)
+            else:
+                slots[slot] = entry
+            self.write(slots)
+
+    def write(self, slots):
+        write_atomic(self.path, json.dumps({"version": INDEX_VERSION, "slots": slots}, separators=(",", ":")))
+
+    def scan(self):
+        """Summaries read from every slot file (slow path for a lost index)."""
+        slots = {}
+        if not os.path.isdir(self.save_dir):
+            return slots
+        for filename in sorted(os.listdir(self.save_dir)):
+            slot, ext = os.path.splitext(filename)
+            if ext != ".json" or filename == INDEX_NAME or filename.startswith("."):
+                continue
+            try:
+                with open(os.path.join(self.save_dir, filename)) as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if "summary" in record:
+                slots[slot] = record["summary"]
+        return slots
+
+
+# === Public API ===
+
+class SaveStore:
+    """Named save slots for one game data file's initial_state."""
+
+    def __init__(self, initial_state, save_dir=SAVE_DIR, legacy_path=LEGACY_SAVE_FILE):
+        self.initial_state = initial_state
+        self.base = fingerprint(initial_state)
+        self.base_saved = False
+        self.save_dir = save_dir
+        self.legacy_path = legacy_path
+        self.index = SaveIndex(save_dir)
+
+    def base_path(self, base):
+        return os.path.join(self.save_dir, BASES_DIR, base + ".json")
+
+    def save_base(self):
+        """Keep a copy of initial_state for the saves diffed against it (once)."""
+        path = self.base_path(self.base)
+        if not self.base_saved and not os.path.exists(path):
+            write_atomic(path, json.dumps(self.initial_state, separators=(",", ":")))
+        self.base_saved = True
+
+    def save(self, slot, state):
+        """Write a full state dict (GameState.to_dict()) to a slot."""
+        path = slot_path(slot, self.save_dir)
+        self.save_base()
+        saved_at = time.time()
+        entry = summary(state, saved_at)
+        record = {"version": SAVE_VERSION, "saved_at": saved_at, "summary": entry,
+                  "base": self.base, "state": diff(self.initial_state, state)}
+        write_atomic(path, json.dumps(record, separators=(",", ":")))
+        self.index.update(slot, entry)
+
+    def load(self, slot):
+        """The full state dict saved in a slot, or None if there is no such slot."""
+        try:
+            with open(slot_path(slot, self.save_dir)) as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        return self.expand(record)
+
+    def expand(self, record):
+        """The full state dict of a save record of any version.
+
+        Raises ValueError if it was saved against an initial_state that is
+        neither the current one nor kept under bases/.
+        """
+        record = migrate(record, self.initial_state)
+        if record["base"] == self.base:
+            return apply_diff(self.initial_state, record["state"])
+        try:
+            with open(self.base_path(record["base"])) as f:
+                base = json.load(f)
+        except (OSError, ValueError):
+            raise ValueError("save was made with a different initial_state in game_data.json, "
+                             "and that version's base is missing from saves/bases/") from None
+        # Its own base for what it holds, the current initial_state for anything added since
+        return apply_diff(self.initial_state, apply_diff(base, record["state"]))
+
+    def exists(self, slot):
+        return os.path.exists(slot_path(slot, self.save_dir))
+
+    def delete(self, slot):
+        try:
+            os.remove(slot_path(slot, self.save_dir))
+        except FileNotFoundError:
+            pass
+        self.index.update(slot, None)
+
+    def slots(self):
+        """{slot: summary}, newest first, read from the index alone."""
+        slots = self.index.read()
+        if slots is None:
+            slots = self.reindex()
+        return dict(sorted(slots.items(), key=lambda item: -(item[1].get("saved_at") or 0)))
+
+    def reindex(self):
+        slots = self.index.scan()
+        if slots or os.path.isdir(self.save_dir):
+            self.index.write(slots)
+        return slots
+
+    def import_legacy(self, slot=DEFAULT_SLOT, path=None):
+        """Copy an old single-file save (by default legacy_path) into a slot.
+        Returns the state, or None if there is none."""
+        record = read_legacy(path or self.legacy_path)
+        if record is None:
+            return None
+        state = self.expand(record)
+        self.save(slot, state)
+        return state
+
+    def snapshot(self):
+        """Everything Continue could load, as a list of JSON-ready entries for restore().
+
+        That is every slot's record, the bases they were saved against and
+        the old single-file save. A recording carries them (see replay.py).
+        """
+        entries = []
+        bases = set()
+        for slot in self.slots():
+            try:
+                with open(slot_path(slot, self.save_dir)) as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue
+            entries.append({"slot": slot, "record": record})
+            if "base" in record:
+                bases.add(record["base"])
+        for base in sorted(bases):
+            try:
+                with open(self.base_path(base)) as f:
+                    entries.append({"base": base, "state": json.load(f)})
+            except (OSError, ValueError):
+                pass
+        try:
+            legacy = read_legacy(self.legacy_path)
+        except ValueError:
+            legacy = None
+        if legacy is not None:
+            entries.append({"legacy": legacy})
+        return entries
+
+    def restore(self, entries):
+        """Write the entries snapshot() returned into this store's files."""
+        for entry in entries:
+            if "slot" in entry:
+                path = slot_path(entry["slot"], self.save_dir)
+                write_atomic(path, json.dumps(entry["record"], separators=(",", ":")))
+            elif "base" in entry:
+                write_atomic(self.base_path(entry["base"]), json.dumps(entry["state"], separators=(",", ":")))
+            elif "legacy" in entry:
+                write_atomic(self.legacy_path, json.dumps(entry["legacy"]))
+        self.reindex()
+
+
+class Autosaver:
+    """Writes save slots for a SaveStore from a background thread.
+
+    save() just keeps the newest state for a slot and returns. The thread
+    writes once no save has come in for `delay` seconds (or `longest` after
+    the first), so a burst of saves costs one write per slot. States may be
+    GameStates, which are turned into dicts on the thread; pass a clone.
+    """
+
+    def __init__(self, store, delay=COALESCE_DELAY, longest=COALESCE_MAX):
+        self.store = store
+        self.delay = delay
+        self.longest = longest
+        self.pending = {}
+        self.last_request = 0.0
+        self.writing = False
+        self.urgent = False
+        self.closed = False
+        self.error = None
+        self.requests = 0
+        self.writes = 0
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+        self.thread.start()
+
+    def save(self, slot, state):
+        with self.cond:
+            self.pending[slot] = state
+            self.requests += 1
+            self.last_request = time.monotonic()
+            self.cond.notify_all()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                give_up = time.monotonic() + self.longest
+                while not (self.urgent or self.closed):
+                    now = time.monotonic()
+                    wait = min(self.last_request + self.delay, give_up) - now
+                    if wait <= 0:
+                        break
+                    self.cond.wait(wait)
+                batch, self.pending = self.pending, {}
+                self.urgent = False
+                self.writing = True
+            try:
+                for slot, state in batch.items():
+                    try:
+                        self.store.save(slot, state if isinstance(state, dict) else state.to_dict())
+                        self.writes += 1
+                    except Exception as e:
+                        with self.cond:
+                            self.error = e
+            finally:
+                with self.cond:
+                    self.writing = False
+                    self.cond.notify_all()
+
+    def take_error(self):
+        """The last error since the last flush() or take_error(), or None, without waiting."""
+        with self.cond:
+            error, self.error = self.error, None
+        return error
+
+    def flush(self):
+        """Wait until every state handed over so far is written. Returns the last error since, or None."""
+        with self.cond:
+            self.urgent = True
+            self.cond.notify_all()
+            while self.pending or self.writing:
+                self.cond.wait()
+            self.urgent = False
+            error, self.error = self.error, None
+        return error
+
+    def close(self):
+        error = self.flush()
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
+        return error
+
+
+def main():
+    from gamedata import game_data
+
+    parser = argparse.ArgumentParser(description="List and maintain PhantomThrill save slots.")
+    parser.add_argument("--dir", default=SAVE_DIR, help="save directory")
+    parser.add_argument("--import-legacy", nargs="?", const=DEFAULT_SLOT, metavar="SLOT",
+                        help=f"copy {os.path.basename(LEGACY_SAVE_FILE)} into SLOT (default: {DEFAULT_SLOT})")
+    parser.add_argument("--reindex", action="store_true", help="rebuild the index from the slot files")
+    parser.add_argument("--delete", metavar="SLOT", help="delete a slot")
+    args = parser.parse_args()
+
+    store = SaveStore(game_data()["initial_state"], args.dir)
+    if args.import_legacy:
+        if store.import_legacy(args.import_legacy) is None:
+            print(f"No {os.path.basename(LEGACY_SAVE_FILE)} to import.")
+            return
+        print(f"Imported {LEGACY_SAVE_FILE} into slot {args.import_legacy!r}")
+    if args.delete:
+        store.delete(args.delete)
+        print(f"Deleted slot {args.delete!r}")
+    if args.reindex:
+        print(f"Indexed {len(store.reindex())} slots")
+
+    slots = store.slots()
+    if not slots:
+        print("No saves.")
+    for slot, info in slots.items():
+        saved = time.strftime("%Y-%m-%d %H:%M", time.localtime(info["saved_at"])) if info.get("saved_at") else "?"
+        print(f"  {slot:<20} {saved}  {info.get('name')}, Day {info['day']} {info['time_of_day']}, "
+              f"{info['location']}, ${info.get('money')}")
+
+
+if __name__ == "__main__":
+    main()
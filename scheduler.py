@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Event scheduler
+Time is counted in ticks, one per time slot: day 1 Morning is tick 0. Timed
+story triggers (see triggers.py) are kept in a heap keyed on (tick,
+declaration order), so the engine can jump straight from one scheduled event
+to the next instead of stepping through every slot in between.
+
+A trigger is set off at a time with
+    "on": [{"at": {"day": 2, "time": "Night"}, "every": {"days": 1}}]
+"every" may give "days" and/or "slots"; without it the event happens once.
+An event fires when the clock moves onto its slot, so one at the current
+time of a new game or a loaded save waits for its next occurrence.
+"""
+
+import heapq
+
+from state import TIMES
+
+SLOTS_PER_DAY = len(TIMES)
+
+
+def tick_of(day, slot):
+    return (day - 1) * SLOTS_PER_DAY + slot
+
+
+def day_slot(tick):
+    """(day, slot) of a tick."""
+    day, slot = divmod(tick, SLOTS_PER_DAY)
+    return day + 1, slot
+
+
+def event_timing(event):
+    """(first tick, period in ticks or 0) of an "on" entry with "at"."""
+    at = event["at"]
+    first = tick_of(at.get("day", 1), TIMES.index(at.get("time", TIMES[0])))
+    every = event.get("every", {})
+    return first, every.get("days", 0) * SLOTS_PER_DAY + every.get("slots", 0)
+
+
+def next_occurrence(first, every, now):
+    """First tick after `now` at which an event happens, or None."""
+    if first > now:
+        return first
+    if not every:
+        return None
+    return first + ((now - first) // every + 1) * every
+
+
+class Scheduler:
+    """The upcoming occurrence of each timed trigger, soonest first.
+
+    `timed` lists (first tick, period, trigger index) in declaration order.
+    """
+
+    __slots__ = ("heap",)
+
+    def __init__(self, timed=(), now=0):
+        self.heap = []
+        for order, (first, every, index) in enumerate(timed):
+            tick = next_occurrence(first, every, now)
+            if tick is not None:
+                self.heap.append((tick, order, every, index))
+        heapq.heapify(self.heap)
+
+    def copy(self):
+        other = Scheduler()
+        other.heap = self.heap.copy()
+        return other
+
+    def next_tick(self):
+        """Tick of the soonest scheduled event, or None."""
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, tick):
+        """Trigger indexes due at `tick`, in declaration order; recurring ones are rescheduled."""
+        heap = self.heap
+        due = []
+        while heap and heap[0][0] <= tick:
+            when, order, every, index = heapq.heappop(heap)
+            due.append(index)
+            if every:
+                heapq.heappush(heap, (when + every, order, every, index))
+        return due
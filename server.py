@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Multiplayer text server
+Hosts the text version over plain TCP for many players at once. Every
+connection is one coroutine with its own GameEngine; all of them share the
+same loaded game data. A second port answers HTTP GET /metrics with the
+number of sessions and engine step latency percentiles as JSON.
+
+    python3 server.py --port 4000 --metrics-port 4001
+    telnet localhost 4000                # or: nc localhost 4000
+    curl localhost:4001/metrics
+
+Server sessions are not saved; a game lasts as long as its connection.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import deque
+
+from engine import HEIST_ACTION, GameEngine
+from feasibility import analyzer_for
+from gamedata import game_data
+from render import DIVIDER, location_header, render, stats_text
+
+CLEAR = "\033[2J\033[H"
+
+IDLE_TIMEOUT = 600.0
+# Longest input line accepted, in bytes
+MAX_LINE = 1024
+# Output buffered per connection before a session waits for the client to read
+WRITE_HIGH_WATER = 64 * 1024
+# Step latencies kept for the percentiles
+LATENCY_WINDOW = 10000
+
+# Telnet option negotiation (IAC WILL/WONT/DO/DONT <option>) and other IAC commands
+TELNET_COMMAND = re.compile(rb"\xff[\xfb-\xfe].|\xff[\xf0-\xfa]", re.DOTALL)
+
+log = logging.getLogger("phantomthrill.server")
+
+
+class SessionEnd(Exception):
+    """The player quit, reached a final ending, went idle or disconnected."""
+
+
+class Metrics:
+    """Counters shared by every session, reported on the metrics port."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.started = time.monotonic()
+        self.active = 0
+        self.peak = 0
+        self.total = 0
+        self.refused = 0
+        self.timeouts = 0
+        self.steps = 0
+        self.latencies = deque(maxlen=window)
+
+    def opened(self):
+        self.active += 1
+        self.total += 1
+        self.peak = max(self.peak, self.active)
+
+    def closed(self):
+        self.active -= 1
+
+    def record_step(self, seconds):
+        self.steps += 1
+        self.latencies.append(seconds)
+
+    def snapshot(self):
+        ordered = sorted(self.latencies)
+
+        def percentile(p):
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1e6, 1)
+
+        return {
+            "uptime": round(time.monotonic() - self.started, 3),
+            "sessions": {"active": self.active, "peak": self.peak, "total": self.total,
+                         "refused": self.refused, "idle_timeouts": self.timeouts},
+            "steps": self.steps,
+            "step_latency_us": {"p50": percentile(0.5), "p90": percentile(0.9),
+                                "p99": percentile(0.99), "max": round(ordered[-1] * 1e6, 1) if ordered else 0.0,
+                                "window": len(ordered)},
+        }
+
+
+class Session:
+    """One player's game, played over a stream pair."""
+
+    def __init__(self, reader, writer, data, metrics, idle_timeout=IDLE_TIMEOUT):
+        self.reader = reader
+        self.writer = writer
+        self.data = data
+        self.metrics = metrics
+        self.idle_timeout = idle_timeout
+        self.engine = None
+
+    # === I/O ===
+
+    def out(self, text=""):
+        self.writer.write((text.replace("\n", "\r\n") + "\r\n").encode())
+
+    def clear(self):
+        self.writer.write(CLEAR.encode())
+
+    async def ask(self, prompt=""):
+        """Send prompt and wait for a line. Waits for the client to read first."""
+        self.writer.write(prompt.replace("\n", "\r\n").encode())
+        try:
+            await asyncio.wait_for(self.writer.drain(), self.idle_timeout)
+            line = await asyncio.wait_for(self.reader.readline(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            self.writer.write(b"\r\nIdle for too long. Goodbye!\r\n")
+            raise SessionEnd("idle")
+        except (ConnectionError, ValueError):  # ValueError: line over the reader's limit
+            raise SessionEnd("disconnected")
+        if not line:
+            raise SessionEnd("disconnected")
+        return TELNET_COMMAND.sub(b"", line).decode("utf-8", "replace").strip()
+
+    async def pause(self, prompt):
+        await self.ask(prompt)
+
+    def timed(self, func, *args):
+        """Call an engine step and record how long it took."""
+        started = time.perf_counter()
+        events = func(*args)
+        self.metrics.record_step(time.perf_counter() - started)
+        return events
+
+    # === Rendering (see render.py) ===
+
+    def print_stats(self):
+        self.out(stats_text(self.engine.state))
+
+    def print_location_header(self, loc):
+        self.out(location_header(loc))
+
+    async def get_choice(self, options, prompt="Choose an option: "):
+        while True:
+            for i, option in enumerate(options, 1):
+                self.out(f"  {i}. {option}")
+            try:
+                choice = int(await self.ask(f"\n{prompt}"))
+                if 1 <= choice <= len(options):
+                    return choice - 1
+                self.out("Invalid choice. Try again.")
+            except ValueError:
+                self.out("Please enter a number.")
+
+    async def show_events(self, events):
+        for op in render(events, self.data, self.engine.state):
+            kind = op[0]
+            if kind in ("print", "say"):
+                self.out(op[1])
+            elif kind == "pause":
+                await self.pause(op[1])
+            elif kind == "clear":
+                self.clear()
+            elif kind == "exit":
+                raise SessionEnd("ending")
+
+    async def play(self, events):
+        await self.show_events(events)
+        engine = self.engine
+        while engine.pending:
+            prompt = "Choose your approach: " if engine.pending[0] == "heist" else "Choose an option: "
+            choice = await self.get_choice(engine.actions_available(), prompt)
+            await self.show_events(self.timed(engine.choose, choice))
+
+    # === Screens ===
+
+    async def run(self):
+        meta = self.data["meta"]
+        self.clear()
+        self.out(f"{DIVIDER}\n{meta['title'].upper()}\n{meta['subtitle']}\n{DIVIDER}\n")
+        if await self.get_choice(["New Game", "Quit"]) == 1:
+            self.out("\nGoodbye!")
+            return
+
+        self.engine = GameEngine(self.data)
+        name = (await self.ask("\nEnter your name (default: Alex): ")) or "Alex"
+        thief_name = (await self.ask("Enter your thief alias (default: Thrill): ")) or "Thrill"
+        self.clear()
+        await self.play(self.timed(self.engine.begin, name, thief_name))
+        await self.main_menu()
+
+    async def main_menu(self):
+        engine = self.engine
+        locations = self.data["locations"]
+        while True:
+            self.clear()
+            self.print_stats()
+            self.out("\n=== LOCATIONS ===")
+            available = engine.actions_available()
+            for i, loc_id in enumerate(available, 1):
+                loc = locations[loc_id]
+                marker = " (YOU ARE HERE)" if loc_id == engine.state.location else ""
+                self.out(f"  {i}. {loc['icon']} {loc['name']}{marker}")
+            self.out(f"\n  {len(available) + 1}. View Inventory")
+            self.out(f"  {len(available) + 2}. View Intel Notes")
+            self.out(f"  {len(available) + 3}. Quit")
+
+            try:
+                choice = int(await self.ask("\nWhere do you want to go? "))
+            except ValueError:
+                continue
+            if 1 <= choice <= len(available):
+                await self.visit_location(available[choice - 1])
+            elif choice == len(available) + 1:
+                await self.show_list("INVENTORY", engine.state.inventory, "No items yet.")
+            elif choice == len(available) + 2:
+                await self.show_list("INTEL NOTES", engine.state.intel, "No intel yet. Scout locations!")
+            elif choice == len(available) + 3:
+                self.out("Thanks for playing!")
+                return
+
+    async def visit_location(self, location_id):
+        engine = self.engine
+        await self.play(self.timed(engine.step, location_id))
+        while engine.location:
+            loc = self.data["locations"][engine.location]
+            self.clear()
+            self.print_stats()
+            self.print_location_header(loc)
+            self.out(loc["description"])
+            actions = engine.actions_available()
+            if HEIST_ACTION in actions:
+                self.out(f"\n{analyzer_for(self.data).hint(engine.state)}")
+            self.out("\nWhat do you do?")
+            choice = await self.get_choice(actions)
+            await self.play(self.timed(engine.step, actions[choice]))
+
+    async def show_list(self, title, entries, empty):
+        self.out(f"\n=== {title} ===")
+        for entry in entries:
+            self.out(f"  - {entry}")
+        if not entries:
+            self.out(empty)
+        await self.pause("\nPress Enter to continue...")
+
+
+class Server:
+    """Accepts game connections and metrics requests."""
+
+    def __init__(self, data, idle_timeout=IDLE_TIMEOUT, max_sessions=10000):
+        self.data = data
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.metrics = Metrics()
+
+    async def handle_player(self, reader, writer):
+        writer.transport.set_write_buffer_limits(high=WRITE_HIGH_WATER)
+        if self.metrics.active >= self.max_sessions:
+            self.metrics.refused += 1
+            writer.write(b"The server is full. Try again later.\r\n")
+            writer.close()
+            return
+        self.metrics.opened()
+        try:
+            await Session(reader, writer, self.data, self.metrics, self.idle_timeout).run()
+        except SessionEnd:
+            pass
+        except Exception:  # one broken session must not take the others down
+            log.exception("session from %s failed", writer.get_extra_info("peername"))
+            writer.write(b"\r\nSorry, something went wrong on the server. Goodbye!\r\n")
+        finally:
+            self.metrics.closed()
+            writer.close()
+            try:
+                await asyncio.wait_for(writer.wait_closed(), 5)
+            except (asyncio.TimeoutError, ConnectionError):
+                pass
+
+    async def handle_metrics(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 10)
+            path = request.split()[1].decode("ascii", "replace") if len(request.split()) > 1 else ""
+            if path.split("?")[0] in ("/", "/metrics"):
+                status, body = "200 OK", json.dumps(self.metrics.snapshot(), indent=2)
+            else:
+                status, body = "404 Not Found", json.dumps({"error": "not found"})
+            writer.write((f"HTTP/1.0 {status}\r\nContent-Type: application/json\r\n"
+                          f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n{body}").encode())
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port, metrics_port=None):
+        servers = [await asyncio.start_server(self.handle_player, host, port, limit=MAX_LINE, backlog=1024)]
+        if metrics_port is not None:
+            servers.append(await asyncio.start_server(self.handle_metrics, host, metrics_port))
+        for server in servers:
+            for sock in server.sockets:
+                print(f"Listening on {sock.getsockname()[0]}:{sock.getsockname()[1]}")
+        await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+def raise_open_file_limit():
+    """Allow as many sockets as the hard limit permits (one per session)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host PhantomThrill for many players over TCP.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--metrics-port", type=int, default=4001, help="HTTP metrics port, or -1 for none")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT, metavar="SECONDS",
+                        help="disconnect players who send nothing for this long")
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    raise_open_file_limit()
+    server = Server(game_data(), args.idle_timeout, args.max_sessions)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.metrics_port if args.metrics_port >= 0 else None))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
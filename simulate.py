@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo balance simulator for PhantomThrill.
+Plays many headless games with a chosen policy across worker processes and
+streams aggregated histograms (never per-run records) as JSON lines.
+
+    python3 simulate.py --runs 1000000 --policy story --workers 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import gamedata
+from engine import HEIST_ACTION, HEIST_PHASES, GameEngine
+from feasibility import analyzer_for
+
+# Read-only game data. Loaded once in the parent and inherited by forked workers.
+GAME_DATA = None
+
+STORY_LOCATIONS = [("met_cal", "clinic"), ("accepted_heist", "underground"), ("got_jade_whip_info", "museum")]
+
+
+# === Policies ===
+# A policy picks an index into engine.actions_available().
+
+def random_policy(engine, options, rng):
+    """Pick uniformly at random, like a player mashing keys."""
+    return rng.randrange(len(options))
+
+
+def best_margin(engine, options):
+    """Index of the heist option with the largest stat margin over its requirement."""
+    _, phase_idx, scene_idx = engine.pending
+    scene = engine.heist_scene(phase_idx, scene_idx)
+    stat = engine.state.stat
+    margins = [stat(opt["stat"]) - opt["req"] for opt in scene["options"]]
+    return margins.index(max(margins))
+
+
+def greedy_policy(engine, options, rng):
+    """Wander at random, but always take the heist option with the best odds."""
+    if engine.pending and engine.pending[0] == "heist":
+        return best_margin(engine, options)
+    return rng.randrange(len(options))
+
+
+def story_policy(engine, options, rng, heist_chance=0.05):
+    """Follow the main story, train at random, then attempt the heist."""
+    pending = engine.pending
+    if pending:
+        if pending[0] == "heist":
+            return best_margin(engine, options)
+        if pending[0] == "dialogue":
+            # Never walk away from the story
+            _, key, line_idx, _ = pending
+            choices = engine.data["dialogues"][key][line_idx]["choices"]
+            safe = [i for i, c in enumerate(choices) if "ending" not in c.get("effect", {})]
+            return rng.choice(safe or range(len(options)))
+        return 0
+
+    if engine.location is None:
+        for flag, loc_id in STORY_LOCATIONS:
+            if not engine.state.flag(flag) and loc_id in options:
+                return options.index(loc_id)
+        return rng.randrange(len(options))
+
+    if HEIST_ACTION in options and rng.random() < heist_chance:
+        return options.index(HEIST_ACTION)
+    return rng.randrange(len(options))
+
+
+# Policies that take a passing heist option whenever there is one. Their
+# heists are decided as soon as they start, so doomed ones can be skipped.
+BEST_OPTION_POLICIES = {"greedy", "story"}
+
+POLICIES = {
+    "random": random_policy,
+    "greedy": greedy_policy,
+    "story": story_policy,
+}
+
+
+# === Simulation ===
+
+def new_stats():
+    """Empty aggregate histograms."""
+    return {
+        "runs": 0,
+        "steps": 0,
+        "outcomes": Counter(),
+        "days_to_heist": Counter(),
+        "days_to_death": Counter(),
+        "phase_reached": Counter(),
+        "failed_scene": Counter(),
+    }
+
+
+def merge_stats(total, part):
+    total["runs"] += part["runs"]
+    total["steps"] += part["steps"]
+    for key in ("outcomes", "days_to_heist", "days_to_death", "phase_reached", "failed_scene"):
+        total[key].update(part[key])
+
+
+def skip_doomed_heist(analyzer, state, steps, max_steps, agg):
+    """At the first heist scene, record a certain failure without playing it.
+
+    Stats can't change during the heist, so a best-option policy is caught
+    at the first scene nothing passes. Returns the run's step count, or None
+    if the heist can be won or would outlast max_steps.
+    """
+    blocked = analyzer.blocked_scene(state)
+    if blocked is None or steps + blocked > max_steps:
+        return None
+    for phase, index in analyzer.positions[:blocked + 1]:
+        if index == 0:
+            agg["phase_reached"][phase] += 1
+    agg["failed_scene"][analyzer.scene_keys[blocked]] += 1
+    return steps + blocked
+
+
+def simulate_run(policy, rng, max_steps, agg, analyzer=None):
+    """Play one game and fold its outcome into agg.
+
+    With a HeistAnalyzer, doomed heists are scored without being played.
+    """
+    engine = GameEngine(GAME_DATA)
+    engine.begin()
+    state = engine.state
+    steps = 0
+
+    while steps < max_steps:
+        options = engine.actions_available()
+        idx = policy(engine, options, rng)
+        pending = engine.pending
+        steps += 1
+
+        if pending:
+            if analyzer and pending == ("heist", 0, 0):
+                skipped = skip_doomed_heist(analyzer, state, steps, max_steps, agg)
+                if skipped is not None:
+                    steps = skipped
+                    outcome = "caught"
+                    break
+            engine.choose(idx)
+            if pending[0] == "heist":
+                phase = HEIST_PHASES[pending[1]][0]
+                if pending[2] == 0:
+                    agg["phase_reached"][phase] += 1
+                if engine.ending == "caught":
+                    scene = engine.heist_scene(pending[1], pending[2])["scene"]
+                    agg["failed_scene"][f"{phase}/{scene}"] += 1
+        else:
+            engine.step(options[idx])
+
+        if engine.ending:
+            outcome = engine.ending
+            if outcome in ("starvation", "health"):
+                agg["days_to_death"][state.day] += 1
+            break
+        if state.flag("completed_museum_heist"):
+            outcome = "won"
+            agg["days_to_heist"][state.day] += 1
+            break
+    else:
+        outcome = "timeout"
+
+    agg["runs"] += 1
+    agg["steps"] += steps
+    agg["outcomes"][outcome] += 1
+
+
+def simulate_chunk(policy_name, runs, seed, max_steps):
+    """Worker entry point: play `runs` games and return only the aggregates."""
+    policy = POLICIES[policy_name]
+    analyzer = analyzer_for(GAME_DATA) if policy_name in BEST_OPTION_POLICIES else None
+    rng = random.Random(seed)
+    agg = new_stats()
+    for _ in range(runs):
+        simulate_run(policy, rng, max_steps, agg, analyzer)
+    return agg
+
+
+def load_worker_data(path):
+    """Load game data once per process (pool initializer where fork is unavailable)."""
+    global GAME_DATA
+    if GAME_DATA is None:
+        GAME_DATA = gamedata.load(path)
+
+
+def report(agg, policy_name, final=False):
+    """Aggregates as a JSON-friendly dict."""
+    runs = agg["runs"] or 1
+    return {
+        "policy": policy_name,
+        "final": final,
+        "runs": agg["runs"],
+        "steps_per_run": round(agg["steps"] / runs, 2),
+        "win_rate": round(agg["outcomes"]["won"] / runs, 4),
+        "outcomes": dict(agg["outcomes"].most_common()),
+        "phase_reached": {phase: agg["phase_reached"][phase] for phase, _ in HEIST_PHASES},
+        "failed_scene": dict(agg["failed_scene"].most_common()),
+        "days_to_heist": dict(sorted(agg["days_to_heist"].items())),
+        "days_to_death": dict(sorted(agg["days_to_death"].items())),
+    }
+
+
+def run_simulation(policy_name, runs, workers, chunk, seed, max_steps, out=sys.stdout):
+    """Spread runs over a process pool, streaming cumulative histograms to out."""
+    load_worker_data(gamedata.GAME_DATA_FILE)
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+    else:
+        pool = ProcessPoolExecutor(workers, initializer=load_worker_data, initargs=(gamedata.GAME_DATA_FILE,))
+
+    total = new_stats()
+    remaining = runs
+    chunk_id = 0
+    in_flight = set()
+
+    with pool:
+        while remaining or in_flight:
+            # Keep a bounded number of chunks queued so memory stays flat
+            while remaining and len(in_flight) < workers * 2:
+                size = min(chunk, remaining)
+                in_flight.add(pool.submit(simulate_chunk, policy_name, size, seed + chunk_id, max_steps))
+                remaining -= size
+                chunk_id += 1
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                merge_stats(total, future.result())
+            if in_flight or remaining:
+                out.write(json.dumps(report(total, policy_name)) + "\n")
+                out.flush()
+
+    out.write(json.dumps(report(total, policy_name, final=True)) + "\n")
+    out.flush()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate PhantomThrill playthroughs.")
+    parser.add_argument("--runs", type=int, default=10000, help="number of playthroughs")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="story")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=int, default=500, help="runs per worker task")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-steps", type=int, default=2000, help="steps before a run counts as a timeout")
+    args = parser.parse_args()
+
+    run_simulation(args.policy, args.runs, args.workers, args.chunk, args.seed, args.max_steps)
+
+
+if __name__ == "__main__":
+    main()
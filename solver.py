@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Optimal-route solver for PhantomThrill.
+Searches the game's state space (A* over packed states, with a transposition
+table and dominance pruning) for the cheapest way to win the museum heist,
+e.g. "fewest days" or "is a charisma-only build viable?".
+
+    python3 solver.py --cost ticks
+    python3 solver.py --heist-stat charisma
+"""
+
+import argparse
+import heapq
+import json
+
+import gamedata
+from engine import HEIST_PHASES, GameEngine
+from feasibility import heist_scenes, pareto_plans
+from state import TIMES, layout_for
+from triggers import cosmetic_flags
+
+# Story flags that each need a dialogue choice to set
+STORY_FLAGS = ["met_cal", "accepted_heist", "got_jade_whip_info"]
+
+
+def stat_caps(data):
+    """Highest value of each stat that can still make a difference."""
+    caps = {"money": float("inf"), "hunger": 100, "health": 100}
+    for heist in data["heist_sequences"].values():
+        for scenes in heist.values():
+            for scene in scenes:
+                for opt in scene["options"]:
+                    caps[opt["stat"]] = max(caps.get(opt["stat"], 0), opt["req"])
+    return caps
+
+
+class StatePacker:
+    """Packs an engine into a canonical, hashable tuple.
+
+    Only what can change the outcome is kept: stats, day, time slot, the flag
+    bitmask, the open location and any pending choice. Names, intel
+    and inventory never affect the rules, so states differing only in those
+    are treated as the same state. The same goes for first-visit flags whose
+    side scene has no choices. Each stat is capped at the highest value the
+    rules ever check, so e.g. knowledge 80 and 100 pack the same when no
+    heist option needs more than 70.
+    """
+
+    def __init__(self, data):
+        caps = stat_caps(data)
+        layout = layout_for(data["initial_state"])
+        self.caps = [caps.get(name, 0) for name in layout.stat_names]
+        ignored = 0
+        for name in cosmetic_flags(data):
+            ignored |= layout.flag_bit(name)
+        self.flag_mask = ~ignored
+
+    def pack(self, engine):
+        """Return (key, stats) where key holds everything but the stats."""
+        state = engine.state
+        key = (state.day, state.slot, state.flags & self.flag_mask, engine.location, engine.pending)
+        return key, tuple(map(min, state.stats, self.caps))
+
+
+def heist_plans(data, heist_stats=None):
+    """Pareto-minimal stat requirements that clear every museum heist scene."""
+    return pareto_plans([scene for _, _, _, scene in heist_scenes(data["heist_sequences"]["museum"])], heist_stats)
+
+
+def max_stat_gain(data, stat_names):
+    """Largest total gain of the given stats from any single action or choice."""
+    effects = [action.get("effects", {}) for action in data["actions"].values()]
+    effects += [choice.get("effect", {}) for lines in data["dialogues"].values()
+                for line in lines for choice in line.get("choices", [])]
+    gains = [sum(value for key, value in effect.items()
+                 if key in stat_names and isinstance(value, int) and value > 0)
+             for effect in effects]
+    return max(gains + [1])
+
+
+class Heuristic:
+    """Admissible lower bound on the moves still needed to win.
+
+    Moves that never raise stats are counted exactly: arriving at each story
+    location still ahead, leaving the current location, the final trip to the
+    underground, starting the heist and each heist scene. On top of that,
+    every story flag left needs its own dialogue choice, and the stat deficit
+    to the cheapest heist plan needs at least deficit / (best single-move
+    gain) moves; story choices can raise stats, so only the larger of those
+    two counts is added.
+    """
+
+    def __init__(self, data, heist_stats=None):
+        self.plans = heist_plans(data, heist_stats)
+        self.gain = max_stat_gain(data, {stat for plan in self.plans for stat in plan})
+        self.scenes = [len(data["heist_sequences"]["museum"][phase]) for phase, _ in HEIST_PHASES]
+
+    def __call__(self, engine):
+        pending = engine.pending
+        if pending and pending[0] == "heist":
+            return sum(self.scenes[pending[1]:]) - pending[2]
+
+        state = engine.state
+        story = sum(1 for flag in STORY_FLAGS if not state.flag(flag))
+        deficit = min(sum(max(0, req - state.stat(stat)) for stat, req in plan.items()) for plan in self.plans)
+
+        if pending:
+            # Already at a story location (or confirming the heist)
+            travel = max(0, story - 1) + (0 if pending[0] == "confirm_heist" else 1)
+        elif engine.location is None:
+            travel = story + 1
+        elif story or engine.location != "underground":
+            travel = story + 2
+        else:
+            travel = 0
+
+        return travel + max(story, -(-deficit // self.gain)) + 1 + sum(self.scenes)
+
+
+def edge_cost(cost, before, after):
+    """Cost of one move as (primary, secondary): time slots and moves."""
+    ticks = (after.day - before.day) * len(TIMES) + after.slot - before.slot
+    if cost == "ticks":
+        return (ticks, 1)
+    return (1, ticks)
+
+
+def moves(engine, heist_stats, forbid):
+    """Yield (label, child engine) for every legal, non-fatal move from engine."""
+    options = engine.actions_available()
+    pending = engine.pending
+
+    for idx, option in enumerate(options):
+        if pending:
+            if pending[0] == "heist" and heist_stats:
+                scene = engine.heist_scene(pending[1], pending[2])
+                if scene["options"][idx]["stat"] not in heist_stats:
+                    continue
+            child = engine.clone()
+            child.choose(idx)
+            label = f"choose: {option}"
+        else:
+            if option in forbid:
+                continue
+            child = engine.clone()
+            child.step(option)
+            label = f"go to {option}" if engine.location is None else option
+        if not child.ending:
+            yield label, child
+
+
+def dominated(cost, stats, frontier):
+    """True if an expanded state got here no later with stats at least as good."""
+    for other_cost, other_stats in frontier:
+        if other_cost <= cost and all(a >= b for a, b in zip(other_stats, stats)):
+            return True
+    return False
+
+
+def solve(data, cost="ticks", heist_stats=None, forbid=(), max_expansions=1000000):
+    """Find the cheapest winning route.
+
+    Costs are tuples compared in order: with cost="ticks" the fewest time
+    slots (and so days) wins, ties broken by fewest moves; cost="steps"
+    minimizes moves first. Every stat only ever helps the player, so a state
+    reached no cheaper than an expanded state with the same key and stats at
+    least as good is pruned.
+
+    Returns a dict with the route, or None if the heist cannot be won.
+    """
+    packer = StatePacker(data)
+    heuristic = Heuristic(data, heist_stats)
+    if not heuristic.plans:
+        # Some heist scene has no allowed option at all
+        return None
+    start = GameEngine(data)
+    start.begin()
+
+    def priority(total, engine):
+        h = heuristic(engine)
+        return (total[0], total[1] + h) if cost == "ticks" else (total[0] + h, total[1])
+
+    start_packed = packer.pack(start)
+    best = {start_packed: (0, 0)}
+    parents = {start_packed: None}
+    frontiers = {}
+    heap = [(priority((0, 0), start), 0, (0, 0), start_packed, start)]
+    counter = 1
+    expanded = 0
+
+    while heap:
+        _, _, total, packed, engine = heapq.heappop(heap)
+        if best.get(packed) != total:
+            continue
+
+        if engine.state.flag("completed_museum_heist"):
+            route = []
+            while parents[packed]:
+                packed, label = parents[packed]
+                route.append(label)
+            route.reverse()
+            ticks, steps = total if cost == "ticks" else reversed(total)
+            return {
+                "ticks": ticks,
+                "steps": steps,
+                "day": engine.state.day,
+                "time_of_day": engine.state.time_of_day,
+                "stats": engine.state.to_dict()["stats"],
+                "route": route,
+                "expanded": expanded,
+            }
+
+        key, stats = packed
+        frontier = frontiers.setdefault(key, [])
+        if dominated(total, stats, frontier):
+            continue
+        frontier.append((total, stats))
+
+        expanded += 1
+        if expanded > max_expansions:
+            break
+
+        for label, child in moves(engine, heist_stats, forbid):
+            step_cost = edge_cost(cost, engine.state, child.state)
+            child_total = (total[0] + step_cost[0], total[1] + step_cost[1])
+            child_packed = packer.pack(child)
+            if child_packed in best and best[child_packed] <= child_total:
+                continue
+            best[child_packed] = child_total
+            parents[child_packed] = (packed, label)
+            heapq.heappush(heap, (priority(child_total, child), counter, child_total, child_packed, child))
+            counter += 1
+
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the optimal route to win the museum heist.")
+    parser.add_argument("--cost", choices=["ticks", "steps"], default="ticks",
+                        help="minimize time slots (then moves), or moves (then time slots)")
+    parser.add_argument("--heist-stat", action="append", dest="heist_stats",
+                        help="only allow heist options using this stat (repeatable)")
+    parser.add_argument("--forbid", action="append", default=[],
+                        help="never take this action or visit this location (repeatable)")
+    parser.add_argument("--max-expansions", type=int, default=1000000)
+    args = parser.parse_args()
+
+    result = solve(gamedata.load(), args.cost, args.heist_stats, set(args.forbid), args.max_expansions)
+    if result is None:
+        print("No winning route found.")
+        return
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Compact game state
+A fixed-layout, hashable replacement for the nested initial_state dict, with
+lossless conversion to and from the JSON save shape.
+"""
+
+import enum
+import sys
+import weakref
+from array import array
+
+TIMES = ["Morning", "Afternoon", "Evening", "Night"]
+
+# 32-bit signed stats: 'h' would overflow once money passes $32,767
+STAT_TYPECODE = "i"
+
+# Top-level keys GameState stores in its own slots; anything else is kept in `extra`
+STATE_KEYS = ("player", "stats", "day", "time_of_day", "current_location", "chapter",
+              "story_progress", "inventory", "notes", "flags", "heist")
+HEIST_KEYS = ("phase", "intel", "suspicion")
+
+
+class StateLayout:
+    """Field layout shared by every GameState built from the same initial_state.
+
+    Stats get fixed array indexes (also exposed as the `Stat` enum) and flags
+    get fixed bits, both in the order the data file lists them. It is shared,
+    so it only grows from the data file itself: flags a save or a caller names
+    that it doesn't list are kept in that one state's `extra`.
+    """
+
+    def __init__(self, initial_state):
+        self.initial_state = initial_state
+        self.keys = list(initial_state)
+        self.stat_names = list(initial_state["stats"])
+        self.stat_index = {name: i for i, name in enumerate(self.stat_names)}
+        self.Stat = enum.IntEnum("Stat", [(name.upper(), i) for i, name in enumerate(self.stat_names)])
+        self.flag_names = []
+        self.flag_bits = {}
+        for name in initial_state["flags"]:
+            self.flag_bit(name)
+        self.template = GameState.from_dict(self, initial_state)
+
+    def flag_bit(self, name):
+        """Bit for a flag the data file uses, allocating the next free bit for one initial_state lacks."""
+        bit = self.flag_bits.get(name)
+        if bit is None:
+            bit = 1 << len(self.flag_names)
+            self.flag_names.append(name)
+            self.flag_bits[name] = bit
+        return bit
+
+
+# id(initial_state) -> its layout, for as long as any state or compiled table uses it.
+# A layout holds its initial_state, so the id can't be reused while it is listed.
+_layouts = weakref.WeakValueDictionary()
+# kind -> (plain dict, what was compiled from it), see cached_for()
+_plain_cache = {}
+
+
+def layout_for(initial_state):
+    """The (cached) layout for a game data file's initial_state."""
+    cached = _layouts.get(id(initial_state))
+    if cached is None or cached.initial_state is not initial_state:
+        cached = _layouts[id(initial_state)] = StateLayout(initial_state)
+    return cached
+
+
+def cached_for(data, kind, build):
+    """build(data), made once per game data object.
+
+    gamedata.GameData keeps the result in its own `compiled` dict, so it goes
+    away with the data and a hot reload doesn't keep old data sets alive. A
+    plain dict has nowhere to keep it, so only the latest one is cached.
+    """
+    compiled = getattr(data, "compiled", None)
+    if compiled is None:
+        cached = _plain_cache.get(kind)
+        if cached is None or cached[0] is not data:
+            cached = _plain_cache[kind] = (data, build(data))
+        return cached[1]
+    value = compiled.get(kind)
+    if value is None:
+        value = compiled[kind] = build(data)
+    return value
+
+
+class GameState:
+    """One player's state.
+
+    Stats live in a fixed-layout array, flags in an integer bitmask, and the
+    player, inventory, notes and intel in tuples of interned strings, so
+    clone() is a handful of slot copies and states can be hashed and compared.
+    """
+
+    __slots__ = ("layout", "stats", "flags", "day", "slot", "location", "chapter", "story_progress",
+                 "player", "inventory", "notes", "intel", "heist_phase", "suspicion", "extra")
+
+    @classmethod
+    def initial(cls, layout):
+        """A fresh state equal to the data file's initial_state."""
+        return layout.template.clone()
+
+    @classmethod
+    def from_dict(cls, layout, d):
+        """Build a state from the JSON save shape."""
+        state = cls.__new__(cls)
+        state.layout = layout
+        state.stats = array(STAT_TYPECODE, [0] * len(layout.stat_names))
+        for name, value in d["stats"].items():
+            state.stats[layout.stat_index[name]] = value
+        state.flags = 0
+        unknown = {}
+        for name, value in d["flags"].items():
+            bit = layout.flag_bits.get(name)
+            if bit is None:
+                unknown["flags." + name] = value
+            elif value:
+                state.flags |= bit
+        state.day = d["day"]
+        state.slot = TIMES.index(d["time_of_day"])
+        state.location = sys.intern(d["current_location"])
+        state.chapter = d["chapter"]
+        state.story_progress = d["story_progress"]
+        state.player = tuple((sys.intern(k), v) for k, v in d["player"].items())
+        state.inventory = tuple(sys.intern(item) for item in d["inventory"])
+        state.notes = tuple(sys.intern(note) for note in d["notes"])
+        heist = d["heist"]
+        state.heist_phase = heist["phase"]
+        state.intel = tuple(sys.intern(note) for note in heist["intel"])
+        state.suspicion = heist["suspicion"]
+        extra = {key: value for key, value in d.items() if key not in STATE_KEYS}
+        extra.update(("heist." + key, value) for key, value in heist.items() if key not in HEIST_KEYS)
+        extra.update(unknown)
+        state.extra = extra or None
+        return state
+
+    def to_dict(self):
+        """Convert back to the JSON save shape, keys in the data file's order."""
+        layout = self.layout
+        heist = {"phase": self.heist_phase, "intel": list(self.intel), "suspicion": self.suspicion}
+        d = {
+            "player": dict(self.player),
+            "stats": dict(zip(layout.stat_names, self.stats)),
+            "day": self.day,
+            "time_of_day": TIMES[self.slot],
+            "current_location": self.location,
+            "chapter": self.chapter,
+            "story_progress": self.story_progress,
+            "inventory": list(self.inventory),
+            "notes": list(self.notes),
+            "flags": {name: bool(self.flags & layout.flag_bits[name]) for name in layout.flag_names},
+            "heist": heist,
+        }
+        if self.extra:
+            for key, value in self.extra.items():
+                if key.startswith("heist."):
+                    heist[key[len("heist."):]] = value
+                elif key.startswith("flags."):
+                    d["flags"][key[len("flags."):]] = value
+                else:
+                    d[key] = value
+        order = {key: i for i, key in enumerate(layout.keys)}
+        return dict(sorted(d.items(), key=lambda item: order.get(item[0], len(order))))
+
+    def clone(self):
+        other = GameState.__new__(GameState)
+        other.layout = self.layout
+        other.stats = array(STAT_TYPECODE, self.stats)
+        other.flags = self.flags
+        other.day = self.day
+        other.slot = self.slot
+        other.location = self.location
+        other.chapter = self.chapter
+        other.story_progress = self.story_progress
+        other.player = self.player
+        other.inventory = self.inventory
+        other.notes = self.notes
+        other.intel = self.intel
+        other.heist_phase = self.heist_phase
+        other.suspicion = self.suspicion
+        other.extra = self.extra
+        return other
+
+    def key(self):
+        """Everything that identifies this state, as a hashable tuple."""
+        return (self.stats.tobytes(), self.flags, self.day, self.slot, self.location, self.chapter,
+                self.story_progress, self.player, self.inventory, self.notes, self.intel,
+                self.heist_phase, self.suspicion)
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __eq__(self, other):
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return self.key() == other.key() and self.extra == other.extra
+
+    def __repr__(self):
+        return f"GameState({self.to_dict()!r})"
+
+    # === Accessors ===
+
+    @property
+    def time_of_day(self):
+        return TIMES[self.slot]
+
+    def stat(self, name):
+        return self.stats[self.layout.stat_index[name]]
+
+    def set_stat(self, name, value):
+        self.stats[self.layout.stat_index[name]] = value
+
+    def has_stat(self, name):
+        return name in self.layout.stat_index
+
+    def flag(self, name):
+        bit = self.layout.flag_bits.get(name)
+        if bit is None:
+            return bool(self.extra and self.extra.get("flags." + name))
+        return bool(self.flags & bit)
+
+    def set_flag(self, name, value=True):
+        bit = self.layout.flag_bits.get(name)
+        if bit is None:
+            self.extra = {**(self.extra or {}), "flags." + name: value}
+        elif value:
+            self.flags |= bit
+        else:
+            self.flags &= ~bit
+
+    def player_field(self, key):
+        for k, v in self.player:
+            if k == key:
+                return v
+        return None
+
+    def set_player_field(self, key, value):
+        key = sys.intern(key)
+        fields = dict(self.player)
+        fields[key] = value
+        self.player = tuple(fields.items())
+
+    def add_item(self, item):
+        self.inventory += (sys.intern(item),)
+
+    def add_intel(self, note):
+        self.intel += (sys.intern(note),)
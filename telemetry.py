@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Session telemetry
+With --telemetry (or PHANTOMTHRILL_TELEMETRY=path), game.py appends one
+compact JSON line per event to a log:
+
+    {"t":1760000000.123,"s":"9f2c01ab","e":"flag","v":"met_cal","day":1,"slot":2}
+
+t is the wall clock, s the session, e the kind and v its subject:
+    start      "new" or "continue"
+    visit      location id
+    action     "location/action"
+    flag       story flag that became set
+    heist      "phase/scene", with "ok": whether the option passed
+    ending     ending key
+    end        how the session ended ("quit", "game_over"), with "steps"
+
+Lines are queued in memory and written by a background thread in batches, so
+the game never waits on the disk. The log rotates to path.1, path.2, ... when
+it grows past a size. If the writer falls behind, new lines are dropped and
+counted rather than held.
+
+The aggregator reads any number of logs (rotated or gzipped) in one pass:
+
+    python3 telemetry.py telemetry/events.log*
+
+and prints the story funnel (sessions reaching each stage and stopping
+there), failures per heist scene, endings, and how many sessions were still
+playing on each in-game day. Only sessions still open are kept in memory, at
+most MAX_OPEN_SESSIONS; past that the oldest is counted as it stands.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from engine import HEIST_PHASES
+
+ENV_VAR = "PHANTOMTHRILL_TELEMETRY"
+DEFAULT_LOG = os.path.join("telemetry", "events.log")
+MAX_LOG_BYTES = 8 * 1024 * 1024
+BACKUP_COUNT = 5
+FLUSH_INTERVAL = 1.0  # seconds
+BATCH_LINES = 256  # wake the writer early once this many are queued
+MAX_PENDING = 100000
+
+# Story stages in play order: (stage, event kind, subject or None for any)
+FUNNEL = (
+    ("start", "start", None),
+    ("clinic_meet_cal", "flag", "met_cal"),
+    ("underground_first", "visit", "underground"),
+    ("accept_heist", "flag", "accepted_heist"),
+    ("museum_scout", "flag", "got_jade_whip_info"),
+    ("inspector_meet", "flag", "met_inspector"),
+    ("heist", "heist", None),
+    ("heist_won", "ending", "chapter1_complete"),
+)
+MAX_OPEN_SESSIONS = 100000
+
+
+class TelemetryWriter:
+    """Appends lines to a rotating log from a background thread."""
+
+    def __init__(self, path=DEFAULT_LOG, max_bytes=MAX_LOG_BYTES, backups=BACKUP_COUNT,
+                 flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.lines = []
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.closed = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8")
+        self.thread = threading.Thread(target=self.run, name="telemetry", daemon=True)
+        self.thread.start()
+
+    def write(self, record):
+        line = json.dumps(record, separators=(",", ":"))
+        with self.lock:
+            if len(self.lines) >= MAX_PENDING:
+                self.dropped += 1
+                return
+            self.lines.append(line)
+            queued = len(self.lines)
+        if queued >= BATCH_LINES:
+            self.wake.set()
+
+    def run(self):
+        while not self.closed:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            lines, self.lines = self.lines, []
+        if not lines:
+            return
+        text = "\n".join(lines) + "\n"
+        if self.file.tell() and self.file.tell() + len(text) > self.max_bytes:
+            self.rotate()
+        self.file.write(text)
+        self.file.flush()
+
+    def rotate(self):
+        """path -> path.1 -> path.2 ..., dropping the oldest."""
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        self.file = open(self.path, "a" if self.backups else "w", encoding="utf-8")
+
+    def close(self):
+        """Write everything still queued and stop the thread."""
+        if self.closed:
+            return
+        self.closed = True
+        self.wake.set()
+        self.thread.join()
+        self.flush()
+        self.file.close()
+
+
+class SessionLog:
+    """Telemetry for one play session: call observe() with every batch of engine events."""
+
+    def __init__(self, writer, state):
+        self.writer = writer
+        self.session = os.urandom(4).hex()
+        self.layout = state.layout
+        self.flags = state.flags
+        self.steps = 0
+        self.phase = None
+        self.scene = None
+
+    def record(self, kind, value, state, **fields):
+        self.writer.write({"t": round(time.time(), 3), "s": self.session, "e": kind, "v": value,
+                           "day": state.day, "slot": state.slot, **fields})
+
+    def start(self, mode, state):
+        self.flags = state.flags
+        self.record("start", mode, state)
+
+    def visit(self, location_id, state):
+        self.steps += 1
+        self.record("visit", location_id, state)
+
+    def action(self, location_id, action, state):
+        self.steps += 1
+        self.record("action", f"{location_id}/{action}", state)
+
+    def observe(self, events, state):
+        """Record flags that became set and heist and ending events."""
+        for event in events:
+            kind = event[0]
+            if kind == "heist_phase":
+                self.phase = HEIST_PHASES[event[1] - 1][0]
+            elif kind == "heist_scene":
+                self.scene = event[1]["scene"]
+            elif kind == "heist_result":
+                self.record("heist", f"{self.phase}/{self.scene}", state, ok=event[3])
+            elif kind == "ending":
+                self.record("ending", event[1], state)
+        new = state.flags & ~self.flags
+        self.flags = state.flags
+        if new:
+            for bit, name in enumerate(self.layout.flag_names):
+                if new & (1 << bit):
+                    self.record("flag", name, state)
+
+    def end(self, reason, state):
+        self.record("end", reason, state, steps=self.steps)
+
+
+def log_order(paths):
+    """Sort logs oldest first: events.log.2 before events.log.1 before events.log."""
+    def key(path):
+        match = re.search(r"\.(\d+)(\.gz)?$", path)
+        base = path[:match.start()] if match else re.sub(r"\.gz$", "", path)
+        return base, -int(match.group(1)) if match else 0
+    return sorted(paths, key=key)
+
+
+def open_log(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+class Aggregator:
+    """Funnel, heist, ending and retention counts from a stream of telemetry lines."""
+
+    def __init__(self, max_open=MAX_OPEN_SESSIONS):
+        self.max_open = max_open
+        self.decode = json.JSONDecoder().decode
+        self.stage_of = {(kind, value): i for i, (_, kind, value) in enumerate(FUNNEL)}
+        self.open = OrderedDict()  # session -> [stages reached bitmask, last day]
+        self.reached = [0] * len(FUNNEL)
+        self.stopped = [0] * len(FUNNEL)
+        self.last_day = Counter()
+        self.heist = {}  # scene -> [attempts, failures]
+        self.endings = Counter()
+        self.sessions = 0
+        self.lines = 0
+        self.bad_lines = 0
+
+    def add_file(self, path):
+        with open_log(path) as f:
+            for line in f:
+                self.add_line(line)
+
+    def add_line(self, line):
+        self.lines += 1
+        try:
+            record = self.decode(line)
+            kind, value, session = record["e"], record["v"], record["s"]
+        except (ValueError, KeyError, TypeError):
+            self.bad_lines += 1
+            return
+
+        entry = self.open.get(session)
+        if entry is None:
+            entry = self.open[session] = [0, 0]
+            if len(self.open) > self.max_open:
+                self.close_session(*self.open.popitem(last=False))
+        else:
+            self.open.move_to_end(session)
+        stage = self.stage_of.get((kind, value), self.stage_of.get((kind, None)))
+        if stage is not None:
+            entry[0] |= 1 << stage
+        entry[1] = max(entry[1], record.get("day", 0))
+
+        if kind == "heist":
+            counts = self.heist.setdefault(value, [0, 0])
+            counts[0] += 1
+            counts[1] += not record.get("ok")
+        elif kind == "ending":
+            self.endings[value] += 1
+        elif kind == "end":
+            self.close_session(session, self.open.pop(session))
+
+    def close_session(self, session, entry):
+        stages, day = entry
+        self.sessions += 1
+        self.last_day[day] += 1
+        furthest = None
+        for i in range(len(FUNNEL)):
+            if stages & (1 << i):
+                self.reached[i] += 1
+                furthest = i
+        if furthest is not None:
+            self.stopped[furthest] += 1
+
+    def finish(self):
+        """Count the sessions whose end is not in the logs."""
+        while self.open:
+            self.close_session(*self.open.popitem(last=False))
+
+    def report(self):
+        lines = [f"{self.sessions} sessions, {self.lines} lines ({self.bad_lines} unreadable)", "",
+                 f"{'stage':<20}{'reached':>9}{'stopped':>9}"]
+        for (stage, _, _), reached, stopped in zip(FUNNEL, self.reached, self.stopped):
+            lines.append(f"{stage:<20}{reached:>9}{stopped:>9}")
+
+        if self.heist:
+            lines += ["", f"{'heist scene':<28}{'tries':>7}{'failed':>8}"]
+            for scene, (tries, failed) in self.heist.items():
+                lines.append(f"{scene:<28}{tries:>7}{failed:>8}")
+
+        if self.endings:
+            lines += ["", "endings: " + ", ".join(f"{key} {count}" for key, count in self.endings.most_common())]
+
+        if self.last_day:
+            lines += ["", f"{'day':<6}{'still playing':>14}"]
+            remaining = self.sessions
+            for day in range(1, max(self.last_day) + 1):
+                remaining -= self.last_day[day - 1]
+                lines.append(f"{day:<6}{remaining:>14}")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize PhantomThrill telemetry logs.")
+    parser.add_argument("logs", nargs="+", help="log files, rotated ones included (.gz is fine)")
+    parser.add_argument("--max-open", type=int, default=MAX_OPEN_SESSIONS,
+                        help="sessions kept open at once before the oldest is counted")
+    args = parser.parse_args()
+
+    aggregator = Aggregator(args.max_open)
+    started = time.perf_counter()
+    for path in log_order(args.logs):
+        aggregator.add_file(path)
+    aggregator.finish()
+    print(aggregator.report())
+    print(f"\n({time.perf_counter() - started:.2f}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Text templates
+Every text in game_data.json is parsed once into literal segments and field
+lookups, so rendering a line is a join instead of a rescan.
+
+Placeholders name a state path:
+    {player_name}            the player's name
+    {thief_name}, {gender}   any other player field
+    {stats.money}            any stat
+    {flags.met_cal}          any flag
+    {day}, {time_of_day}, {current_location}, {chapter}, {story_progress}
+    {heist.phase}, {heist.suspicion}
+Anything else in braces is left as written.
+"""
+
+import re
+from functools import lru_cache
+
+from state import cached_for, layout_for
+
+PLACEHOLDER_RE = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)?)\}")
+
+# Top-level placeholders and the GameState attributes they read
+STATE_FIELDS = {
+    "day": "day",
+    "time_of_day": "time_of_day",
+    "current_location": "location",
+    "chapter": "chapter",
+    "story_progress": "story_progress",
+}
+HEIST_FIELDS = {"phase": "heist_phase", "suspicion": "suspicion"}
+
+RENDER_CACHE_SIZE = 4096
+
+
+def field_getter(path, layout):
+    """A function reading `path` from a GameState, or None if path is unknown."""
+    if path == "player_name":
+        path = "player.name"
+    head, _, name = path.partition(".")
+
+    if not name:
+        if head in STATE_FIELDS:
+            attr = STATE_FIELDS[head]
+            return lambda state: getattr(state, attr)
+        if head in layout.initial_state["player"]:
+            return lambda state: state.player_field(head)
+        return None
+    if head == "player":
+        return lambda state: state.player_field(name)
+    if head == "stats" and name in layout.stat_index:
+        index = layout.stat_index[name]
+        return lambda state: state.stats[index]
+    if head == "flags":
+        return lambda state: state.flag(name)
+    if head == "heist" and name in HEIST_FIELDS:
+        attr = HEIST_FIELDS[name]
+        return lambda state: getattr(state, attr)
+    return None
+
+
+class Template:
+    """A text split into literal segments around its placeholders."""
+
+    __slots__ = ("text", "literals", "getters")
+
+    def __init__(self, text, layout):
+        self.text = text
+        literals = []
+        getters = []
+        pos = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            getter = field_getter(match.group(1), layout)
+            if getter is None:
+                continue
+            literals.append(text[pos:match.start()])
+            getters.append(getter)
+            pos = match.end()
+        literals.append(text[pos:])
+        self.literals = tuple(literals)
+        self.getters = tuple(getters)
+
+    def render(self, state):
+        getters = self.getters
+        if not getters:
+            return self.text
+        if len(getters) == 1:
+            return join_segments(self, (getters[0](state),))
+        return join_segments(self, tuple([get(state) for get in getters]))
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def join_segments(template, values):
+    """Rendered text for a template and its raw placeholder values.
+
+    Values are only converted to text on a cache miss. A placeholder always
+    reads the same kind of field, so e.g. 1 and True never share a slot.
+    """
+    literals = template.literals
+    parts = [literals[0]]
+    for value, literal in zip(values, literals[1:]):
+        parts.append(str(value))
+        parts.append(literal)
+    return "".join(parts)
+
+
+class TemplateSet:
+    """Compiled templates for one game data file, keyed by source text."""
+
+    def __init__(self, data):
+        # Texts are compiled as they are first rendered, so dialogues that
+        # are never played are never read (see packs.py)
+        self.layout = layout_for(data["initial_state"])
+        self.templates = {}
+
+    def compile(self, text):
+        template = self.templates.get(text)
+        if template is None:
+            template = self.templates[text] = Template(text, self.layout)
+        return template
+
+    def render(self, text, state):
+        """Render text (compiling it on first sight) against a GameState."""
+        template = self.templates.get(text)
+        if template is None:
+            template = self.compile(text)
+        return template.render(state)
+
+
+def templates_for(data):
+    """The (cached) TemplateSet for a game data dict."""
+    return cached_for(data, "templates", TemplateSet)
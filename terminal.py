@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Terminal output
+Redraws the terminal by difference instead of clearing it. A Screen stands
+in for sys.stdout and remembers the rows of the last frame; after clear() it
+moves the cursor home and only rewrites rows whose text changed, so moving
+through menus sends a few bytes instead of a whole screen (and never starts
+a `clear` subprocess).
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import unicodedata
+
+HOME = "\x1b[H"
+CLEAR_ALL = "\x1b[H\x1b[2J"
+CLEAR_LINE_END = "\x1b[K"
+CLEAR_BELOW = "\x1b[J"
+
+
+def display_width(text):
+    """Terminal columns text takes up: wide characters count twice, combining marks not at all."""
+    width = 0
+    for char in text:
+        if unicodedata.combining(char) or char in "\u200d\ufe0f":
+            continue
+        width += 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+    return width
+
+
+class Screen:
+    """A write-through stdout that diffs each frame against the previous one.
+
+    A frame is everything written between two clear() calls, one row per
+    line. Rows are compared as text; a row the player typed into is never
+    trusted. If a row wraps, or the frame reaches the bottom of the terminal
+    and may scroll, the row positions can no longer be relied on, so the
+    rest of the frame is written in full and the next clear() clears the
+    whole screen.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.previous = []
+        self.current = []
+        self.row = ""
+        self.sent = 0
+        self.broken = True
+        self.size = None
+        # Rows from here down are known to be blank on the terminal
+        self.blank_from = 0
+
+    # === File interface ===
+
+    def write(self, text):
+        lines = text.split("\n")
+        for line in lines[:-1]:
+            self.row += line
+            self.end_row()
+        self.row += lines[-1]
+        return len(text)
+
+    def flush(self):
+        """Show the row written so far (a prompt, or typewriter text)."""
+        pending = self.row[self.sent:]
+        if pending:
+            if not self.sent and len(self.current) < self.blank_from:
+                pending += CLEAR_LINE_END
+            self.stream.write(pending)
+            self.sent = len(self.row)
+        self.stream.flush()
+
+    def isatty(self):
+        return True
+
+    def fileno(self):
+        return self.stream.fileno()
+
+    @property
+    def encoding(self):
+        return self.stream.encoding
+
+    # === Frames ===
+
+    def end_row(self):
+        index = len(self.current)
+        text = self.row
+        if self.sent:
+            out = text[self.sent:] + "\n"
+        elif index >= self.blank_from:
+            out = text + "\n"
+        elif not self.broken and index < len(self.previous) and self.previous[index] == text:
+            out = "\n"
+        else:
+            out = text + CLEAR_LINE_END + "\n"
+        self.stream.write(out)
+        self.blank_from = max(self.blank_from, index + 1)
+        self.current.append(text)
+        self.row = ""
+        self.sent = 0
+
+        columns, lines = self.size or (80, 24)
+        if display_width(text) >= columns or len(self.current) >= lines - 1:
+            self.broken = True
+
+    def clear(self):
+        """Start a new frame."""
+        self.flush()
+        size = tuple(shutil.get_terminal_size())
+        if size != self.size:
+            self.size = size
+            self.broken = True
+        if self.broken:
+            self.stream.write(CLEAR_ALL)
+            self.previous = []
+            self.blank_from = 0
+        else:
+            self.stream.write(HOME)
+            self.previous = self.current
+        self.current = []
+        self.row = ""
+        self.sent = 0
+        self.broken = False
+        self.stream.flush()
+
+    def input(self, prompt=""):
+        """input(), keeping track of the row the player types on."""
+        self.write(prompt)
+        self.flush()
+        # Whatever the last frame left below the prompt is stale now
+        self.stream.write(CLEAR_BELOW)
+        self.stream.flush()
+        self.previous = self.previous[:len(self.current)]
+        self.blank_from = len(self.current) + 1
+        try:
+            return input()
+        finally:
+            # The player's typing and Enter fill this row; never trust it
+            self.current.append(None)
+            self.row = ""
+            self.sent = 0
+            if len(self.current) >= (self.size or (80, 24))[1] - 1:
+                self.broken = True
+
+    def close(self):
+        self.flush()
+        self.stream.write(CLEAR_BELOW)
+        self.stream.flush()
+
+
+def install():
+    """Put a Screen in front of sys.stdout if it is a terminal that understands ANSI codes."""
+    if isinstance(sys.stdout, Screen):
+        return sys.stdout
+    if os.name == "nt" or os.environ.get("TERM") == "dumb" or not sys.stdout.isatty():
+        return None
+    screen = Screen(sys.stdout)
+    sys.stdout = screen
+    atexit.register(screen.close)
+    return screen
+
+
+def clear():
+    """Clear the screen without a Screen installed."""
+    if os.name == "nt":
+        os.system('cls')
+    elif sys.stdout.isatty():
+        sys.stdout.write(CLEAR_ALL)
+        sys.stdout.flush()
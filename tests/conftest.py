@@ -0,0 +1,20 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def game_data_source():
+    with open(os.path.join(ROOT, "game_data.json"), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture
+def game_data(game_data_source):
+    """A fresh, plain-dict copy of game_data.json."""
+    return json.loads(game_data_source)
@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import batch  # noqa: E402
+from engine import GameEngine  # noqa: E402
+
+
+def test_batch_matches_the_engine_for_a_fixed_seed(game_data):
+    players = 60
+    population = batch.BatchEngine(game_data, players)
+    engines = [GameEngine(game_data) for _ in range(players)]
+    rng = random.Random(1)
+    for _ in range(150):
+        actions = [rng.randrange(population.NOOP + 1) for _ in range(players)]
+        population.step(actions)
+        for i, engine in enumerate(engines):
+            if engine.ending or actions[i] == population.NOOP:
+                continue
+            engine.run(engine.handle_location_action, None, population.action_names[actions[i]])
+
+    feasible = population.heist_feasible()
+    heist = [scene for phase in game_data["heist_sequences"]["museum"].values() for scene in phase]
+    for i, engine in enumerate(engines):
+        state = engine.state
+        assert list(population.stats[i]) == list(state.stats)
+        assert (population.day[i], population.slot[i]) == (state.day, state.slot)
+        assert batch.ENDINGS[population.ending[i]] == engine.ending
+        assert feasible[i] == all(any(state.stat(opt["stat"]) >= opt["req"] for opt in scene["options"])
+                                  for scene in heist)
+    assert set(population.ending) > {0}
+
+
+def test_batch_rejects_stats_out_of_range(game_data):
+    game_data["initial_state"]["stats"]["hunger"] = 500
+    with pytest.raises(ValueError):
+        batch.BatchEngine(game_data, 3)
@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import build
+import gamedata
+
+
+def revive(value, table):
+    """Python twin of the page's JSON.parse reviver for optimized payloads."""
+    if isinstance(value, str) and value.startswith(build.STRING_REF):
+        if value[1:2] == build.STRING_REF:
+            return value[1:]
+        return table[int(value[1:], 36)]
+    if isinstance(value, dict):
+        return {k: revive(v, table) for k, v in value.items()}
+    if isinstance(value, list):
+        return [revive(item, table) for item in value]
+    return value
+
+
+def test_write_atomic_replaces_in_place(tmp_path):
+    path = tmp_path / "index.html"
+    path.write_text("old")
+    path.chmod(0o640)
+    build.write_atomic(str(path), "new \u00e9")
+    assert path.read_text(encoding="utf-8") == "new \u00e9"
+    assert path.stat().st_mode & 0o777 == 0o640
+    gamedata.write_atomic(str(path), b"\x00bytes")
+    assert path.read_bytes() == b"\x00bytes"
+
+    (tmp_path / "sub").mkdir()
+    with pytest.raises(OSError):
+        gamedata.write_atomic(str(tmp_path / "sub"), "x")
+    assert not gamedata.write_file(str(tmp_path / "sub"), b"x")
+    assert sorted(os.listdir(tmp_path)) == ["index.html", "sub"]
+
+
+def test_to_base36():
+    assert [build.to_base36(n) for n in (0, 9, 10, 35, 36, 1295)] == ["0", "9", "a", "z", "10", "zz"]
+
+
+def test_string_table_only_keeps_strings_worth_a_reference():
+    obj = {"a": ["long repeated text"] * 5, "b": ["xy", "xy"], "c": "once only, never tabled"}
+    table = build.string_table(obj)
+    assert table == ["long repeated text"]
+
+
+def test_payload_round_trip_with_escaped_refs():
+    obj = {"items": ["@literal", "@@double", "shared words here"] * 3, "n": [1, 2.5, None, True]}
+    sections, text = build.payload(obj)
+    lines = text.split("\n")
+    table = json.loads(lines[0])
+    assert table
+    assert {name: revive(json.loads(line), table) for name, line in zip(sections, lines[1:])} == obj
+
+
+def test_payload_round_trip_game_data(game_data):
+    game_data_js = build.convert_keys_to_camel_case(build.with_dialogue_graph(game_data))
+    sections, text = build.payload(game_data_js)
+    lines = text.split("\n")
+    table = json.loads(lines[0])
+    assert {name: revive(json.loads(line), table) for name, line in zip(sections, lines[1:])} == game_data_js
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node to run the page's decoder")
+@pytest.mark.parametrize("compress", [False, True])
+def test_optimized_block_decodes_in_javascript(game_data, compress):
+    block = build.optimized_block(game_data, "test", compress=compress)
+    script = block + "\nprocess.stdout.write(JSON.stringify(GAME_DATA));\n"
+    result = subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout) == build.convert_keys_to_camel_case(game_data)
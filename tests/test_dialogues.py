@@ -0,0 +1,87 @@
+from dialogues import END, DialogueGraph, compile_graph, graph_problems
+from state import GameState, StateLayout
+
+
+def line(text="...", **fields):
+    return {"speaker": "Cal", "text": text, **fields}
+
+
+def test_lines_play_in_order_and_jump():
+    dialogues = {
+        "a": [line(label="top"), line(goto="b"), line("skipped")],
+        "b": [line(), line(goto="end")],
+        "c": [line(goto="a"), line(goto="top")],
+    }
+    problems = []
+    graph = compile_graph(dialogues, problems)
+    assert graph["starts"] == [0, 3, 5]
+    assert graph["next"] == [1, 3, END, 4, END, 0, END]
+    # Labels belong to their own dialogue
+    assert problems == ["dialogue c line 2: unknown goto 'top'",
+                        "dialogue a line 3: can never be reached",
+                        "dialogue c line 2: can never be reached"]
+    assert graph["dead"] == [2, 6]
+
+
+def test_unknown_goto_is_reported_and_ends():
+    problems = []
+    graph = compile_graph({"a": [line(goto="nowhere")]}, problems)
+    assert graph["next"] == [END]
+    assert problems == ["dialogue a line 1: unknown goto 'nowhere'"]
+
+
+def test_choices_and_may_ask():
+    dialogues = {
+        "ask": [line(), line(choices=[{"text": "yes", "goto": "yes"}, {"text": "no"}]), line(), line(label="yes")],
+        "tell": [line(), line()],
+        "leads_to_ask": [line(goto="ask")],
+    }
+    graph = compile_graph(dialogues)
+    assert graph["choice_next"] == [3, 2]
+    assert graph["may_ask"] == [1, 1, 0, 0, 0, 0, 1]
+    assert graph["dead"] == []
+
+
+def test_loop_without_a_choice_is_reported():
+    dialogues = {
+        "spin": [line(label="again"), line(goto="again")],
+        "asked": [line(label="again", choices=[{"text": "loop", "goto": "again"}, {"text": "stop", "goto": "end"}])],
+    }
+    problems = []
+    graph = compile_graph(dialogues, problems)
+    assert problems == ["dialogue spin line 1: loops back without a choice"]
+    assert graph["may_ask"] == [0, 0, 1]
+
+
+def test_loops_are_found_in_large_components():
+    # One long cycle and a chain feeding it, deeper than Python's recursion limit
+    size = 5000
+    dialogues = {"ring": [line() for _ in range(size)] + [line(goto="ring")],
+                 "chain": [line() for _ in range(size)] + [line(goto="ring")]}
+    problems = []
+    graph = compile_graph(dialogues, problems)
+    assert problems == ["dialogue ring line 1: loops back without a choice"]
+    assert not any(graph["may_ask"])
+
+
+def test_branches_follow_the_state(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    flag = layout.flag_names[0]
+    dialogues = {"a": [line(branch=[{"if": {"flags": {flag: True}}, "goto": "yes"},
+                                    {"if": {"min_stats": {"money": 1000000}}, "goto": "rich"}], goto="no"),
+                       line(label="yes"), line(label="rich"), line(label="no")]}
+    graph = DialogueGraph(compile_graph(dialogues), layout)
+    state = GameState.initial(layout)
+    assert graph.follow(0, state) == 3
+    state.set_stat("money", 1000000)
+    assert graph.follow(0, state) == 2
+    state.set_flag(flag)
+    assert graph.follow(0, state) == 1
+    assert graph.line(2) == ("a", 2)
+    assert graph.node("a", 4) == graph.node("missing") == END
+
+
+def test_game_data_has_no_graph_problems(game_data):
+    assert graph_problems(game_data) == []
+    game_data["dialogues"]["broken"] = [line(branch=[{"if": {"flags": {"no_flag": True}}, "goto": "end"}])]
+    assert graph_problems(game_data) == ["dialogue branch: unknown flag 'no_flag'"]
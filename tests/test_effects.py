@@ -0,0 +1,112 @@
+import copy
+import random
+
+import pytest
+
+from effects import Effect, EffectTable, action_problems, effect_problems
+from state import GameState, StateLayout
+
+
+def reference_apply(d, effects, cost=0, intel=None):
+    """The effect rules from the effects.py docstring, applied to a state dict."""
+    stats = d["stats"]
+    if stats["money"] < cost:
+        return False
+    stats["money"] -= cost
+    for key, value in effects.items():
+        if key in stats:
+            if value == "full":
+                stats[key] = 100
+            elif key == "money":
+                stats[key] = max(0, stats[key] + value)
+            else:
+                stats[key] = min(100, max(0, stats[key] + value))
+        elif key == "flag":
+            d["flags"][value] = True
+        elif key == "suspicion":
+            d["heist"]["suspicion"] += value
+    if intel and intel not in d["heist"]["intel"]:
+        d["heist"]["intel"].append(intel)
+    return True
+
+
+def sample_states(initial_state, count=20, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        d = copy.deepcopy(initial_state)
+        for stat in d["stats"]:
+            d["stats"][stat] = rng.randint(0, 100)
+        d["stats"]["money"] = rng.choice([0, 5, 20, 100, 1000])
+        yield d
+
+
+def choice_effects(data):
+    for lines in data["dialogues"].values():
+        for line in lines:
+            for choice in line.get("choices", []):
+                if "effect" in choice:
+                    yield choice["effect"]
+
+
+def test_actions_match_the_rules(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    table = EffectTable(game_data)
+    for name, spec in game_data["actions"].items():
+        for d in sample_states(game_data["initial_state"]):
+            state = GameState.from_dict(layout, d)
+            paid = table.actions[name].apply(state)
+            assert paid == reference_apply(d, spec.get("effects", {}), spec.get("cost", 0), spec.get("add_intel"))
+            assert state.to_dict() == d, name
+
+
+def test_choices_match_the_rules(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    specs = list(choice_effects(game_data))
+    assert specs
+    for spec in specs:
+        for d in sample_states(game_data["initial_state"], 5):
+            state = GameState.from_dict(layout, d)
+            assert Effect(spec, layout).apply(state)
+            reference_apply(d, spec)
+            assert state.to_dict() == d, spec
+
+
+def test_choice_effects_are_compiled_once(game_data):
+    table = EffectTable(game_data)
+    slot = next((key, i, c) for key, lines in game_data["dialogues"].items()
+                for i, line in enumerate(lines) for c, choice in enumerate(line.get("choices", []))
+                if "effect" in choice)
+    assert table.choice(*slot) is table.choice(*slot)
+    shown = [(key, value) for key, value in table.choice(*slot).shown]
+    spec = game_data["dialogues"][slot[0]][slot[1]]["choices"][slot[2]]["effect"]
+    assert shown == [(key, value) for key, value in spec.items() if key in game_data["initial_state"]["stats"]]
+
+
+def test_apply_many_matches_apply(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    name, spec = next((name, spec) for name, spec in game_data["actions"].items() if spec.get("cost"))
+    effect = Effect(spec, layout, action=True)
+    states = [GameState.from_dict(layout, d) for d in sample_states(game_data["initial_state"])]
+    expected = [state.clone() for state in states]
+    paid = effect.apply_many(states)
+    assert paid == [effect.apply(state) for state in expected]
+    assert states == expected
+    assert not all(paid)
+
+
+@pytest.mark.parametrize("effect, problem", [
+    ({"flag": "no_such_flag"}, "unknown flag"),
+    ({"ending": "no_such_ending"}, "unknown ending"),
+    ({"luck": 3}, "unknown effect"),
+    ({"money": "lots"}, "whole number"),
+])
+def test_effect_problems(game_data, effect, problem):
+    problems = effect_problems("here", effect, game_data)
+    assert len(problems) == 1 and problem in problems[0]
+
+
+def test_action_problems(game_data):
+    assert not any(action_problems(name, spec, game_data) for name, spec in game_data["actions"].items())
+    problems = action_problems("x", {"effects": {"luck": 1, "money": 1.5}, "cost": -1, "advance_time": "soon"},
+                               game_data)
+    assert len(problems) == 4
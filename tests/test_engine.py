@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+from engine import GameEngine
+
+# Option indexes played from begin("Rin", "Vesper"), with the last ending and
+# the final state the original game.py reached on the same inputs
+with open(os.path.join(os.path.dirname(__file__), "playthroughs.json"), encoding="utf-8") as f:
+    PLAYTHROUGHS = json.load(f)
+
+
+def play(engine, script):
+    """Play a script; return the ending keys seen along the way."""
+    endings = []
+    for idx in script:
+        if engine.pending:
+            events = engine.choose(idx)
+        else:
+            events = engine.step(engine.actions_available()[idx])
+        endings += [event[1] for event in events if event[0] == "ending"]
+    return endings
+
+
+@pytest.mark.parametrize("playthrough", PLAYTHROUGHS, ids=[p["name"] for p in PLAYTHROUGHS])
+def test_playthrough_matches_the_original_game(game_data, playthrough):
+    engine = GameEngine(game_data)
+    engine.begin("Rin", "Vesper")
+    endings = play(engine, playthrough["script"])
+    assert endings == ([playthrough["ending"]] if playthrough["ending"] else [])
+    assert engine.state.to_dict() == playthrough["state"]
+
+
+def test_clone_plays_on_independently(game_data):
+    script = PLAYTHROUGHS[0]["script"]
+    engine = GameEngine(game_data)
+    engine.begin("Rin", "Vesper")
+    play(engine, script[:40])
+    other = engine.clone()
+    before = engine.state.to_dict()
+    play(other, script[40:])
+    assert engine.state.to_dict() == before
+    assert other.state.to_dict() == PLAYTHROUGHS[0]["state"]
+
+
+def test_engine_accepts_a_saved_state(game_data):
+    playthrough = PLAYTHROUGHS[-1]
+    engine = GameEngine(game_data, playthrough["state"])
+    assert engine.state.to_dict() == playthrough["state"]
+    assert engine.actions_available()
+
+
+def test_step_api_rejects_moves_out_of_turn(game_data):
+    engine = GameEngine(game_data)
+    with pytest.raises(ValueError):
+        engine.step("nowhere")
+    with pytest.raises(ValueError):
+        engine.choose(0)
+    engine.begin()
+    engine.step("clinic")
+    with pytest.raises(ValueError):
+        engine.step("Nap")
+    for action in engine.actions_available():
+        if not engine.pending:
+            engine.step(action)
+    assert engine.pending
+    with pytest.raises(ValueError):
+        engine.step(engine.location)
+    with pytest.raises(ValueError):
+        engine.choose(len(engine.actions_available()))
+
+
+def test_nothing_happens_after_a_fatal_ending(game_data):
+    playthrough = next(p for p in PLAYTHROUGHS if p["ending"] == "starvation")
+    engine = GameEngine(game_data)
+    engine.begin("Rin", "Vesper")
+    play(engine, playthrough["script"])
+    assert engine.ending == "starvation"
+    assert engine.actions_available() == []
+    with pytest.raises(ValueError):
+        engine.step("motel")
@@ -0,0 +1,113 @@
+import copy
+import itertools
+import random
+
+import pytest
+
+import simulate
+from feasibility import HeistAnalyzer, frontier, heist_scenes, pareto_plans
+from state import GameState, StateLayout
+
+
+def museum_scenes(data):
+    return [scene for _, _, _, scene in heist_scenes(data["heist_sequences"]["museum"])]
+
+
+def brute_force_plans(scenes, allowed_stats=None):
+    """Every plan from every pick of one option per scene, minimal ones kept."""
+    options = [[opt for opt in scene["options"] if not allowed_stats or opt["stat"] in allowed_stats]
+               for scene in scenes]
+    plans = []
+    for picks in itertools.product(*options):
+        plan = {}
+        for opt in picks:
+            if opt["req"] > 0:
+                plan[opt["stat"]] = max(plan.get(opt["stat"], 0), opt["req"])
+        plans.append(plan)
+    return [plan for plan in plans
+            if not any(other != plan and all(plan.get(stat, 0) >= req for stat, req in other.items())
+                       for other in plans)]
+
+
+def passes(scenes, stats):
+    return all(any(stats[opt["stat"]] >= opt["req"] for opt in scene["options"]) for scene in scenes)
+
+
+def sample_states(initial_state, count=300, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        d = copy.deepcopy(initial_state)
+        for stat in d["stats"]:
+            d["stats"][stat] = rng.randint(0, 100)
+        yield d
+
+
+def key(plan):
+    return tuple(sorted(plan.items()))
+
+
+@pytest.mark.parametrize("allowed_stats", [None, ["charisma", "stealth"], ["fitness"]])
+def test_frontier_matches_brute_force(game_data, allowed_stats):
+    scenes = museum_scenes(game_data)
+    plans = pareto_plans(scenes, allowed_stats)
+    assert sorted(map(key, plans)) == sorted(set(map(key, brute_force_plans(scenes, allowed_stats))))
+    assert [sum(plan.values()) for plan in plans] == sorted(sum(plan.values()) for plan in plans)
+
+
+def test_frontier_drops_duplicates_and_dominated_plans():
+    plans = [{"a": 10}, {"a": 10, "b": 5}, {"a": 10}, {"b": 20}, {"a": 5, "b": 30}]
+    assert frontier(plans) == [{"a": 10}, {"b": 20}]
+
+
+def test_can_pass_matches_the_scenes(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    analyzer = HeistAnalyzer(game_data)
+    scenes = museum_scenes(game_data)
+    results = set()
+    for d in sample_states(game_data["initial_state"]):
+        state = GameState.from_dict(layout, d)
+        results.add(analyzer.can_pass(state))
+        assert analyzer.can_pass(state) == passes(scenes, d["stats"])
+        blocked = analyzer.blocked_scene(state)
+        if blocked is not None:
+            assert passes(scenes[:blocked], d["stats"]) and not passes(scenes[blocked:blocked + 1], d["stats"])
+    assert results == {True, False}
+
+
+def test_shortfall_is_the_cheapest_fix(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    analyzer = HeistAnalyzer(game_data)
+    scenes = museum_scenes(game_data)
+    plans = brute_force_plans(scenes)
+    for d in sample_states(game_data["initial_state"], 100):
+        state = GameState.from_dict(layout, d)
+        total, need = analyzer.shortfall(state)
+        assert total == sum(need.values())
+        assert total == min(sum(max(0, req - d["stats"][stat]) for stat, req in plan.items()) for plan in plans)
+        for stat, amount in need.items():
+            d["stats"][stat] += amount
+        assert passes(scenes, d["stats"])
+        assert (total == 0) == analyzer.can_pass(state)
+
+
+def test_no_build_passes_with_a_missing_stat(game_data):
+    analyzer = HeistAnalyzer(game_data, allowed_stats=["fitness"])
+    state = GameState.initial(StateLayout(game_data["initial_state"]))
+    assert analyzer.shortfall(state) is None
+    assert "caught at" in analyzer.hint(state)
+
+
+@pytest.mark.parametrize("policy", sorted(simulate.BEST_OPTION_POLICIES))
+def test_skipping_doomed_heists_changes_no_result(monkeypatch, game_data, policy):
+    monkeypatch.setattr(simulate, "GAME_DATA", game_data)
+    with_analyzer = simulate.new_stats()
+    without = simulate.new_stats()
+    analyzer = HeistAnalyzer(game_data)
+    rng = random.Random(3)
+    for _ in range(30):
+        simulate.simulate_run(simulate.POLICIES[policy], rng, 600, with_analyzer, analyzer)
+    rng = random.Random(3)
+    for _ in range(30):
+        simulate.simulate_run(simulate.POLICIES[policy], rng, 600, without)
+    assert with_analyzer == without
+    assert with_analyzer["runs"] == 30
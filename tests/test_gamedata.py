@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+import gamedata
+
+
+@pytest.fixture
+def data_file(tmp_path, game_data_source):
+    path = tmp_path / "game_data.json"
+    path.write_text(game_data_source, encoding="utf-8")
+    return str(path)
+
+
+def same_data(loaded, source):
+    assert set(loaded) == set(source)
+    for section, value in source.items():
+        assert (dict(loaded[section]) if section == "dialogues" else loaded[section]) == value
+
+
+def test_load_writes_and_reuses_the_cache(monkeypatch, data_file, game_data):
+    first = gamedata.load(data_file)
+    assert os.path.exists(gamedata.cache_path(data_file))
+    same_data(first, game_data)
+    assert first.names["locations"] == list(game_data["locations"])
+    assert all(first.ids["endings"][name] == i for i, name in enumerate(game_data["endings"]))
+
+    def no_compile(source):
+        raise AssertionError("the cache should have been used")
+    monkeypatch.setattr(gamedata, "compile_data", no_compile)
+    same_data(gamedata.load(data_file), game_data)
+    # Touched but unchanged: the content hash still matches
+    st = os.stat(data_file)
+    os.utime(data_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    same_data(gamedata.load(data_file), game_data)
+
+
+def test_changed_file_is_recompiled(data_file, game_data):
+    gamedata.load(data_file)
+    game_data["meta"]["title"] = "Changed"
+    with open(data_file, "w", encoding="utf-8") as f:
+        json.dump(game_data, f)
+    assert gamedata.load(data_file)["meta"]["title"] == "Changed"
+
+
+def test_unreadable_cache_is_rebuilt(data_file, game_data):
+    gamedata.load(data_file)
+    with open(gamedata.cache_path(data_file), "wb") as f:
+        f.write(b"not a cache")
+    same_data(gamedata.load(data_file), game_data)
+
+
+def test_validate_lists_every_problem(game_data):
+    gamedata.validate(game_data)
+    next(iter(game_data["locations"].values()))["unlock_flag"] = "no_such_flag"
+    next(iter(game_data["heist_sequences"]["museum"].values()))[0]["options"][0]["stat"] = "luck"
+    with pytest.raises(ValueError) as error:
+        gamedata.validate(game_data)
+    assert "no_such_flag" in str(error.value) and "'luck'" in str(error.value)
+    del game_data["endings"]
+    with pytest.raises(ValueError, match="missing sections: endings"):
+        gamedata.validate(game_data)
@@ -0,0 +1,123 @@
+import gc
+import json
+import os
+import shutil
+import weakref
+
+import pytest
+
+import gamedata
+import hotreload
+from engine import GameEngine
+
+
+def test_split_sections_keeps_value_text():
+    source = '{"a": {"x": [1, {"y": 2}]}, "b": 2 , "c": [] }'
+    assert hotreload.split_sections(source) == {"a": '{"x": [1, {"y": 2}]}', "b": "2", "c": "[]"}
+
+
+def test_split_sections_ignores_brackets_and_quotes_in_strings():
+    value = {"text": 'He said "}]{[," \\ and left', "key, with: comma": ["\\\"", "é"]}
+    source = json.dumps({"a": value, "b{": "x\\\"y", "c": None}, indent=2)
+    sections = hotreload.split_sections(source)
+    assert list(sections) == ["a", "b{", "c"]
+    assert {key: json.loads(text) for key, text in sections.items()} == json.loads(source)
+
+
+def test_split_sections_matches_game_data(game_data_source):
+    sections = hotreload.split_sections(game_data_source)
+    assert {key: json.loads(text) for key, text in sections.items()} == json.loads(game_data_source)
+
+
+@pytest.mark.parametrize("source", ['{"a": 1', '{"a": [1, 2}', '{"a": 1} trailing', '{"a": "open}', ""])
+def test_split_sections_rejects_incomplete_json(source):
+    with pytest.raises(ValueError):
+        hotreload.split_sections(source)
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / "game_data.json"
+    shutil.copy(os.path.join(os.path.dirname(gamedata.GAME_DATA_FILE), "game_data.json"), path)
+    return str(path)
+
+
+def rewrite(path, data):
+    """Save new content with a stamp the reloader can't mistake for the old one."""
+    stamp = os.stat(path).st_mtime_ns
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.utime(path, ns=(stamp + 10**9, stamp + 10**9))
+
+
+def test_reloader_reparses_only_changed_sections(data_file):
+    data = gamedata.load(data_file, use_cache=False)
+    reloader = hotreload.HotReloader(data, data_file)
+    assert reloader.poll() is None
+
+    source = json.load(open(data_file))
+    rewrite(data_file, source)  # reformat everything once
+    data = reloader.poll()
+    reloader.accept()
+
+    location = next(iter(source["locations"]))
+    source["locations"][location]["description"] = "Freshly painted."
+    rewrite(data_file, source)
+    new = reloader.poll()
+    assert reloader.changed == ["locations"]
+    assert new["locations"][location]["description"] == "Freshly painted."
+    assert new["dialogues"] is data["dialogues"]
+    assert new["initial_state"] is data["initial_state"]
+
+
+def test_reloader_reports_a_bad_file_once(data_file):
+    reloader = hotreload.HotReloader(gamedata.load(data_file, use_cache=False), data_file)
+    source = json.load(open(data_file))
+    source["locations"][next(iter(source["locations"]))]["unlock_flag"] = "no_such_flag"
+    rewrite(data_file, source)
+    with pytest.raises(ValueError):
+        reloader.poll()
+    assert reloader.poll() is None
+
+
+def test_swap_keeps_the_game_and_checks_live_state(data_file):
+    data = gamedata.load(data_file, use_cache=False)
+    engine = GameEngine(data)
+    location = next(iter(data["locations"]))
+    engine.step(location)
+    reloader = hotreload.HotReloader(data, data_file)
+
+    source = json.load(open(data_file))
+    source["initial_state"]["stats"]["money"] += 1
+    rewrite(data_file, source)
+    with pytest.raises(ValueError, match="initial_state"):
+        hotreload.swap(engine, reloader.poll())
+
+    source["initial_state"]["stats"]["money"] -= 1
+    source["meta"]["title"] = "Renamed"
+    rewrite(data_file, source)
+    swapped = hotreload.swap(engine, reloader.poll())
+    assert swapped.state is engine.state
+    assert swapped.location == location
+    assert swapped.data["meta"]["title"] == "Renamed"
+
+
+def test_replaced_data_is_freed(data_file):
+    data = gamedata.load(data_file, use_cache=False)
+    engine = GameEngine(data)
+    engine.step(next(iter(data["locations"])))
+    reloader = hotreload.HotReloader(data, data_file)
+    old = weakref.ref(data)
+
+    source = json.load(open(data_file))
+    for generation in range(3):
+        source["meta"]["title"] = f"Edit {generation}"
+        rewrite(data_file, source)
+        engine = hotreload.swap(engine, reloader.poll())
+        reloader.accept()
+        # The new data has its own compiled tables, shared by every engine using it
+        assert engine.triggers is GameEngine(engine.data).triggers
+    del data
+    gc.collect()
+    assert old() is None
+    assert engine.data["meta"]["title"] == "Edit 2"
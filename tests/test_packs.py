@@ -0,0 +1,64 @@
+import json
+import os
+
+import gamedata
+from packs import DEFAULT_CHAPTER, DialogueStore, dialogue_chapters, pack_dialogues
+
+
+def write_store(tmp_path, dialogues, chapters, size=64):
+    index, blobs = pack_dialogues(dialogues, chapters)
+    files = {}
+    for chapter, blob in blobs.items():
+        files[chapter] = str(tmp_path / f"ch{chapter}.pack")
+        with open(files[chapter], "wb") as f:
+            f.write(blob)
+    return DialogueStore(files, index, size)
+
+
+def test_store_reads_back_every_dialogue(tmp_path, game_data):
+    dialogues = game_data["dialogues"]
+    keys = list(dialogues)
+    chapters = {key: 2 for key in keys[::3]}
+    store = write_store(tmp_path, dialogues, chapters)
+    assert list(store) == keys and len(store) == len(dialogues)
+    assert dict(store) == dialogues
+    assert store.chapter(keys[0]) == 2 and store.chapter(keys[1]) == DEFAULT_CHAPTER
+    assert "missing" not in store
+    store.close()
+
+
+def test_store_keeps_only_the_most_recent(tmp_path):
+    dialogues = {f"d{i}": [{"speaker": "Cal", "text": str(i)}] for i in range(10)}
+    store = write_store(tmp_path, dialogues, {}, size=3)
+    for key in dialogues:
+        assert store[key] == dialogues[key]
+    store["d7"]
+    assert list(store.decoded) == ["d8", "d9", "d7"]
+    assert store["d0"] == dialogues["d0"]
+    assert len(store.decoded) == 3
+
+
+def test_chapters_section():
+    assert dialogue_chapters({"chapters": {"2": ["a", "b"], "3": ["c"]}}) == {"a": 2, "b": 2, "c": 3}
+    assert dialogue_chapters({}) == {}
+
+
+def test_loaded_dialogues_come_from_chapter_packs(tmp_path, game_data):
+    keys = list(game_data["dialogues"])
+    game_data["chapters"] = {"2": keys[:2]}
+    path = tmp_path / "game_data.json"
+    path.write_text(json.dumps(game_data), encoding="utf-8")
+    loaded = gamedata.load(str(path))
+    assert isinstance(loaded["dialogues"], DialogueStore)
+    assert loaded["dialogues"].chapter(keys[0]) == 2
+    assert dict(loaded["dialogues"]) == game_data["dialogues"]
+    packs = sorted(name for name in os.listdir(tmp_path / "__pycache__") if name.endswith(".pack"))
+    assert len(packs) == 2
+
+    # A rebuild replaces the old packs, and the data loaded before still reads
+    game_data["chapters"] = {}
+    path.write_text(json.dumps(game_data), encoding="utf-8")
+    reloaded = gamedata.load(str(path))
+    assert len([name for name in os.listdir(tmp_path / "__pycache__") if name.endswith(".pack")]) == 1
+    loaded["dialogues"].decoded.clear()
+    assert dict(loaded["dialogues"]) == dict(reloaded["dialogues"])
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+import game
+import replay
+import saves
+
+
+@pytest.fixture
+def fresh_game(monkeypatch, tmp_path):
+    """game.py's globals reset, saving to a slot directory of its own."""
+    save_dir = tmp_path / "saves"
+    for name, value in (("engine", None), ("game_state", None), ("save_slot", None), ("save_dir", str(save_dir)),
+                        ("autosave", False), ("autosaver", None), ("player_input", None), ("fast", True)):
+        monkeypatch.setattr(game, name, value)
+    return save_dir
+
+
+def answers(*lines):
+    """A read() for Recorder that types `lines` at prompts (Enter at pauses), then hits end of input."""
+    queue = list(lines)
+
+    def read(prompt):
+        if "Press Enter" in prompt:
+            return ""
+        if not queue:
+            raise EOFError
+        return queue.pop(0)
+    return read
+
+
+def record(path, lines, saves=()):
+    game.player_input = replay.Recorder(str(path), 7, answers(*lines), saves)
+    try:
+        game.title_screen()
+    except EOFError:
+        pass
+    finally:
+        game.player_input.close()
+        game.player_input = None
+    return game.game_state.to_dict()
+
+
+def test_replay_reproduces_a_new_game(fresh_game, tmp_path, capsys):
+    path = tmp_path / "session.txt"
+    recorded = record(path, ["1", "Alex", "Thrill", "1"])
+    capsys.readouterr()
+
+    result = replay.replay(str(path), quiet=True, game=game)
+    assert result["inputs"] == result["recorded"] == 4
+    assert result["state"] == recorded
+    assert result["state"]["player"]["name"] == "Alex"
+
+
+def test_replay_continues_from_the_recorded_save(fresh_game, tmp_path, capsys):
+    game.init_game_state()
+    game.game_state.set_stat("money", 4321)
+    game.game_state.day = 3
+    store = game.save_store()
+    store.save(saves.DEFAULT_SLOT, game.game_state.to_dict())
+    slot_file = saves.slot_path(saves.DEFAULT_SLOT, store.save_dir)
+
+    path = tmp_path / "session.txt"
+    recorded = record(path, ["2"], store.snapshot())
+    assert recorded["stats"]["money"] == 4321
+
+    # Played back where that save is gone, it still loads
+    store.delete(saves.DEFAULT_SLOT)
+    game.engine = game.game_state = None
+    capsys.readouterr()
+    result = replay.replay(str(path), quiet=True, game=game)
+    assert result["state"] == recorded
+    assert not os.path.exists(slot_file)
+
+    # and a replay ending in a save leaves the real slots alone
+    store.save(saves.DEFAULT_SLOT, recorded)
+    with open(slot_file) as f:
+        before = f.read()
+    with open(path, "a") as f:
+        f.write(f"{len(game.engine.actions_available()) + 4}\n")
+    replay.replay(str(path), quiet=True, game=game)
+    with open(slot_file) as f:
+        assert f.read() == before
+
@@ -0,0 +1,204 @@
+import copy
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import saves
+
+
+def changed_state(initial_state):
+    state = copy.deepcopy(initial_state)
+    state["day"] = 4
+    state["stats"]["money"] = 999
+    state["flags"][next(iter(state["flags"]))] = True
+    state["inventory"] = ["Lockpick"]
+    return state
+
+
+def test_diff_round_trip(game_data):
+    base = game_data["initial_state"]
+    state = changed_state(base)
+    changes = saves.diff(base, state)
+    assert changes["stats"] == {"money": 999}
+    assert "hunger" not in changes["stats"]
+    assert saves.apply_diff(base, changes) == state
+    assert saves.diff(base, base) == {}
+
+
+def test_apply_diff_leaves_base_alone(game_data):
+    base = game_data["initial_state"]
+    before = copy.deepcopy(base)
+    result = saves.apply_diff(base, {"inventory": ["Map"]})
+    result["stats"]["money"] = -1
+    assert base == before
+
+
+def test_save_load_round_trip(game_data, tmp_path):
+    store = saves.SaveStore(game_data["initial_state"], str(tmp_path))
+    state = changed_state(game_data["initial_state"])
+    store.save("slot1", state)
+    assert store.load("slot1") == state
+    assert store.load("missing") is None
+    assert list(store.slots()) == ["slot1"]
+    assert store.slots()["slot1"]["money"] == 999
+
+
+def test_index_rebuilt_when_lost(game_data, tmp_path):
+    store = saves.SaveStore(game_data["initial_state"], str(tmp_path))
+    store.save("a", changed_state(game_data["initial_state"]))
+    os.remove(tmp_path / saves.INDEX_NAME)
+    assert list(store.slots()) == ["a"]
+
+
+def test_invalid_slot_names(tmp_path):
+    for slot in ("../x", "", "index", "a/b"):
+        with pytest.raises(ValueError):
+            saves.slot_path(slot, str(tmp_path))
+
+
+def test_migrate_legacy_whole_state_save(game_data, tmp_path):
+    state = changed_state(game_data["initial_state"])
+    legacy = tmp_path / "phantomthrill_save.json"
+    legacy.write_text(json.dumps(state))
+    store = saves.SaveStore(game_data["initial_state"], str(tmp_path / "saves"))
+    assert store.import_legacy("save", str(legacy)) == state
+    assert store.load("save") == state
+
+
+def test_migrate_version_2(game_data, tmp_path):
+    base = game_data["initial_state"]
+    state = changed_state(base)
+    (tmp_path / "old.json").write_text(json.dumps({"version": 2, "saved_at": 1.0, "state": saves.diff(base, state)}))
+    assert saves.SaveStore(base, str(tmp_path)).load("old") == state
+
+
+def test_newer_save_is_refused(game_data):
+    with pytest.raises(ValueError):
+        saves.migrate({"version": saves.SAVE_VERSION + 1, "state": {}}, game_data["initial_state"])
+
+
+def test_save_keeps_its_base_when_initial_state_changes(game_data, tmp_path):
+    base = game_data["initial_state"]
+    state = changed_state(base)
+    saves.SaveStore(base, str(tmp_path)).save("a", state)
+
+    edited = copy.deepcopy(base)
+    edited["stats"]["hunger"] = base["stats"]["hunger"] - 10
+    edited["flags"]["brand_new_flag"] = False
+    loaded = saves.SaveStore(edited, str(tmp_path)).load("a")
+    assert loaded["stats"]["hunger"] == base["stats"]["hunger"]
+    assert loaded["stats"]["money"] == 999
+    assert loaded["flags"]["brand_new_flag"] is False
+
+
+def test_save_with_missing_base_is_refused(game_data, tmp_path):
+    base = game_data["initial_state"]
+    store = saves.SaveStore(base, str(tmp_path))
+    store.save("a", changed_state(base))
+    os.remove(store.base_path(store.base))
+
+    edited = copy.deepcopy(base)
+    edited["stats"]["money"] += 1
+    with pytest.raises(ValueError):
+        saves.SaveStore(edited, str(tmp_path)).load("a")
+
+
+class RecordingStore:
+    """Stands in for a SaveStore, remembering writes and failing on request."""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.saved = []
+        self.lock = threading.Lock()
+
+    def save(self, slot, state):
+        if self.fail:
+            raise self.fail
+        with self.lock:
+            self.saved.append((slot, state))
+
+
+def test_autosaver_coalesces_a_burst():
+    store = RecordingStore()
+    saver = saves.Autosaver(store, delay=0.05, longest=5)
+    for i in range(100):
+        saver.save("auto", {"n": i})
+    saver.save("manual", {"n": -1})
+    assert saver.flush() is None
+    assert sorted(store.saved, key=lambda item: item[0]) == [("auto", {"n": 99}), ("manual", {"n": -1})]
+    assert saver.requests == 101
+    saver.close()
+
+
+def test_autosaver_flush_waits_for_the_write():
+    store = RecordingStore()
+    saver = saves.Autosaver(store, delay=10, longest=10)
+    saver.save("a", {"n": 1})
+    saver.flush()
+    assert store.saved == [("a", {"n": 1})]
+    saver.close()
+
+
+def test_autosaver_reports_any_error_and_keeps_running():
+    store = RecordingStore(fail=KeyError("boom"))
+    saver = saves.Autosaver(store, delay=0.01)
+    saver.save("a", {})
+    assert isinstance(saver.flush(), KeyError)
+    assert saver.take_error() is None
+
+    store.fail = None
+    saver.save("a", {"n": 2})
+    assert saver.flush() is None
+    assert store.saved == [("a", {"n": 2})]
+
+    store.fail = OSError("disk full")
+    saver.save("a", {})
+    assert isinstance(saver.close(), OSError)
+    assert not saver.thread.is_alive()
+
+
+def test_autosaver_close_writes_what_is_pending():
+    store = RecordingStore()
+    saver = saves.Autosaver(store, delay=10, longest=10)
+    saver.save("a", {"n": 1})
+    saver.close()
+    assert store.saved == [("a", {"n": 1})]
+
+
+def test_take_error_reports_a_background_failure_once():
+    store = RecordingStore(fail=OSError("disk full"))
+    saver = saves.Autosaver(store, delay=0)
+    saver.save("a", {})
+    deadline = time.monotonic() + 5
+    error = None
+    while error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+        error = saver.take_error()
+    assert isinstance(error, OSError)
+    assert saver.take_error() is None
+    assert saver.flush() is None
+    saver.close()
+
+
+def test_save_game_waits_for_the_disk(tmp_path, monkeypatch, capsys):
+    import game
+    monkeypatch.setattr(game, "save_dir", str(tmp_path))
+    monkeypatch.setattr(game, "autosave", True)
+    monkeypatch.setattr(game, "autosaver", None)
+    monkeypatch.setattr(game, "engine", None)
+    monkeypatch.setattr(game, "game_state", None)
+    game.init_game_state()
+    game.game_state.set_stat("money", 1234)
+    try:
+        game.save_game()
+        assert capsys.readouterr().out.strip() == "Game saved!"
+        assert game.save_store().load(saves.DEFAULT_SLOT)["stats"]["money"] == 1234
+
+        game.autosaver.store = RecordingStore(fail=OSError("disk full"))
+        game.save_game()
+        assert capsys.readouterr().out.strip() == "Save failed: disk full"
+    finally:
+        game.autosaver.close()
@@ -0,0 +1,94 @@
+import pytest
+
+from engine import GameEngine
+from scheduler import SLOTS_PER_DAY, Scheduler, day_slot, event_timing, next_occurrence, tick_of
+from state import TIMES
+
+
+def test_tick_and_day_slot_are_inverse():
+    assert tick_of(1, 0) == 0
+    for tick in range(5 * SLOTS_PER_DAY):
+        assert tick_of(*day_slot(tick)) == tick
+    assert day_slot(SLOTS_PER_DAY) == (2, 0)
+
+
+def test_event_timing():
+    assert event_timing({"at": {"day": 2, "time": TIMES[-1]}}) == (tick_of(2, len(TIMES) - 1), 0)
+    assert event_timing({"at": {}, "every": {"days": 1, "slots": 2}}) == (0, SLOTS_PER_DAY + 2)
+
+
+@pytest.mark.parametrize("first, every, now, expected", [
+    (5, 0, 0, 5),       # still ahead
+    (5, 0, 5, None),    # happening now: a one-off event has passed
+    (5, 0, 9, None),
+    (5, 3, 5, 8),       # recurring: the next one after now
+    (5, 3, 6, 8),
+    (5, 3, 8, 11),
+    (0, 1, 0, 1),
+])
+def test_next_occurrence(first, every, now, expected):
+    assert next_occurrence(first, every, now) == expected
+
+
+def test_scheduler_pops_due_events_in_order_and_reschedules():
+    # (first tick, period, trigger index), in declaration order
+    scheduler = Scheduler([(4, 0, 10), (2, 2, 11), (4, 0, 12)], now=0)
+    assert scheduler.next_tick() == 2
+    assert scheduler.pop_due(3) == [11]
+    assert scheduler.next_tick() == 4
+    # Same tick: declaration order, and the recurring event comes back
+    assert scheduler.pop_due(4) == [10, 11, 12]
+    assert scheduler.next_tick() == 6
+    assert scheduler.pop_due(5) == []
+
+
+def test_scheduler_copy_is_independent():
+    scheduler = Scheduler([(1, 0, 0)])
+    other = scheduler.copy()
+    assert other.pop_due(1) == [0]
+    assert scheduler.next_tick() == 1
+
+
+def test_scheduler_skips_past_events():
+    scheduler = Scheduler([(1, 0, 0), (1, 4, 1)], now=3)
+    assert scheduler.next_tick() == 5
+    assert scheduler.pop_due(5) == [1]
+
+
+def stepwise(engine, slots):
+    """advance_time one slot at a time, as the engine did before the closed form."""
+    for _ in range(slots):
+        if engine.ending or engine.pending:
+            break
+        engine.wait(1)
+
+
+def outcome(engine):
+    return engine.state.to_dict(), engine.ending, engine.pending
+
+
+@pytest.mark.parametrize("hunger, hygiene, health", [
+    (70, 80, 90), (12, 5, 90), (5, 80, 90), (0, 80, 90), (70, 80, 0), (3, 0, 1),
+])
+@pytest.mark.parametrize("slots", [1, 2, 3, 7, 25])
+def test_closed_form_time_matches_slot_by_slot(game_data, hunger, hygiene, health, slots):
+    engine = GameEngine(game_data)
+    for name, value in (("hunger", hunger), ("hygiene", hygiene), ("health", health)):
+        engine.state.set_stat(name, value)
+    expected = engine.clone()
+    stepwise(expected, slots)
+    engine.wait(slots)
+    assert outcome(engine) == outcome(expected)
+
+
+def test_timed_trigger_fires_on_its_slot(game_data):
+    game_data["triggers"].insert(0, {
+        "id": "nightly", "on": [{"at": {"day": 1, "time": TIMES[2]}, "every": {"days": 1}}],
+        "do": [{"add_intel": ["night falls"]}],
+    })
+    engine = GameEngine(game_data)
+    engine.state.set_stat("hunger", 100)
+    assert engine.next_event() == (1, 2)
+    engine.wait(2 + SLOTS_PER_DAY)
+    assert engine.state.intel.count("night falls") == 2
+    assert engine.next_event() == (3, 2)
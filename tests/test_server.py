@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import server
+from engine import GameEngine
+
+
+async def start(handler):
+    listener = await asyncio.start_server(handler, "127.0.0.1", 0, limit=server.MAX_LINE)
+    return listener, listener.sockets[0].getsockname()[1]
+
+
+async def converse(port, data, timeout=10):
+    """Send bytes to the game server, then read everything until it hangs up."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    output = await asyncio.wait_for(reader.read(), timeout)
+    writer.close()
+    return output.decode()
+
+
+def quit_script(data, name):
+    """New game, Enter through the intro, then Quit from the map."""
+    locations = len(GameEngine(data).actions_available())
+    return (f"1\n{name}\nThrill\n" + "\n" * 30 + f"{locations + 3}\n").encode()
+
+
+def test_players_are_served_concurrently(game_data):
+    async def main():
+        game = server.Server(game_data)
+        listener, port = await start(game.handle_player)
+        metrics_listener, metrics_port = await start(game.handle_metrics)
+        async with listener, metrics_listener:
+            outputs = await asyncio.gather(*(converse(port, quit_script(game_data, f"P{i}")) for i in range(5)))
+            reader, writer = await asyncio.open_connection("127.0.0.1", metrics_port)
+            writer.write(b"GET /metrics HTTP/1.0\r\n\r\n")
+            response = (await reader.read()).decode()
+            writer.close()
+        return game, outputs, response
+
+    game, outputs, response = asyncio.run(main())
+    for i, output in enumerate(outputs):
+        assert f"P{i}" in output
+        assert output.rstrip().endswith("Thanks for playing!")
+    head, _, body = response.partition("\r\n\r\n")
+    assert head.startswith("HTTP/1.0 200 OK")
+    metrics = json.loads(body)
+    assert metrics["sessions"] == {"active": 0, "peak": metrics["sessions"]["peak"], "total": 5,
+                                   "refused": 0, "idle_timeouts": 0}
+    assert metrics["steps"] == game.metrics.steps >= 5
+
+
+def test_idle_players_are_disconnected(game_data):
+    async def main():
+        game = server.Server(game_data, idle_timeout=0.2)
+        listener, port = await start(game.handle_player)
+        async with listener:
+            output = await converse(port, b"1\n")
+        return game, output
+
+    game, output = asyncio.run(main())
+    assert "Idle for too long" in output
+    assert game.metrics.timeouts == 1 and game.metrics.active == 0
+
+
+def test_full_server_refuses_players(game_data):
+    async def main():
+        game = server.Server(game_data, max_sessions=0)
+        listener, port = await start(game.handle_player)
+        async with listener:
+            return game, await converse(port, b"")
+
+    game, output = asyncio.run(main())
+    assert "server is full" in output
+    assert game.metrics.refused == 1
+
+
+def test_a_failing_session_is_logged_and_closed(monkeypatch, caplog, game_data):
+    def broken(self, *args):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(GameEngine, "begin", broken)
+
+    async def main():
+        game = server.Server(game_data)
+        listener, port = await start(game.handle_player)
+        async with listener:
+            return await converse(port, b"1\nAlex\nThrill\n")
+
+    output = asyncio.run(main())
+    assert "something went wrong" in output
+    assert "boom" in caplog.text
+
+
+def test_telnet_commands_are_stripped(game_data):
+    async def main():
+        game = server.Server(game_data)
+        listener, port = await start(game.handle_player)
+        async with listener:
+            return await converse(port, b"\xff\xfb\x01\xff\xf12\n")
+
+    assert asyncio.run(main()).rstrip().endswith("Goodbye!")
@@ -0,0 +1,40 @@
+import io
+import json
+
+import pytest
+
+import simulate
+
+
+@pytest.fixture
+def sim_data(monkeypatch, game_data):
+    monkeypatch.setattr(simulate, "GAME_DATA", game_data)
+    return game_data
+
+
+@pytest.mark.parametrize("policy", sorted(simulate.POLICIES))
+def test_chunks_are_reproducible(sim_data, policy):
+    agg = simulate.simulate_chunk(policy, 20, 4, 400)
+    assert agg == simulate.simulate_chunk(policy, 20, 4, 400)
+    assert agg["runs"] == sum(agg["outcomes"].values()) == 20
+    assert agg["steps"] <= 20 * 400
+
+
+def test_merged_chunks_add_up(sim_data):
+    total = simulate.new_stats()
+    parts = [simulate.simulate_chunk("story", 10, seed, 400) for seed in (1, 2)]
+    for part in parts:
+        simulate.merge_stats(total, part)
+    assert total["runs"] == 20
+    assert total["outcomes"] == parts[0]["outcomes"] + parts[1]["outcomes"]
+
+
+def test_run_simulation_streams_cumulative_reports():
+    out = io.StringIO()
+    total = simulate.run_simulation("greedy", 12, 2, 3, 0, 300, out)
+    reports = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert total["runs"] == 12
+    assert [r["final"] for r in reports] == [False] * (len(reports) - 1) + [True]
+    assert [r["runs"] for r in reports] == sorted(r["runs"] for r in reports)
+    assert reports[-1]["runs"] == 12
+    assert sum(reports[-1]["outcomes"].values()) == 12
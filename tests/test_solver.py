@@ -0,0 +1,50 @@
+import pytest
+
+import solver
+from engine import GameEngine
+
+
+@pytest.fixture
+def easy_data(game_data):
+    """Game data whose heist options need at most 45 of a stat, so a route is found quickly."""
+    for heist in game_data["heist_sequences"].values():
+        for scenes in heist.values():
+            for scene in scenes:
+                for opt in scene["options"]:
+                    opt["req"] = min(opt["req"], 45)
+    return game_data
+
+
+def play_route(data, route):
+    """Play a solver route on a new engine; return the ending keys seen."""
+    engine = GameEngine(data)
+    engine.begin()
+    endings = []
+    for label in route:
+        if label.startswith("choose: "):
+            events = engine.choose(engine.actions_available().index(label[len("choose: "):]))
+        elif label.startswith("go to ") and engine.location is None:
+            events = engine.step(label[len("go to "):])
+        else:
+            events = engine.step(label)
+        endings += [event[1] for event in events if event[0] == "ending"]
+    return endings
+
+
+@pytest.mark.parametrize("cost", ["ticks", "steps"])
+def test_route_wins_the_heist(easy_data, cost):
+    result = solver.solve(easy_data, cost=cost)
+    assert result is not None
+    assert result["steps"] == len(result["route"])
+    assert "chapter1_complete" in play_route(easy_data, result["route"])
+
+
+def test_cheaper_in_ticks_is_never_slower(easy_data):
+    by_ticks = solver.solve(easy_data, cost="ticks")
+    by_steps = solver.solve(easy_data, cost="steps")
+    assert by_ticks["ticks"] <= by_steps["ticks"]
+    assert by_steps["steps"] <= by_ticks["steps"]
+
+
+def test_heist_that_no_allowed_stat_can_pass(easy_data):
+    assert solver.solve(easy_data, heist_stats=["fitness"]) is None
@@ -0,0 +1,75 @@
+import copy
+
+from state import GameState, StateLayout
+
+
+def played_state(initial_state):
+    d = copy.deepcopy(initial_state)
+    d["player"]["name"] = "Alex"
+    d["stats"]["money"] = 40000
+    d["stats"]["charisma"] = 55
+    d["day"] = 3
+    d["time_of_day"] = "Night"
+    d["flags"][list(d["flags"])[-1]] = True
+    d["inventory"] = ["Lockpick", "Map"]
+    d["heist"]["intel"] = ["Guards change at midnight"]
+    return d
+
+
+def test_initial_round_trip(game_data):
+    initial_state = game_data["initial_state"]
+    layout = StateLayout(initial_state)
+    assert GameState.initial(layout).to_dict() == initial_state
+    assert list(GameState.initial(layout).to_dict()) == list(initial_state)
+
+
+def test_round_trip(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    d = played_state(game_data["initial_state"])
+    state = GameState.from_dict(layout, d)
+    assert state.to_dict() == d
+    assert state.stat("money") == 40000
+    assert state.time_of_day == "Night"
+    assert GameState.from_dict(layout, state.to_dict()) == state
+
+
+def test_unknown_keys_round_trip(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    d = played_state(game_data["initial_state"])
+    d["mod_data"] = {"x": 1}
+    d["heist"]["crew"] = ["Cal"]
+    assert GameState.from_dict(layout, d).to_dict() == d
+
+
+def test_unknown_flags_stay_with_their_state(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    names = list(layout.flag_names)
+    d = played_state(game_data["initial_state"])
+    d["flags"]["from_another_version"] = True
+    state = GameState.from_dict(layout, d)
+    assert state.flag("from_another_version")
+    assert state.to_dict() == d
+    assert layout.flag_names == names
+
+    other = GameState.initial(layout)
+    other.set_flag("set_by_a_tool")
+    assert other.flag("set_by_a_tool")
+    assert layout.flag_names == names
+    assert "set_by_a_tool" not in state.to_dict()["flags"]
+    assert "from_another_version" not in GameState.initial(layout).to_dict()["flags"]
+
+
+def test_clone_is_independent(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    state = GameState.from_dict(layout, played_state(game_data["initial_state"]))
+    other = state.clone()
+    assert other == state and hash(other) == hash(state)
+    other.set_stat("money", 1)
+    other.set_flag(layout.flag_names[0])
+    other.add_item("Rope")
+    other.set_flag("not_in_data")
+    assert state.stat("money") == 40000
+    assert not state.flag(layout.flag_names[0])
+    assert "Rope" not in state.inventory
+    assert not state.flag("not_in_data")
+    assert other != state
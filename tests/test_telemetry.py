@@ -0,0 +1,74 @@
+import gzip
+import json
+
+import telemetry
+
+
+def line(session, kind, value, day=1, **fields):
+    return json.dumps({"t": 0, "s": session, "e": kind, "v": value, "day": day, "slot": 0, **fields})
+
+
+def stage_counts(aggregator):
+    names = [stage for stage, _, _ in telemetry.FUNNEL]
+    return dict(zip(names, aggregator.reached)), dict(zip(names, aggregator.stopped))
+
+
+def test_funnel_heist_endings_and_retention():
+    aggregator = telemetry.Aggregator()
+    for text in [
+        line("a", "start", "new"),
+        line("a", "flag", "met_cal"),
+        line("b", "start", "new"),
+        line("a", "visit", "underground", day=2),
+        line("a", "heist", "entry/vent", day=3, ok=False),
+        line("a", "ending", "caught", day=3),
+        line("a", "end", "game_over", day=3, steps=12),
+        line("b", "end", "quit", steps=1),
+        "not json",
+    ]:
+        aggregator.add_line(text)
+    aggregator.finish()
+
+    reached, stopped = stage_counts(aggregator)
+    assert reached["start"] == 2
+    assert reached["clinic_meet_cal"] == 1
+    assert reached["heist"] == 1
+    assert stopped["start"] == 1 and stopped["heist"] == 1
+    assert aggregator.heist == {"entry/vent": [1, 1]}
+    assert aggregator.endings == {"caught": 1}
+    assert aggregator.sessions == 2
+    assert aggregator.bad_lines == 1
+    assert dict(aggregator.last_day) == {1: 1, 3: 1}
+
+
+def test_sessions_without_an_end_are_counted_at_finish():
+    aggregator = telemetry.Aggregator(max_open=2)
+    for session in "abc":
+        aggregator.add_line(line(session, "start", "new"))
+    assert aggregator.sessions == 1  # the oldest open session was closed to stay under max_open
+    aggregator.finish()
+    assert aggregator.sessions == 3
+    assert not aggregator.open
+
+
+def test_log_order_and_gzip(tmp_path):
+    assert telemetry.log_order(["x/events.log", "x/events.log.1", "x/events.log.2.gz"]) == \
+        ["x/events.log.2.gz", "x/events.log.1", "x/events.log"]
+    path = tmp_path / "events.log.1.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(line("a", "start", "new") + "\n")
+    aggregator = telemetry.Aggregator()
+    aggregator.add_file(str(path))
+    assert aggregator.lines == 1
+
+
+def test_writer_rotates(tmp_path):
+    path = str(tmp_path / "events.log")
+    writer = telemetry.TelemetryWriter(path, max_bytes=200, backups=2, flush_interval=60)
+    for i in range(3):
+        for _ in range(4):
+            writer.write({"s": "a", "e": "action", "v": i})
+        writer.flush()
+    writer.close()
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["events.log", "events.log.1", "events.log.2"]
@@ -0,0 +1,46 @@
+from state import GameState
+from templates import TemplateSet
+
+
+def make(game_data):
+    templates = TemplateSet(game_data)
+    state = GameState.initial(templates.layout)
+    state.set_player_field("name", "Alex")
+    state.set_player_field("thief_name", "Thrill")
+    return templates, state
+
+
+def test_placeholders_read_the_state(game_data):
+    templates, state = make(game_data)
+    state.set_stat("money", 1234)
+    state.day = 4
+    flag = templates.layout.flag_names[0]
+    state.set_flag(flag)
+    text = f"{{player_name}} aka {{thief_name}}: ${{stats.money}} on day {{day}} ({{flags.{flag}}})"
+    assert templates.render(text, state) == "Alex aka Thrill: $1234 on day 4 (True)"
+
+
+def test_unknown_placeholders_are_left_alone(game_data):
+    templates, state = make(game_data)
+    text = "{nobody} {stats.nothing} {heist.crew} {not a name} {player_name}"
+    assert templates.render(text, state) == "{nobody} {stats.nothing} {heist.crew} {not a name} Alex"
+    assert templates.render("no fields", state) == "no fields"
+
+
+def test_rendering_follows_state_changes(game_data):
+    templates, state = make(game_data)
+    text = "Money: {stats.money}"
+    before = templates.render(text, state)
+    state.set_stat("money", state.stat("money") + 1)
+    assert templates.render(text, state) != before
+    assert templates.compile(text) is templates.compile(text)
+
+
+def test_equal_values_of_other_fields_do_not_share_a_rendering(game_data):
+    templates, state = make(game_data)
+    flag = templates.layout.flag_names[0]
+    stat = templates.layout.stat_names[0]
+    state.set_flag(flag)
+    state.set_stat(stat, 1)
+    assert templates.render(f"[{{flags.{flag}}}]", state) == "[True]"
+    assert templates.render(f"[{{stats.{stat}}}]", state) == "[1]"
@@ -0,0 +1,161 @@
+import copy
+import random
+
+from state import GameState, StateLayout
+from triggers import Condition, Trigger, TriggerSet, validate_triggers
+
+
+def flag_names(layout, mask):
+    return sorted(name for name in layout.flag_names if mask & layout.flag_bit(name))
+
+
+def effect_spec(layout, effect):
+    """An effect dict back from a compiled Effect (or the dict itself, if left as one)."""
+    if isinstance(effect, dict):
+        return effect
+    spec = {layout.stat_names[index]: delta for index, delta, _, _ in effect.adds}
+    spec.update({layout.stat_names[index]: "full" for index, _ in effect.sets})
+    spec.update({"flag": name for name in flag_names(layout, effect.flags)})
+    if effect.suspicion:
+        spec["suspicion"] = effect.suspicion
+    if effect.ending:
+        spec["ending"] = effect.ending
+    return spec
+
+
+def normalized(steps):
+    """Steps with flag lists sorted, as decompile() returns them."""
+    result = []
+    for step in steps:
+        step = dict(step)
+        for kind in ("set_flags", "clear_flags"):
+            if kind in step:
+                step[kind] = sorted(step[kind])
+        if "if" in step:
+            step["do"] = normalized(step["do"])
+        result.append(step)
+    return result
+
+
+def decompile(program, layout, start=0, stop=None):
+    """The steps a trigger program was compiled from."""
+    steps = []
+    pc = start
+    stop = len(program) if stop is None else stop
+    while pc < stop:
+        op, arg = program[pc]
+        if op == "jump_unless":
+            condition, target = arg
+            steps.append({"if": condition, "do": decompile(program, layout, pc + 1, target)})
+            pc = target
+            continue
+        if op in ("set_flags", "clear_flags"):
+            steps.append({op: flag_names(layout, arg)})
+        elif op in ("add_items", "add_intel"):
+            steps.append({op: list(arg)})
+        elif op == "effect":
+            steps.append({op: effect_spec(layout, arg)})
+        elif op == "arrive":
+            steps.append({op: True})
+        else:
+            steps.append({op: arg})
+        pc += 1
+    return steps
+
+
+def same_steps(decompiled, steps, layout):
+    assert len(decompiled) == len(steps)
+    for got, want in zip(decompiled, steps):
+        if "if" in want:
+            assert_same_condition(got["if"], want["if"], layout)
+            same_steps(got["do"], want["do"], layout)
+        else:
+            assert got == want
+
+
+def reference_test(spec, d):
+    """Whether a condition dict holds for a state dict."""
+    return (all(d["flags"][name] == value for name, value in spec.get("flags", {}).items()) and
+            all(d["stats"][name] >= low for name, low in spec.get("min_stats", {}).items()) and
+            all(d["stats"][name] <= high for name, high in spec.get("max_stats", {}).items()))
+
+
+def sample_states(initial_state, count=200, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        d = copy.deepcopy(initial_state)
+        for flag in d["flags"]:
+            d["flags"][flag] = rng.random() < 0.5
+        for stat in d["stats"]:
+            d["stats"][stat] = rng.randint(0, 100)
+        yield d
+
+
+def assert_same_condition(condition, spec, layout):
+    for d in sample_states(layout.initial_state, 30):
+        assert condition.test(GameState.from_dict(layout, d)) == reference_test(spec, d)
+
+
+def test_programs_decompile_to_their_steps(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    for i, spec in enumerate(game_data["triggers"]):
+        trigger = Trigger(i, spec, layout)
+        same_steps(decompile(trigger.program, layout), normalized(spec["do"]), layout)
+
+
+def test_nested_ifs_jump_past_their_steps(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    first, second = layout.flag_names[:2]
+    steps = [{"notice": "a"},
+             {"if": {"flags": {first: True}}, "do": [
+                 {"set_flags": [second]},
+                 {"if": {"min_stats": {"money": 10}}, "do": [{"add_items": ["Map"]}]},
+                 {"message": "b"}]},
+             {"notice": "c"}]
+    trigger = Trigger(0, {"id": "t", "on": [], "do": steps}, layout)
+    same_steps(decompile(trigger.program, layout), steps, layout)
+
+
+def test_conditions_match_the_reference(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    stat = layout.stat_names[0]
+    specs = [spec.get("if", {}) for spec in game_data["triggers"]]
+    specs += [{"min_stats": {stat: 30}, "max_stats": {stat: 60}}, {"max_stats": {stat: 50}},
+              {"flags": {layout.flag_names[0]: True, layout.flag_names[1]: False}, "min_stats": {stat: 20}}]
+    states = list(sample_states(game_data["initial_state"]))
+    for spec in specs:
+        condition = Condition(spec, layout)
+        for d in states:
+            assert condition.test(GameState.from_dict(layout, d)) == reference_test(spec, d), spec
+
+
+def test_first_matching_trigger_fires(game_data):
+    layout = StateLayout(game_data["initial_state"])
+    triggers = TriggerSet(game_data)
+    for d in sample_states(game_data["initial_state"], 100):
+        state = GameState.from_dict(layout, d)
+        for location_id, location in game_data["locations"].items():
+            expected = next((spec["id"] for spec in game_data["triggers"]
+                             if {"visit": location_id} in spec["on"] and reference_test(spec.get("if", {}), d)),
+                            None)
+            fired = triggers.on_visit(location_id, state)
+            assert (fired and fired.id) == expected
+            for action in location["actions"]:
+                event = {"location": location_id, "action": action}
+                expected = next((spec["id"] for spec in game_data["triggers"]
+                                 if event in spec["on"] and reference_test(spec.get("if", {}), d)), None)
+                fired = triggers.on_action(location_id, action, state)
+                assert (fired and fired.id) == expected
+
+
+def test_validate_triggers(game_data):
+    assert validate_triggers(game_data) == []
+    game_data["triggers"].append({
+        "id": "broken",
+        "on": [{"visit": "moon"}, {"location": "clinic", "action": "Fly"}],
+        "if": {"flags": {"no_flag": True}, "min_stats": {"luck": 1}},
+        "do": [{"dialogue": "missing"}, {"set_flags": ["no_flag"]}, {"dance": True}],
+    })
+    problems = validate_triggers(game_data)
+    assert len(problems) == 7
+    assert all(problem.startswith("trigger 'broken'") for problem in problems)
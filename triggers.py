@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Story triggers
+The "triggers" section of game_data.json says what happens when the player
+visits a location, takes an action or reaches a time, under which conditions.
+Each trigger is compiled once into a condition (a flag mask plus stat ranges)
+and a flat list of steps, and indexed by location and by (location, action),
+so finding the trigger for a visit is a dict lookup and a bitmask test. Timed
+triggers ({"at": ...}, see scheduler.py) go to the engine's event scheduler.
+
+A trigger looks like:
+    {
+      "id": "meet_cal",
+      "on": [{"visit": "clinic"}, {"location": "clinic", "action": "Talk to receptionist"}],
+      "if": {"flags": {"met_cal": false}},
+      "stay": false,
+      "do": [{"dialogue": "clinic_meet_cal"}, {"set_flags": ["met_cal"]}, {"notice": "..."}]
+    }
+
+"if" may also give "min_stats"/"max_stats" ({"charisma": 40}). "stay" says
+whether the player is at the location afterwards (default true). The first
+trigger whose condition holds fires, in data file order; a timed trigger
+whose condition fails is skipped that time. Steps run in order:
+    {"dialogue": key}             play a dialogue; later steps wait for it
+    {"set_flags": [...]}, {"clear_flags": [...]}
+    {"add_items": [...]}, {"add_intel": [...]}
+    {"effect": {...}}             as in a dialogue choice (stats, flag, suspicion, ending)
+    {"notice": text}, {"message": text}
+    {"arrive": true}              show the location header
+    {"confirm_heist": text}       ask whether to start the museum heist
+    {"if": condition, "do": [...]}
+"""
+
+from effects import Effect, effect_problems
+from scheduler import event_timing
+from state import TIMES, cached_for, layout_for
+
+STEP_KINDS = ("dialogue", "set_flags", "clear_flags", "add_items", "add_intel", "effect",
+              "notice", "message", "arrive", "confirm_heist", "if")
+
+
+class Condition:
+    """Flags that must be set or clear, and stat ranges, tested against a GameState."""
+
+    __slots__ = ("mask", "want", "stats")
+
+    def __init__(self, spec, layout):
+        self.mask = 0
+        self.want = 0
+        for name, value in spec.get("flags", {}).items():
+            bit = layout.flag_bit(name)
+            self.mask |= bit
+            if value:
+                self.want |= bit
+        bounds = {}
+        for name, low in spec.get("min_stats", {}).items():
+            bounds[layout.stat_index[name]] = [low, None]
+        for name, high in spec.get("max_stats", {}).items():
+            bounds.setdefault(layout.stat_index[name], [None, None])[1] = high
+        self.stats = tuple((index, low, high) for index, (low, high) in bounds.items())
+
+    def test(self, state):
+        if state.flags & self.mask != self.want:
+            return False
+        for index, low, high in self.stats:
+            value = state.stats[index]
+            if (low is not None and value < low) or (high is not None and value > high):
+                return False
+        return True
+
+
+class Trigger:
+    __slots__ = ("index", "id", "condition", "stay", "program")
+
+    def __init__(self, index, spec, layout):
+        self.index = index
+        self.id = spec["id"]
+        self.condition = Condition(spec.get("if", {}), layout)
+        self.stay = spec.get("stay", True)
+        self.program = []
+        self.compile(spec["do"], layout)
+        self.program = tuple(self.program)
+
+    def compile(self, steps, layout):
+        """Flatten steps into (op, arg) pairs; "if" becomes a forward jump."""
+        program = self.program
+        for step in steps:
+            if "if" in step:
+                jump = len(program)
+                program.append(None)
+                self.compile(step["do"], layout)
+                program[jump] = ("jump_unless", (Condition(step["if"], layout), len(program)))
+            elif "set_flags" in step or "clear_flags" in step:
+                kind = "set_flags" if "set_flags" in step else "clear_flags"
+                mask = 0
+                for name in step[kind]:
+                    mask |= layout.flag_bit(name)
+                program.append((kind, mask))
+            elif "add_items" in step or "add_intel" in step:
+                kind = "add_items" if "add_items" in step else "add_intel"
+                program.append((kind, tuple(step[kind])))
+            elif "effect" in step:
+                program.append(("effect", Effect(step["effect"], layout)))
+            elif "arrive" in step:
+                program.append(("arrive", None))
+            else:
+                kind = next(kind for kind in STEP_KINDS if kind in step)
+                program.append((kind, step[kind]))
+
+
+class TriggerSet:
+    """Every trigger in a game data file, indexed by what sets it off."""
+
+    def __init__(self, data):
+        layout = layout_for(data["initial_state"])
+        self.triggers = [Trigger(i, spec, layout) for i, spec in enumerate(data.get("triggers", []))]
+        self.visits = {}
+        self.actions = {}
+        self.timed = []
+        for trigger, spec in zip(self.triggers, data.get("triggers", [])):
+            for event in spec["on"]:
+                if "visit" in event:
+                    self.visits.setdefault(event["visit"], []).append(trigger)
+                elif "at" in event:
+                    self.timed.append(event_timing(event) + (trigger.index,))
+                else:
+                    self.actions.setdefault((event["location"], event["action"]), []).append(trigger)
+        self.visits = {key: tuple(triggers) for key, triggers in self.visits.items()}
+        self.actions = {key: tuple(triggers) for key, triggers in self.actions.items()}
+
+    def on_visit(self, location_id, state):
+        """The trigger that fires on visiting a location, or None."""
+        for trigger in self.visits.get(location_id, ()):
+            if trigger.condition.test(state):
+                return trigger
+        return None
+
+    def on_action(self, location_id, action, state):
+        """The trigger that fires on taking an action at a location, or None."""
+        for trigger in self.actions.get((location_id, action), ()):
+            if trigger.condition.test(state):
+                return trigger
+        return None
+
+
+def validate_triggers(data):
+    """Problems with the triggers section, as a list of strings."""
+    problems = []
+    stats = data["initial_state"]["stats"]
+    flags = data["initial_state"]["flags"]
+
+    def check_condition(where, spec):
+        for name in spec.get("flags", {}):
+            if name not in flags:
+                problems.append(f"{where}: unknown flag {name!r}")
+        for key in ("min_stats", "max_stats"):
+            for name in spec.get(key, {}):
+                if name not in stats:
+                    problems.append(f"{where}: unknown stat {name!r}")
+
+    def check_steps(where, steps):
+        for step in steps:
+            kinds = [kind for kind in STEP_KINDS if kind in step]
+            if not kinds:
+                problems.append(f"{where}: unknown step {step!r}")
+            elif "dialogue" in step and step["dialogue"] not in data["dialogues"]:
+                problems.append(f"{where}: unknown dialogue {step['dialogue']!r}")
+            elif "set_flags" in step or "clear_flags" in step:
+                for name in step.get("set_flags", []) + step.get("clear_flags", []):
+                    if name not in flags:
+                        problems.append(f"{where}: unknown flag {name!r}")
+            elif "effect" in step:
+                problems.extend(effect_problems(where, step["effect"], data))
+            elif "if" in step:
+                check_condition(where, step["if"])
+                check_steps(where, step.get("do", []))
+
+    for i, spec in enumerate(data.get("triggers", [])):
+        where = f"trigger {spec.get('id', i)!r}"
+        for event in spec.get("on", []):
+            if "visit" in event:
+                if event["visit"] not in data["locations"]:
+                    problems.append(f"{where}: unknown location {event['visit']!r}")
+            elif "at" in event:
+                day = event["at"].get("day", 1)
+                if not isinstance(day, int) or day < 1:
+                    problems.append(f"{where}: day must be a whole number from 1, not {day!r}")
+                if event["at"].get("time", TIMES[0]) not in TIMES:
+                    problems.append(f"{where}: unknown time {event['at']['time']!r}")
+                every = event.get("every")
+                if every is not None and (set(every) - {"days", "slots"} or not any(every.values()) or
+                                          not all(isinstance(n, int) and n >= 0 for n in every.values())):
+                    problems.append(f"{where}: every must give whole numbers of days and/or slots, not {every!r}")
+            elif event.get("location") not in data["locations"]:
+                problems.append(f"{where}: unknown location {event.get('location')!r}")
+            elif event.get("action") not in data["locations"][event["location"]]["actions"]:
+                problems.append(f"{where}: {event.get('action')!r} is not an action at {event['location']}")
+        check_condition(where, spec.get("if", {}))
+        check_steps(where, spec.get("do", []))
+    return problems
+
+
+def cosmetic_flags(data):
+    """Flags that only gate a trigger replaying a choice-free scene.
+
+    Such a flag is set by the only trigger that reads it, that trigger keeps
+    the player at the location, and all it does besides setting the flag is
+    show the location and play dialogues that can't lead to a choice. Whether the flag is
+    set never changes what can happen next, so searches may ignore it.
+    """
+    # dialogues.py builds on Condition, so it is imported here
+    from dialogues import graph_for
+
+    graph = graph_for(data)
+    specs = data.get("triggers", [])
+    read = {}
+    for spec in specs:
+        for name in spec.get("if", {}).get("flags", {}):
+            read.setdefault(name, []).append(spec)
+    unlock = {loc.get("unlock_flag") for loc in data["locations"].values()}
+
+    flags = set()
+    for spec in specs:
+        condition = spec.get("if", {})
+        if not spec.get("stay", True) or set(condition) != {"flags"} or len(condition["flags"]) != 1:
+            continue
+        (name, value), = condition["flags"].items()
+        if value or name in unlock or len(read[name]) != 1:
+            continue
+        harmless = True
+        for step in spec["do"]:
+            if step.get("set_flags") == [name] or "arrive" in step:
+                continue
+            if "dialogue" in step and not graph.asks_choice(step["dialogue"]):
+                continue
+            harmless = False
+        if harmless:
+            flags.add(name)
+    return flags
+
+
+def triggers_for(data):
+    """The (cached) TriggerSet for a game data dict."""
+    return cached_for(data, "triggers", TriggerSet)
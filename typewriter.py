@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+PhantomThrill - Typewriter text
+Prints a line a few characters at a time, but as one write per frame rather
+than one write and one sleep per character. Pressing any key finishes the
+line at once. Lines the player has already read are printed whole.
+"""
+
+import os
+import sys
+import time
+
+try:
+    import select
+    import termios
+    import tty
+except ImportError:  # Windows
+    termios = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+DEFAULT_DELAY = 0.02
+
+# Shortest time between two writes of the same line
+FRAME = 1 / 30
+
+
+class KeyWatcher:
+    """Context manager that notices keypresses on a terminal without blocking.
+
+    While active, the terminal is in cbreak mode so a single key (not just
+    Enter) can be seen, and the keys pressed are swallowed instead of being
+    left for the next input() call.
+    """
+
+    def __init__(self):
+        self.fd = None
+        self.saved = None
+
+    def __enter__(self):
+        try:
+            fd = sys.stdin.fileno()
+        except (AttributeError, ValueError, OSError):
+            return self
+        if termios and os.isatty(fd):
+            try:
+                self.saved = termios.tcgetattr(fd)
+                tty.setcbreak(fd)
+                self.fd = fd
+            except termios.error:
+                self.saved = None
+        return self
+
+    def __exit__(self, *exc):
+        if self.saved is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self.saved)
+        return False
+
+    def wait(self, timeout):
+        """Wait up to timeout seconds; True if a key was pressed."""
+        if self.fd is not None:
+            ready, _, _ = select.select([self.fd], [], [], timeout)
+            if ready:
+                os.read(self.fd, 1024)
+                return True
+            return False
+        if msvcrt and sys.stdin.isatty():
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                if msvcrt.kbhit():
+                    while msvcrt.kbhit():
+                        msvcrt.getwch()
+                    return True
+                time.sleep(0.01)
+            return False
+        time.sleep(timeout)
+        return False
+
+
+class Typewriter:
+    """Writes lines with a typewriter effect.
+
+    speed multiplies the per-character rate (2 is twice as fast), instant
+    prints every line whole, and skip_read prints lines already shown once
+    this session whole.
+    """
+
+    def __init__(self, speed=1.0, instant=False, skip_read=True, stream=None):
+        self.speed = speed
+        self.instant = instant
+        self.skip_read = skip_read
+        self.stream = stream
+        self.read = set()
+
+    def line(self, text, delay=DEFAULT_DELAY):
+        """Write text and a newline."""
+        # Looked up per call so redirect_stdout() is honoured
+        out = self.stream or sys.stdout
+        per_char = delay / self.speed if self.speed > 0 else 0
+        seen = text in self.read
+        self.read.add(text)
+
+        if self.instant or per_char <= 0 or not text or (seen and self.skip_read):
+            out.write(text + "\n")
+            out.flush()
+            return
+
+        with KeyWatcher() as keys:
+            start = time.perf_counter()
+            written = 0
+            while written < len(text):
+                now = time.perf_counter()
+                due = min(len(text), int((now - start) / per_char) + 1)
+                if due > written:
+                    out.write(text[written:due])
+                    out.flush()
+                    written = due
+                    if written == len(text):
+                        break
+                wait = max(FRAME, start + written * per_char - now)
+                if keys.wait(wait):
+                    out.write(text[written:])
+                    written = len(text)
+        out.write("\n")
+        out.flush()